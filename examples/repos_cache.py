@@ -0,0 +1,32 @@
+#!/usr/bin/python
+# Demonstrates how to tune the libsvn_fs caches, and measures their effect
+# on repeatedly reading the same files from a local repository.
+#
+# Usage: repos_cache.py REPOSITORY [CACHE_SIZE_MB]
+
+import sys
+import time
+
+from subvertpy import NODE_FILE, repos
+
+path = sys.argv[1]
+if len(sys.argv) > 2:
+    # The cache size has to be set before the first repository is opened.
+    repos.set_cache_config(cache_size=int(sys.argv[2]) * 1024 * 1024,
+                           cache_fulltexts=True, cache_txdeltas=True)
+print("Cache configuration: %r" % repos.get_cache_config())
+
+fs = repos.Repository(path).fs()
+revnum = fs.youngest_revision()
+files = [entry[0] for entry in fs.revision_root(revnum).walk("")
+         if entry[1] == NODE_FILE]
+
+for i in range(3):
+    start = time.time()
+    nbytes = 0
+    for filepath in files:
+        stream = fs.revision_root(revnum).file_content(filepath)
+        nbytes += len(stream.read())
+        stream.close()
+    print("Pass %d: read %d files (%d bytes) in %.3fs" % (
+        i + 1, len(files), nbytes, time.time() - start))
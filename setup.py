@@ -398,14 +398,18 @@ def subvertpy_modules():
             [source_path(n)
                 for n in ("client.c", "editor.c", "util.c", "_ra.c", "wc.c",
                           "wc_adm.c")],
-            libraries=["svn_client-1", "svn_subr-1", "svn_ra-1", "svn_wc-1"]),
+            libraries=["svn_client-1", "svn_subr-1", "svn_ra-1", "svn_wc-1",
+                       "svn_diff-1"]),
         SvnExtension(
             "subvertpy._ra",
             [source_path(n) for n in ("_ra.c", "util.c", "editor.c")],
-            libraries=["svn_ra-1", "svn_delta-1", "svn_subr-1"]),
+            libraries=["svn_ra-1", "svn_delta-1", "svn_diff-1",
+                       "svn_subr-1"]),
         SvnExtension(
-            "subvertpy.repos", [source_path(n) for n in ("repos.c", "util.c")],
-            libraries=["svn_repos-1", "svn_subr-1", "svn_fs-1"]),
+            "subvertpy.repos",
+            [source_path(n) for n in ("repos.c", "util.c", "editor.c")],
+            libraries=["svn_repos-1", "svn_subr-1", "svn_fs-1",
+                       "svn_delta-1"]),
         SvnExtension(
             "subvertpy.wc",
             [source_path(n) for n in
@@ -122,12 +122,43 @@ def _check_mtime(m):
     return True
 
 
-try:
-    from subvertpy import client, _ra, repos, wc
-    for x in client, _ra, repos, wc:
-        if not _check_mtime(x):
-            from warnings import warn
-            warn("subvertpy extensions are outdated and need to be rebuilt")
-            break
-except ImportError as e:
-    raise ImportError("Unable to load subvertpy extensions: %s" % e)
+# C extensions that are available as attributes of this package. They are
+# only loaded when first used, since loading them initializes APR and the
+# Subversion libraries.
+_EXTENSIONS = ("client", "_ra", "repos", "wc")
+
+
+def _import_extension(name):
+    """Import one of the C extensions.
+
+    If the SUBVERTPY_CHECK_MTIME environment variable is set, warn when the
+    extension is older than its source.
+
+    :param name: Name of the extension module
+    :return: The extension module
+    """
+    import importlib
+    import os
+    try:
+        m = importlib.import_module("subvertpy." + name)
+    except ImportError as e:
+        raise ImportError("Unable to load subvertpy extensions: %s" % e)
+    if os.environ.get("SUBVERTPY_CHECK_MTIME") and not _check_mtime(m):
+        from warnings import warn
+        warn("subvertpy extensions are outdated and need to be rebuilt")
+    return m
+
+
+def __getattr__(name):
+    if name in _EXTENSIONS:
+        return _import_extension(name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+import sys  # noqa: E402
+if sys.version_info < (3, 7):
+    # Module level __getattr__ (PEP 562) is not supported.
+    for _name in _EXTENSIONS:
+        _import_extension(_name)
+    del _name
+del sys
@@ -387,7 +387,7 @@ static svn_error_t *py_file_rev_handler(void *baton, const char *path, svn_revnu
 	PyObject *fn = (PyObject *)baton, *ret, *py_rev_props;
 	PyGILState_STATE state = PyGILState_Ensure();
 
-	py_rev_props = prop_hash_to_dict(rev_props);
+	py_rev_props = prop_hash_to_dict(rev_props, pool);
 	CB_CHECK_PYRETVAL(py_rev_props);
 
 	ret = PyObject_CallFunction(fn, "slOi", path, rev, py_rev_props, result_of_merge);
@@ -409,7 +409,7 @@ static svn_error_t *py_ra_file_rev_handler(void *baton, const char *path, svn_re
 	PyObject *fn = (PyObject *)baton, *ret, *py_rev_props;
 	PyGILState_STATE state = PyGILState_Ensure();
 
-	py_rev_props = prop_hash_to_dict(rev_props);
+	py_rev_props = prop_hash_to_dict(rev_props, pool);
 	CB_CHECK_PYRETVAL(py_rev_props);
 
 	ret = PyObject_CallFunction(fn, "slO", path, rev, py_rev_props);
@@ -1231,7 +1231,7 @@ static svn_error_t *py_revstart_cb(svn_revnum_t revision, void *replay_baton,
 {
 	PyObject *cbs = (PyObject *)replay_baton;
 	PyObject *py_start_fn = PyTuple_GetItem(cbs, 0);
-	PyObject *py_revprops = prop_hash_to_dict(rev_props);
+	PyObject *py_revprops = prop_hash_to_dict(rev_props, pool);
 	PyObject *ret;
 	PyGILState_STATE state = PyGILState_Ensure();
 
@@ -1251,7 +1251,7 @@ static svn_error_t *py_revfinish_cb(svn_revnum_t revision, void *replay_baton,
 {
 	PyObject *cbs = (PyObject *)replay_baton;
 	PyObject *py_finish_fn = PyTuple_GetItem(cbs, 1);
-	PyObject *py_revprops = prop_hash_to_dict(rev_props);
+	PyObject *py_revprops = prop_hash_to_dict(rev_props, pool);
 	PyObject *ret;
 	PyGILState_STATE state = PyGILState_Ensure();
 
@@ -1323,7 +1323,7 @@ static PyObject *ra_rev_proplist(PyObject *self, PyObject *args)
 		return NULL;
 	RUN_RA_WITH_POOL(temp_pool, ra,
 					  svn_ra_rev_proplist(ra->ra, rev, &props, temp_pool));
-	py_props = prop_hash_to_dict(props);
+	py_props = prop_hash_to_dict(props, temp_pool);
 	apr_pool_destroy(temp_pool);
 	return py_props;
 }
@@ -1505,10 +1505,12 @@ static PyObject *ra_get_dir(PyObject *self, PyObject *args, PyObject *kwargs)
 	svn_revnum_t revision = -1;
 	unsigned int dirent_fields = 0;
 	PyObject *py_dirents = NULL, *py_props;
-	char *kwnames[] = { "path", "revision", "fields", NULL };
+	char columnar = 0;
+	char *kwnames[] = { "path", "revision", "fields", "columnar", NULL };
 
-	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|lI:get_dir", kwnames,
-                                     &py_path, &revision, &dirent_fields))
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|lIb:get_dir", kwnames,
+                                     &py_path, &revision, &dirent_fields,
+                                     &columnar))
 		return NULL;
 
 	if (ra_check_busy(ra))
@@ -1535,13 +1537,17 @@ static PyObject *ra_get_dir(PyObject *self, PyObject *args, PyObject *kwargs)
 		py_dirents = Py_None;
 		Py_INCREF(py_dirents);
 	} else {
-		py_dirents = dirent_hash_to_dict(dirents, dirent_fields, temp_pool);
+		if (columnar) {
+			py_dirents = dirent_hash_to_columns(dirents, dirent_fields, temp_pool);
+		} else {
+			py_dirents = dirent_hash_to_dict(dirents, dirent_fields, temp_pool);
+		}
 		if (py_dirents == NULL) {
 			goto fail;
 		}
 	}
 
-	py_props = prop_hash_to_dict(props);
+	py_props = prop_hash_to_dict(props, temp_pool);
 	if (py_props == NULL) {
 		goto fail;
 	}
@@ -1582,23 +1588,33 @@ static PyObject *ra_get_file(PyObject *self, PyObject *args)
 	path = py_object_to_svn_relpath(py_path, temp_pool);
 	if (path == NULL) {
 		apr_pool_destroy(temp_pool);
+		ra->busy = false;
 		return NULL;
 	}
 
 	/* Yuck. Subversion doesn't like leading slashes.. */
 	while (*path == '/') path++;
 
-	stream = new_py_stream(temp_pool, py_stream);
-	if (stream == NULL) {
-		apr_pool_destroy(temp_pool);
-		return NULL;
+	if (py_stream == Py_None) {
+		/* Only fetch the properties */
+		stream = NULL;
+	} else {
+		stream = new_py_output_stream(temp_pool, py_stream);
+		if (stream == NULL) {
+			apr_pool_destroy(temp_pool);
+			ra->busy = false;
+			return NULL;
+		}
 	}
 
 	RUN_RA_WITH_POOL(temp_pool, ra, svn_ra_get_file(ra->ra, path, revision,
 													stream,
 													&fetch_rev, &props, temp_pool));
 
-	py_props = prop_hash_to_dict(props);
+	if (stream != NULL)
+		RUN_SVN_WITH_POOL(temp_pool, svn_stream_close(stream));
+
+	py_props = prop_hash_to_dict(props, temp_pool);
 	if (py_props == NULL) {
 		apr_pool_destroy(temp_pool);
 		return NULL;
@@ -2251,12 +2267,22 @@ static PyGetSetDef ra_getsetters[] = {
 };
 
 #include "_ra_iter_log.c"
+#include "_ra_blame.c"
+#include "_ra_commit_tree.c"
 
 static PyMethodDef ra_methods[] = {
     { "get_session_url", (PyCFunction)ra_get_session_url, METH_NOARGS,
         "S.get_session_url() -> url" },
 	{ "get_file_revs", ra_get_file_revs, METH_VARARGS,
 		"S.get_file_revs(path, start_rev, end_revs, handler)" },
+	{ "blame", (PyCFunction)ra_blame, METH_VARARGS|METH_KEYWORDS,
+		"S.blame(path, start, end, include_merged_revisions=False) -> dict\n"
+		"Determine for each line of a file the revision in which it was "
+		"last changed.\n"
+		"Returns a dictionary with 'revnum' (array of revision numbers), "
+		"'author' (array of indexes into 'authors', -1 if unknown) and "
+		"'authors' (list of author names). If include_merged_revisions is "
+		"set, 'merged_revnum' and 'merged_author' follow merges as well." },
 	{ "get_locations", ra_get_locations, METH_VARARGS,
 		"S.get_locations(path, peg_revision, location_revisions)" },
 	{ "get_locks", ra_get_locks, METH_VARARGS,
@@ -2284,17 +2310,31 @@ static PyMethodDef ra_methods[] = {
 		"S.get_lock(path) -> lock\n"
 	},
 	{ "get_dir", (PyCFunction)ra_get_dir, METH_VARARGS|METH_KEYWORDS,
-		"S.get_dir(path, revision, dirent_fields=-1) -> (dirents, fetched_rev, properties)\n"
-		"Get the contents of a directory. "},
+		"S.get_dir(path, revision, dirent_fields=-1, columnar=False) -> (dirents, fetched_rev, properties)\n"
+		"Get the contents of a directory. "
+		"If columnar is set, dirents is a dictionary mapping field names "
+		"to lists or arrays of values rather than a dictionary of Dirent "
+		"objects. "},
 	{ "get_file", ra_get_file, METH_VARARGS,
 		"S.get_file(path, stream, revnum=-1) -> (fetched_rev, properties)\n"
-		"Fetch a file. The contents will be written to stream." },
+		"Fetch a file. The contents will be written to stream. "
+		"If stream is None, only the properties are fetched." },
 	{ "change_rev_prop", ra_change_rev_prop, METH_VARARGS,
 		"S.change_rev_prop(revnum, name, value)\n"
 		"Change a revision property" },
 	{ "get_commit_editor", (PyCFunction)get_commit_editor, METH_VARARGS|METH_KEYWORDS,
 		"S.get_commit_editor(revprops, commit_callback, lock_tokens, keep_locks) -> editor\n"
 	},
+	{ "commit_tree", (PyCFunction)ra_commit_tree, METH_VARARGS|METH_KEYWORDS,
+		"S.commit_tree(revprops, changes, callback=None) -> revnum\n"
+		"Commit a set of changes without driving the commit editor from "
+		"Python.\n"
+		"changes maps paths to tuples (action, kind, contents, props, "
+		"copyfrom), of which all but action are optional. action is one of "
+		"'add', 'copy', 'modify' or 'delete'; kind is NODE_FILE (the "
+		"default) or NODE_DIR; contents are bytes or a file-like object; "
+		"props maps property names to values, or None to delete them; "
+		"copyfrom is a (url, revnum) tuple for copies." },
 	{ "rev_proplist", ra_rev_proplist, METH_VARARGS,
 		"S.rev_proplist(revnum) -> properties\n"
 		"Return a dictionary with the properties set on the specified revision" },
@@ -2331,12 +2371,18 @@ static PyMethodDef ra_methods[] = {
 	{ "iter_log", (PyCFunction)ra_iter_log, METH_VARARGS|METH_KEYWORDS,
 		"S.iter_log(paths, start, end, limit=0, "
 		"discover_changed_paths=False, strict_node_history=True, "
-		"include_merged_revisions=False, revprops=None)\n"
+		"include_merged_revisions=False, revprops=None, columnar=False, "
+		"batch_size=10000)\n"
 		"Yields tuples of three or four elements:\n"
 		"(changed_paths, revision, revprops[, has_children])\n"
 		"The changed_paths element may be None, or a dictionary mapping each\n"
 		"path to a tuple:\n"
 		"(action, from_path, from_rev, node_kind)\n"
+		"If columnar is set, the changed paths of all revisions are instead\n"
+		"yielded in batches of up to batch_size entries. Each batch is a\n"
+		"dictionary with the arrays 'revnum', 'action' (character codes),\n"
+		"'node_kind' and 'copyfrom_rev' and the lists 'path' and\n"
+		"'copyfrom_path'. Equal paths share a single string object.\n"
 		"This method collects the log entries in another thread. Before calling\n"
 		"any further methods, make sure the thread has completed by running the\n"
 		"iterator to exhaustion (i.e. until StopIteration is raised, the \"for\"\n"
@@ -3435,6 +3481,9 @@ moduleinit(void)
 	if (PyType_Ready(&LogIterator_Type) < 0)
 		return NULL;
 
+	if (PyType_Ready(&Dirent_Type) < 0)
+		return NULL;
+
 	apr_initialize();
 	pool = Pool(NULL);
 	if (pool == NULL)
@@ -3471,6 +3520,9 @@ moduleinit(void)
 	PyModule_AddObject(mod, "Editor", (PyObject *)&Editor_Type);
 	Py_INCREF(&Editor_Type);
 
+	PyModule_AddObject(mod, "Dirent", (PyObject *)&Dirent_Type);
+	Py_INCREF(&Dirent_Type);
+
 	busy_exc = PyErr_NewException("_ra.BusyException", NULL, NULL);
 	PyModule_AddObject(mod, "BusyException", busy_exc);
 
@@ -0,0 +1,393 @@
+/*
+ * Copyright © 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+ * -*- coding: utf-8 -*-
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU Lesser General Public License as published by
+ * the Free Software Foundation; either version 2.1 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301, USA
+ */
+
+/* Blame engine, driven by svn_ra_get_file_revs2().
+ *
+ * Each revision of the file is reconstructed in memory by applying the
+ * delta to the previous revision. The new text is then diffed against the
+ * previous one, and the origin of every line is carried over from the
+ * previous revision or set to the new revision. This is the same
+ * algorithm as svn_client_blame, without the temporary files.
+ */
+
+#if ONLY_SINCE_SVN(1, 5)
+#include <svn_diff.h>
+
+typedef struct {
+	svn_revnum_t revnum;
+	/* Index in the author table, or -1 if the revision has no author */
+	int author;
+} BlameRevision;
+
+/* A sequence of texts, and where their lines originated */
+typedef struct {
+	/* Text of the last revision in the chain, or NULL */
+	svn_stringbuf_t *text;
+	/* Index in the revision table for each line in text */
+	apr_array_header_t *lines;
+	apr_pool_t *pool;
+} BlameChain;
+
+typedef struct {
+	apr_pool_t *pool;
+	svn_boolean_t include_merged_revisions;
+	svn_diff_file_options_t *diff_options;
+	/* Revisions that lines can be attributed to */
+	apr_array_header_t *revisions;
+	/* Author table; author_ids maps author names to int* indexes */
+	apr_array_header_t *authors;
+	apr_hash_t *author_ids;
+	/* Text of the last revision received, the base for the next delta */
+	svn_stringbuf_t *last_text;
+	apr_pool_t *last_pool;
+	/* Line origins, following copies but not merges */
+	BlameChain chain;
+	/* Line origins, following merges as well */
+	BlameChain merged_chain;
+	/* Revision that is being received */
+	int rev_index;
+	svn_boolean_t result_of_merge;
+	svn_stringbuf_t *text;
+	apr_pool_t *text_pool;
+	svn_txdelta_window_handler_t apply_handler;
+	void *apply_baton;
+} BlameBaton;
+
+typedef struct {
+	apr_array_header_t *old_lines;
+	apr_array_header_t *new_lines;
+	int rev_index;
+} BlameDiffBaton;
+
+static svn_error_t *blame_output_common(void *baton,
+	apr_off_t original_start, apr_off_t original_length,
+	apr_off_t modified_start, apr_off_t modified_length,
+	apr_off_t latest_start, apr_off_t latest_length)
+{
+	BlameDiffBaton *db = baton;
+	apr_off_t i;
+
+	for (i = 0; i < original_length; i++) {
+		APR_ARRAY_PUSH(db->new_lines, int) =
+			APR_ARRAY_IDX(db->old_lines, original_start + i, int);
+	}
+	return NULL;
+}
+
+static svn_error_t *blame_output_diff_modified(void *baton,
+	apr_off_t original_start, apr_off_t original_length,
+	apr_off_t modified_start, apr_off_t modified_length,
+	apr_off_t latest_start, apr_off_t latest_length)
+{
+	BlameDiffBaton *db = baton;
+	apr_off_t i;
+
+	for (i = 0; i < modified_length; i++)
+		APR_ARRAY_PUSH(db->new_lines, int) = db->rev_index;
+	return NULL;
+}
+
+static const svn_diff_output_fns_t blame_output_fns = {
+	blame_output_common,
+	blame_output_diff_modified,
+	NULL,
+	NULL,
+	NULL,
+};
+
+/* Add a new text to a chain, attributing changed lines to rev_index */
+static svn_error_t *blame_update_chain(BlameBaton *baton, BlameChain *chain,
+									   svn_stringbuf_t *text, int rev_index)
+{
+	apr_pool_t *pool;
+	BlameDiffBaton db;
+	svn_diff_t *diff;
+	svn_string_t original, modified;
+
+	pool = svn_pool_create(baton->pool);
+	db.new_lines = apr_array_make(pool, 0, sizeof(int));
+	db.rev_index = rev_index;
+
+	if (chain->text == NULL) {
+		original.data = "";
+		original.len = 0;
+		db.old_lines = db.new_lines;
+	} else {
+		original.data = chain->text->data;
+		original.len = chain->text->len;
+		db.old_lines = chain->lines;
+	}
+	modified.data = text->data;
+	modified.len = text->len;
+
+	SVN_ERR(svn_diff_mem_string_diff(&diff, &original, &modified,
+									 baton->diff_options, pool));
+#if ONLY_SINCE_SVN(1, 9)
+	SVN_ERR(svn_diff_output2(diff, &db, &blame_output_fns, NULL, NULL));
+#else
+	SVN_ERR(svn_diff_output(diff, &db, &blame_output_fns));
+#endif
+
+	chain->text = svn_stringbuf_dup(text, pool);
+	chain->lines = db.new_lines;
+	if (chain->pool != NULL)
+		svn_pool_destroy(chain->pool);
+	chain->pool = pool;
+	return NULL;
+}
+
+/* Process the text of a revision once it has been received completely */
+static svn_error_t *blame_process_revision(BlameBaton *baton,
+										   svn_stringbuf_t *text)
+{
+	if (baton->include_merged_revisions) {
+		SVN_ERR(blame_update_chain(baton, &baton->merged_chain, text,
+								   baton->rev_index));
+	}
+	if (!baton->result_of_merge) {
+		SVN_ERR(blame_update_chain(baton, &baton->chain, text,
+								   baton->rev_index));
+	}
+	return NULL;
+}
+
+static svn_error_t *blame_window_handler(svn_txdelta_window_t *window,
+										 void *_baton)
+{
+	BlameBaton *baton = _baton;
+
+	SVN_ERR(baton->apply_handler(window, baton->apply_baton));
+	if (window != NULL)
+		return NULL;
+
+	/* The delta is complete; the new text is the base for the next one. */
+	if (baton->last_pool != NULL)
+		svn_pool_destroy(baton->last_pool);
+	baton->last_pool = baton->text_pool;
+	baton->last_text = baton->text;
+	baton->text_pool = NULL;
+	baton->text = NULL;
+
+	return blame_process_revision(baton, baton->last_text);
+}
+
+static int blame_author_id(BlameBaton *baton, apr_hash_t *rev_props)
+{
+	svn_string_t *author;
+	int *id;
+
+	if (rev_props == NULL)
+		return -1;
+	author = apr_hash_get(rev_props, SVN_PROP_REVISION_AUTHOR,
+						  APR_HASH_KEY_STRING);
+	if (author == NULL)
+		return -1;
+	id = apr_hash_get(baton->author_ids, author->data, author->len);
+	if (id != NULL)
+		return *id;
+
+	id = apr_palloc(baton->pool, sizeof(int));
+	*id = baton->authors->nelts;
+	APR_ARRAY_PUSH(baton->authors, const char *) =
+		apr_pstrmemdup(baton->pool, author->data, author->len);
+	apr_hash_set(baton->author_ids,
+				 APR_ARRAY_IDX(baton->authors, *id, const char *),
+				 author->len, id);
+	return *id;
+}
+
+static svn_error_t *blame_file_rev_handler(void *_baton, const char *path,
+	svn_revnum_t rev, apr_hash_t *rev_props, svn_boolean_t result_of_merge,
+	svn_txdelta_window_handler_t *delta_handler, void **delta_baton,
+	apr_array_header_t *prop_diffs, apr_pool_t *pool)
+{
+	BlameBaton *baton = _baton;
+	BlameRevision *revision;
+	svn_stream_t *source, *target;
+
+	revision = apr_array_push(baton->revisions);
+	revision->revnum = rev;
+	revision->author = blame_author_id(baton, rev_props);
+	baton->rev_index = baton->revisions->nelts - 1;
+	baton->result_of_merge = result_of_merge;
+
+	if (delta_handler == NULL) {
+		/* Text is unchanged, but the mainline may still have to catch up
+		 * with changes that were merged. */
+		if (baton->last_text != NULL && !result_of_merge &&
+			baton->include_merged_revisions &&
+			(baton->chain.text == NULL ||
+			 !svn_stringbuf_compare(baton->last_text, baton->chain.text)))
+			return blame_process_revision(baton, baton->last_text);
+		return NULL;
+	}
+
+	baton->text_pool = svn_pool_create(baton->pool);
+	baton->text = svn_stringbuf_create("", baton->text_pool);
+	if (baton->last_text != NULL)
+		source = svn_stream_from_stringbuf(baton->last_text, pool);
+	else
+		source = svn_stream_empty(pool);
+	target = svn_stream_from_stringbuf(baton->text, pool);
+	svn_txdelta_apply(source, target, NULL, NULL, pool,
+					  &baton->apply_handler, &baton->apply_baton);
+	*delta_handler = blame_window_handler;
+	*delta_baton = baton;
+	return NULL;
+}
+
+static int blame_set_column(PyObject *result, const char *name,
+							PyObject *value)
+{
+	int ret;
+
+	if (value == NULL)
+		return -1;
+	ret = PyDict_SetItemString(result, name, value);
+	Py_DECREF(value);
+	return ret;
+}
+
+/* Convert the line origins of a chain to revnum and author arrays */
+static int blame_chain_to_columns(BlameBaton *baton, BlameChain *chain,
+								  PyObject *result, const char *revnum_key,
+								  const char *author_key)
+{
+	long *revnums;
+	int *authors;
+	int i, n;
+	int ret;
+
+	n = (chain->lines == NULL)?0:chain->lines->nelts;
+	revnums = malloc(sizeof(long) * (n + 1));
+	authors = malloc(sizeof(int) * (n + 1));
+	if (revnums == NULL || authors == NULL) {
+		free(revnums);
+		free(authors);
+		PyErr_NoMemory();
+		return -1;
+	}
+	for (i = 0; i < n; i++) {
+		BlameRevision *revision = &APR_ARRAY_IDX(
+			baton->revisions, APR_ARRAY_IDX(chain->lines, i, int),
+			BlameRevision);
+		revnums[i] = revision->revnum;
+		authors[i] = revision->author;
+	}
+
+	if (blame_set_column(result, revnum_key,
+			py_array_from_buffer("l", revnums, sizeof(long) * n)) != 0 ||
+		blame_set_column(result, author_key,
+			py_array_from_buffer("i", authors, sizeof(int) * n)) != 0) {
+		ret = -1;
+	} else {
+		ret = 0;
+	}
+	free(revnums);
+	free(authors);
+	return ret;
+}
+#endif
+
+static PyObject *ra_blame(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+#if ONLY_SINCE_SVN(1, 5)
+	char *kwnames[] = { "path", "start", "end", "include_merged_revisions",
+		NULL };
+	char *path;
+	svn_revnum_t start, end;
+	bool include_merged_revisions = false;
+	RemoteAccessObject *ra = (RemoteAccessObject *)self;
+	apr_pool_t *temp_pool;
+	BlameBaton baton;
+	PyObject *result, *py_authors;
+	int i;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "sll|b:blame", kwnames,
+									 &path, &start, &end,
+									 &include_merged_revisions))
+		return NULL;
+
+	if (ra_check_svn_path(path))
+		return NULL;
+
+	if (ra_check_busy(ra))
+		return NULL;
+
+	temp_pool = Pool(NULL);
+	if (temp_pool == NULL) {
+		ra->busy = false;
+		return NULL;
+	}
+
+	memset(&baton, 0, sizeof(baton));
+	baton.pool = temp_pool;
+	baton.include_merged_revisions = include_merged_revisions?TRUE:FALSE;
+	baton.diff_options = svn_diff_file_options_create(temp_pool);
+	baton.revisions = apr_array_make(temp_pool, 0, sizeof(BlameRevision));
+	baton.authors = apr_array_make(temp_pool, 0, sizeof(const char *));
+	baton.author_ids = apr_hash_make(temp_pool);
+
+	RUN_RA_WITH_POOL(temp_pool, ra, svn_ra_get_file_revs2(ra->ra, path,
+				start, end, baton.include_merged_revisions,
+				blame_file_rev_handler, &baton, temp_pool));
+
+	result = PyDict_New();
+	if (result == NULL) {
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+
+	py_authors = PyList_New(baton.authors->nelts);
+	if (py_authors == NULL) {
+		apr_pool_destroy(temp_pool);
+		Py_DECREF(result);
+		return NULL;
+	}
+	for (i = 0; i < baton.authors->nelts; i++) {
+		PyObject *py_author = PyUnicode_FromString(
+			APR_ARRAY_IDX(baton.authors, i, const char *));
+		if (py_author == NULL) {
+			apr_pool_destroy(temp_pool);
+			Py_DECREF(py_authors);
+			Py_DECREF(result);
+			return NULL;
+		}
+		PyList_SET_ITEM(py_authors, i, py_author);
+	}
+
+	if (blame_set_column(result, "authors", py_authors) != 0 ||
+		blame_chain_to_columns(&baton, &baton.chain, result, "revnum",
+							   "author") != 0 ||
+		(include_merged_revisions &&
+		 blame_chain_to_columns(&baton, &baton.merged_chain, result,
+								"merged_revnum", "merged_author") != 0)) {
+		apr_pool_destroy(temp_pool);
+		Py_DECREF(result);
+		return NULL;
+	}
+
+	apr_pool_destroy(temp_pool);
+	return result;
+#else
+	PyErr_SetString(PyExc_NotImplementedError,
+					"blame requires Subversion 1.5 or later");
+	return NULL;
+#endif
+}
@@ -0,0 +1,395 @@
+/*
+ * Copyright © 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+ * -*- coding: utf-8 -*-
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU Lesser General Public License as published by
+ * the Free Software Foundation; either version 2.1 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public License
+ * along with this program; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301, USA
+ */
+
+/* Commit a set of changes in one go.
+ *
+ * The changes are converted to C structures up front, after which the
+ * commit editor is driven by svn_delta_path_driver() without the GIL.
+ * Only contents that are read from Python file-like objects without a
+ * file descriptor take the GIL again.
+ */
+
+#if ONLY_SINCE_SVN(1, 5)
+typedef enum {
+	COMMIT_TREE_ADD,
+	COMMIT_TREE_COPY,
+	COMMIT_TREE_MODIFY,
+	COMMIT_TREE_DELETE,
+} CommitTreeAction;
+
+typedef struct {
+	const char *name;
+	/* New value, or NULL to delete the property */
+	const svn_string_t *value;
+} CommitTreeProp;
+
+typedef struct {
+	CommitTreeAction action;
+	svn_node_kind_t kind;
+	/* New contents, or NULL if the contents are unchanged */
+	svn_stream_t *contents;
+	/* Property changes, as CommitTreeProp; NULL if there are none */
+	apr_array_header_t *props;
+	const char *copyfrom_path;
+	svn_revnum_t copyfrom_rev;
+} CommitTreeChange;
+
+typedef struct {
+	const svn_delta_editor_t *editor;
+	void *edit_baton;
+	/* Maps paths to CommitTreeChange * */
+	apr_hash_t *changes;
+	PyObject *commit_callback;
+	svn_revnum_t revnum;
+} CommitTreeBaton;
+
+static svn_error_t *commit_tree_callback(const svn_commit_info_t *commit_info,
+										 void *baton, apr_pool_t *pool)
+{
+	CommitTreeBaton *tree_baton = baton;
+
+	tree_baton->revnum = commit_info->revision;
+	return py_commit_callback(commit_info, tree_baton->commit_callback, pool);
+}
+
+static svn_error_t *commit_tree_change_props(CommitTreeBaton *baton,
+	CommitTreeChange *change, void *node_baton, apr_pool_t *pool)
+{
+	CommitTreeProp *prop;
+	int i;
+
+	if (change->props == NULL)
+		return NULL;
+
+	for (i = 0; i < change->props->nelts; i++) {
+		prop = &APR_ARRAY_IDX(change->props, i, CommitTreeProp);
+		if (change->kind == svn_node_dir) {
+			SVN_ERR(baton->editor->change_dir_prop(node_baton, prop->name,
+												   prop->value, pool));
+		} else {
+			SVN_ERR(baton->editor->change_file_prop(node_baton, prop->name,
+													prop->value, pool));
+		}
+	}
+	return NULL;
+}
+
+static svn_error_t *commit_tree_path(void **dir_baton, void *parent_baton,
+									 void *callback_baton, const char *path,
+									 apr_pool_t *pool)
+{
+	CommitTreeBaton *baton = callback_baton;
+	const svn_delta_editor_t *editor = baton->editor;
+	CommitTreeChange *change;
+	void *file_baton;
+	svn_txdelta_window_handler_t handler;
+	void *handler_baton;
+
+	*dir_baton = NULL;
+	change = apr_hash_get(baton->changes, path, APR_HASH_KEY_STRING);
+
+	if (change->action == COMMIT_TREE_DELETE) {
+		return editor->delete_entry(path, SVN_INVALID_REVNUM, parent_baton,
+									pool);
+	}
+
+	if (change->kind == svn_node_dir) {
+		if (parent_baton == NULL) {
+			SVN_ERR(editor->open_root(baton->edit_baton, SVN_INVALID_REVNUM,
+									  pool, dir_baton));
+		} else if (change->action == COMMIT_TREE_MODIFY) {
+			SVN_ERR(editor->open_directory(path, parent_baton,
+										   SVN_INVALID_REVNUM, pool,
+										   dir_baton));
+		} else {
+			SVN_ERR(editor->add_directory(path, parent_baton,
+										  change->copyfrom_path,
+										  change->copyfrom_rev, pool,
+										  dir_baton));
+		}
+		return commit_tree_change_props(baton, change, *dir_baton, pool);
+	}
+
+	if (change->action == COMMIT_TREE_MODIFY) {
+		SVN_ERR(editor->open_file(path, parent_baton, SVN_INVALID_REVNUM,
+								  pool, &file_baton));
+	} else {
+		SVN_ERR(editor->add_file(path, parent_baton, change->copyfrom_path,
+								 change->copyfrom_rev, pool, &file_baton));
+	}
+	SVN_ERR(commit_tree_change_props(baton, change, file_baton, pool));
+	if (change->contents != NULL) {
+		SVN_ERR(editor->apply_textdelta(file_baton, NULL, pool, &handler,
+										&handler_baton));
+		SVN_ERR(svn_txdelta_send_stream(change->contents, handler,
+										handler_baton, NULL, pool));
+	}
+	return editor->close_file(file_baton, NULL, pool);
+}
+
+static svn_error_t *commit_tree_drive(CommitTreeBaton *baton,
+									  apr_array_header_t *paths,
+									  apr_pool_t *pool)
+{
+	svn_error_t *err;
+
+#if ONLY_SINCE_SVN(1, 8)
+	err = svn_delta_path_driver2(baton->editor, baton->edit_baton, paths,
+								 TRUE, commit_tree_path, baton, pool);
+#else
+	err = svn_delta_path_driver(baton->editor, baton->edit_baton,
+								SVN_INVALID_REVNUM, paths, commit_tree_path,
+								baton, pool);
+#endif
+	if (err != NULL) {
+		svn_error_clear(baton->editor->abort_edit(baton->edit_baton, pool));
+		return err;
+	}
+	return baton->editor->close_edit(baton->edit_baton, pool);
+}
+
+static bool commit_tree_props(PyObject *py_props, apr_array_header_t **props,
+							  apr_pool_t *pool)
+{
+	Py_ssize_t idx = 0;
+	PyObject *k, *v;
+	CommitTreeProp *prop;
+	char *val;
+	Py_ssize_t val_size;
+
+	*props = NULL;
+	if (py_props == Py_None)
+		return true;
+
+	if (!PyDict_Check(py_props)) {
+		PyErr_SetString(PyExc_TypeError, "props should be dictionary");
+		return false;
+	}
+
+	*props = apr_array_make(pool, PyDict_Size(py_props),
+							sizeof(CommitTreeProp));
+	while (PyDict_Next(py_props, &idx, &k, &v)) {
+		prop = apr_array_push(*props);
+		prop->name = py_object_to_svn_string(k, pool);
+		if (prop->name == NULL)
+			return false;
+
+		if (v == Py_None) {
+			prop->value = NULL;
+			continue;
+		}
+
+		if (PyUnicode_Check(v)) {
+			v = PyUnicode_AsUTF8String(v);
+			if (v == NULL)
+				return false;
+		} else {
+			Py_INCREF(v);
+		}
+		if (PyBytes_AsStringAndSize(v, &val, &val_size) == -1) {
+			Py_DECREF(v);
+			return false;
+		}
+		prop->value = svn_string_ncreate(val, val_size, pool);
+		Py_DECREF(v);
+	}
+	return true;
+}
+
+static CommitTreeChange *commit_tree_change(const char *path,
+											PyObject *py_change,
+											apr_pool_t *pool)
+{
+	CommitTreeChange *change;
+	char *action;
+	int kind = svn_node_file;
+	PyObject *py_contents = Py_None, *py_props = Py_None;
+	PyObject *py_copyfrom = Py_None;
+	char *copyfrom_path;
+
+	if (!PyTuple_Check(py_change)) {
+		PyErr_Format(PyExc_TypeError,
+					 "change for %s should be a tuple", path);
+		return NULL;
+	}
+
+	if (!PyArg_ParseTuple(py_change, "s|iOOO", &action, &kind,
+						  &py_contents, &py_props, &py_copyfrom))
+		return NULL;
+
+	change = apr_pcalloc(pool, sizeof(CommitTreeChange));
+	change->copyfrom_rev = SVN_INVALID_REVNUM;
+	if (!strcmp(action, "add")) {
+		change->action = COMMIT_TREE_ADD;
+	} else if (!strcmp(action, "copy")) {
+		change->action = COMMIT_TREE_COPY;
+	} else if (!strcmp(action, "modify")) {
+		change->action = COMMIT_TREE_MODIFY;
+	} else if (!strcmp(action, "delete")) {
+		if (*path == '\0') {
+			PyErr_SetString(PyExc_ValueError, "the root can not be deleted");
+			return NULL;
+		}
+		change->action = COMMIT_TREE_DELETE;
+		return change;
+	} else {
+		PyErr_Format(PyExc_ValueError, "invalid action %s for %s", action,
+					 path);
+		return NULL;
+	}
+
+	if (kind != svn_node_file && kind != svn_node_dir) {
+		PyErr_Format(PyExc_ValueError, "invalid node kind %d for %s", kind,
+					 path);
+		return NULL;
+	}
+	change->kind = kind;
+
+	if (*path == '\0' &&
+		(change->action != COMMIT_TREE_MODIFY || kind != svn_node_dir)) {
+		PyErr_SetString(PyExc_ValueError,
+						"the root can only be modified as a directory");
+		return NULL;
+	}
+
+	if (change->action == COMMIT_TREE_COPY) {
+		if (!PyArg_ParseTuple(py_copyfrom, "sl", &copyfrom_path,
+							  &change->copyfrom_rev)) {
+			if (py_copyfrom == Py_None) {
+				PyErr_Clear();
+				PyErr_Format(PyExc_ValueError,
+							 "copy of %s needs a copy source", path);
+			}
+			return NULL;
+		}
+		change->copyfrom_path = apr_pstrdup(pool, copyfrom_path);
+	} else if (py_copyfrom != Py_None) {
+		PyErr_Format(PyExc_ValueError, "only copies can have a copy "
+					 "source, not %s of %s", action, path);
+		return NULL;
+	}
+
+	if (!commit_tree_props(py_props, &change->props, pool))
+		return NULL;
+
+	if (py_contents == Py_None) {
+		change->contents = NULL;
+	} else if (kind == svn_node_dir) {
+		PyErr_Format(PyExc_ValueError,
+					 "directory %s can not have contents", path);
+		return NULL;
+	} else if (PyBytes_Check(py_contents)) {
+		change->contents = svn_stream_from_string(
+			svn_string_ncreate(PyBytes_AS_STRING(py_contents),
+							   PyBytes_GET_SIZE(py_contents), pool),
+			pool);
+	} else if (PyObject_HasAttrString(py_contents, "read")) {
+		change->contents = new_py_input_stream(pool, py_contents);
+		if (change->contents == NULL)
+			return NULL;
+	} else {
+		PyErr_Format(PyExc_TypeError,
+					 "contents for %s should be bytes or a file-like object",
+					 path);
+		return NULL;
+	}
+
+	return change;
+}
+#endif
+
+static PyObject *ra_commit_tree(PyObject *self, PyObject *args,
+								PyObject *kwargs)
+{
+#if ONLY_SINCE_SVN(1, 5)
+	char *kwnames[] = { "revprops", "changes", "callback", NULL };
+	PyObject *revprops, *changes, *commit_callback = Py_None;
+	RemoteAccessObject *ra = (RemoteAccessObject *)self;
+	apr_pool_t *temp_pool;
+	apr_hash_t *hash_revprops;
+	apr_array_header_t *paths;
+	CommitTreeBaton baton;
+	CommitTreeChange *change;
+	Py_ssize_t idx = 0;
+	PyObject *k, *v;
+	char *path;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|O:commit_tree",
+									 kwnames, &revprops, &changes,
+									 &commit_callback))
+		return NULL;
+
+	if (!PyDict_Check(changes)) {
+		PyErr_SetString(PyExc_TypeError, "changes should be dictionary");
+		return NULL;
+	}
+
+	temp_pool = Pool(NULL);
+	if (temp_pool == NULL)
+		return NULL;
+
+	hash_revprops = prop_dict_to_hash(temp_pool, revprops);
+	if (hash_revprops == NULL) {
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+
+	memset(&baton, 0, sizeof(baton));
+	baton.changes = apr_hash_make(temp_pool);
+	baton.commit_callback = commit_callback;
+	baton.revnum = SVN_INVALID_REVNUM;
+	paths = apr_array_make(temp_pool, PyDict_Size(changes),
+						   sizeof(const char *));
+	while (PyDict_Next(changes, &idx, &k, &v)) {
+		path = py_object_to_svn_string(k, temp_pool);
+		if (path == NULL || ra_check_svn_path(path)) {
+			apr_pool_destroy(temp_pool);
+			return NULL;
+		}
+		change = commit_tree_change(path, v, temp_pool);
+		if (change == NULL) {
+			apr_pool_destroy(temp_pool);
+			return NULL;
+		}
+		apr_hash_set(baton.changes, path, APR_HASH_KEY_STRING, change);
+		APR_ARRAY_PUSH(paths, const char *) = path;
+	}
+
+	if (ra_check_busy(ra)) {
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+
+	RUN_RA_WITH_POOL(temp_pool, ra, svn_ra_get_commit_editor3(ra->ra,
+				&baton.editor, &baton.edit_baton, hash_revprops,
+				commit_tree_callback, &baton, NULL, FALSE, temp_pool));
+
+	ra->busy = true;
+	RUN_RA_WITH_POOL(temp_pool, ra, commit_tree_drive(&baton, paths,
+													  temp_pool));
+
+	apr_pool_destroy(temp_pool);
+
+	return PyLong_FromLong(baton.revnum);
+#else
+	PyErr_SetString(PyExc_NotImplementedError,
+					"commit_tree requires Subversion 1.5 or later");
+	return NULL;
+#endif
+}
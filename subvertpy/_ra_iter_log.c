@@ -40,8 +40,39 @@ typedef struct {
 	int queue_size;
 	struct log_entry *head;
 	struct log_entry *tail;
+	/* Columnar mode: changed paths are collected in these buffers
+	 * and queued in batches of batch_size entries. */
+	int batch_size;
+	int batch_count;
+	long *batch_revnums;
+	signed char *batch_actions;
+	int *batch_kinds;
+	long *batch_copyfrom_revs;
+	PyObject *batch_paths;
+	PyObject *batch_copyfrom_paths;
+	apr_pool_t *intern_pool;
+	apr_hash_t *interned_paths;
 } LogIteratorObject;
 
+#define MAX_INTERNED_PATHS 100000
+
+static void log_iter_clear_interned(LogIteratorObject *iter)
+{
+	apr_hash_index_t *idx;
+	PyObject *py_path;
+
+	if (iter->interned_paths == NULL)
+		return;
+
+	for (idx = apr_hash_first(NULL, iter->interned_paths); idx != NULL;
+		 idx = apr_hash_next(idx)) {
+		apr_hash_this(idx, NULL, NULL, (void **)&py_path);
+		Py_DECREF(py_path);
+	}
+	apr_pool_clear(iter->intern_pool);
+	iter->interned_paths = apr_hash_make(iter->intern_pool);
+}
+
 static void log_iter_dealloc(PyObject *self)
 {
 	LogIteratorObject *iter = (LogIteratorObject *)self;
@@ -54,6 +85,15 @@ static void log_iter_dealloc(PyObject *self)
 	}
 	Py_XDECREF(iter->exc_type);
 	Py_XDECREF(iter->exc_val);
+	if (iter->batch_size > 0) {
+		log_iter_clear_interned(iter);
+		free(iter->batch_revnums);
+		free(iter->batch_actions);
+		free(iter->batch_kinds);
+		free(iter->batch_copyfrom_revs);
+		Py_XDECREF(iter->batch_paths);
+		Py_XDECREF(iter->batch_copyfrom_paths);
+	}
 	apr_pool_destroy(iter->pool);
 	Py_DECREF(iter->ra);
 	PyObject_Del(iter);
@@ -133,6 +173,153 @@ PyTypeObject LogIterator_Type = {
 	.tp_iternext = (iternextfunc)log_iter_next,
 };
 
+#if ONLY_SINCE_SVN(1, 6)
+/**
+ * Return a Python string for a path, sharing the string object between
+ * entries with the same path.
+ */
+static PyObject *log_iter_intern_path(LogIteratorObject *iter, const char *path)
+{
+	PyObject *py_path;
+
+	py_path = apr_hash_get(iter->interned_paths, path, APR_HASH_KEY_STRING);
+	if (py_path != NULL) {
+		Py_INCREF(py_path);
+		return py_path;
+	}
+
+	if (apr_hash_count(iter->interned_paths) >= MAX_INTERNED_PATHS)
+		log_iter_clear_interned(iter);
+
+	py_path = PyUnicode_FromString(path);
+	if (py_path == NULL)
+		return NULL;
+
+	Py_INCREF(py_path);
+	apr_hash_set(iter->interned_paths, apr_pstrdup(iter->intern_pool, path),
+				 APR_HASH_KEY_STRING, py_path);
+	return py_path;
+}
+
+static int log_iter_set_column(PyObject *batch, const char *name, PyObject *column)
+{
+	int ret;
+	if (column == NULL)
+		return -1;
+	ret = PyDict_SetItemString(batch, name, column);
+	Py_DECREF(column);
+	return ret;
+}
+
+/**
+ * Queue the changed paths collected so far as a single batch.
+ */
+static bool log_iter_flush_batch(LogIteratorObject *iter)
+{
+	PyObject *batch, *ret;
+	int n = iter->batch_count;
+
+	batch = PyDict_New();
+	if (batch == NULL)
+		return false;
+
+	if (log_iter_set_column(batch, "revnum",
+			py_array_from_buffer("l", iter->batch_revnums, sizeof(long) * n)) != 0 ||
+		log_iter_set_column(batch, "action",
+			py_array_from_buffer("b", iter->batch_actions, sizeof(signed char) * n)) != 0 ||
+		log_iter_set_column(batch, "node_kind",
+			py_array_from_buffer("i", iter->batch_kinds, sizeof(int) * n)) != 0 ||
+		log_iter_set_column(batch, "copyfrom_rev",
+			py_array_from_buffer("l", iter->batch_copyfrom_revs, sizeof(long) * n)) != 0 ||
+		PyDict_SetItemString(batch, "path", iter->batch_paths) != 0 ||
+		PyDict_SetItemString(batch, "copyfrom_path", iter->batch_copyfrom_paths) != 0) {
+		Py_DECREF(batch);
+		return false;
+	}
+
+	Py_DECREF(iter->batch_paths);
+	Py_DECREF(iter->batch_copyfrom_paths);
+	iter->batch_paths = PyList_New(0);
+	iter->batch_copyfrom_paths = PyList_New(0);
+	iter->batch_count = 0;
+	if (iter->batch_paths == NULL || iter->batch_copyfrom_paths == NULL) {
+		Py_DECREF(batch);
+		return false;
+	}
+
+	ret = py_iter_append(iter, batch);
+	if (ret == NULL) {
+		Py_DECREF(batch);
+		return false;
+	}
+	Py_DECREF(ret);
+	return true;
+}
+
+static svn_error_t *py_iter_log_columnar_cb(void *baton, svn_log_entry_t *log_entry, apr_pool_t *pool)
+{
+	LogIteratorObject *iter = (LogIteratorObject *)baton;
+	apr_hash_index_t *idx;
+	const char *key;
+	svn_log_changed_path2_t *val;
+	PyGILState_STATE state;
+
+	if (log_entry->changed_paths2 == NULL)
+		return NULL;
+
+	state = PyGILState_Ensure();
+
+	for (idx = apr_hash_first(pool, log_entry->changed_paths2); idx != NULL;
+		 idx = apr_hash_next(idx)) {
+		PyObject *py_path, *py_copyfrom_path;
+		int i = iter->batch_count;
+
+		apr_hash_this(idx, (const void **)&key, NULL, (void **)&val);
+
+		py_path = log_iter_intern_path(iter, key);
+		if (py_path == NULL)
+			goto fail;
+		if (PyList_Append(iter->batch_paths, py_path) != 0) {
+			Py_DECREF(py_path);
+			goto fail;
+		}
+		Py_DECREF(py_path);
+
+		if (val->copyfrom_path == NULL) {
+			py_copyfrom_path = Py_None;
+			Py_INCREF(py_copyfrom_path);
+		} else {
+			py_copyfrom_path = log_iter_intern_path(iter, val->copyfrom_path);
+			if (py_copyfrom_path == NULL)
+				goto fail;
+		}
+		if (PyList_Append(iter->batch_copyfrom_paths, py_copyfrom_path) != 0) {
+			Py_DECREF(py_copyfrom_path);
+			goto fail;
+		}
+		Py_DECREF(py_copyfrom_path);
+
+		iter->batch_revnums[i] = log_entry->revision;
+		iter->batch_actions[i] = val->action;
+		iter->batch_kinds[i] = val->node_kind;
+		iter->batch_copyfrom_revs[i] = val->copyfrom_rev;
+		iter->batch_count++;
+
+		if (iter->batch_count == iter->batch_size) {
+			if (!log_iter_flush_batch(iter))
+				goto fail;
+		}
+	}
+
+	PyGILState_Release(state);
+	return NULL;
+
+fail:
+	PyGILState_Release(state);
+	return py_svn_error();
+}
+#endif
+
 #if ONLY_SINCE_SVN(1, 5)
 static svn_error_t *py_iter_log_entry_cb(void *baton, svn_log_entry_t *log_entry, apr_pool_t *pool)
 {
@@ -153,7 +340,7 @@ static svn_error_t *py_iter_log_entry_cb(void *baton, svn_log_entry_t *log_entry
 		return py_svn_error();
 	}
 
-	revprops = prop_hash_to_dict(log_entry->revprops);
+	revprops = prop_hash_to_dict(log_entry->revprops, pool);
 	if (revprops == NULL) {
 		Py_DECREF(py_changed_paths);
 		PyGILState_Release(state);
@@ -230,6 +417,15 @@ static void py_iter_log(void *baton)
 	svn_error_t *error;
 	PyGILState_STATE state;
 
+#if ONLY_SINCE_SVN(1, 6)
+	if (iter->batch_size > 0) {
+		error = svn_ra_get_log2(iter->ra->ra,
+				iter->apr_paths, iter->start, iter->end, iter->limit,
+				TRUE, iter->strict_node_history,
+				FALSE, iter->apr_revprops,
+				py_iter_log_columnar_cb, iter, iter->pool);
+	} else
+#endif
 #if ONLY_SINCE_SVN(1, 5)
 	error = svn_ra_get_log2(iter->ra->ra, 
 			iter->apr_paths, iter->start, iter->end, iter->limit,
@@ -243,6 +439,12 @@ static void py_iter_log(void *baton)
 			iter, iter->pool);
 #endif
 	state = PyGILState_Ensure();
+#if ONLY_SINCE_SVN(1, 6)
+	if (error == NULL && iter->batch_size > 0 && iter->batch_count > 0 &&
+		!log_iter_flush_batch(iter)) {
+		error = py_svn_error();
+	}
+#endif
 	if (error != NULL) {
 		iter->exc_type = (PyObject *)PyErr_GetSubversionExceptionTypeObject();
 		iter->exc_val  = PyErr_NewSubversionException(error);
@@ -263,7 +465,8 @@ static void py_iter_log(void *baton)
 PyObject *ra_iter_log(PyObject *self, PyObject *args, PyObject *kwargs)
 {
 	char *kwnames[] = { "paths", "start", "end", "limit",
-		"discover_changed_paths", "strict_node_history", "include_merged_revisions", "revprops", NULL };
+		"discover_changed_paths", "strict_node_history", "include_merged_revisions", "revprops",
+		"columnar", "batch_size", NULL };
 	PyObject *paths;
 	svn_revnum_t start = 0, end = 0;
 	int limit=0; 
@@ -274,17 +477,42 @@ PyObject *ra_iter_log(PyObject *self, PyObject *args, PyObject *kwargs)
 	apr_pool_t *pool;
 	apr_array_header_t *apr_paths;
 	apr_array_header_t *apr_revprops;
+	char columnar = 0;
+	int batch_size = 10000;
 
-	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Oll|ibbbO:iter_log", kwnames, 
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Oll|ibbbObi:iter_log", kwnames, 
 						 &paths, &start, &end, &limit,
 						 &discover_changed_paths, &strict_node_history,
-						 &include_merged_revisions, &revprops))
+						 &include_merged_revisions, &revprops,
+						 &columnar, &batch_size))
+		return NULL;
+
+	if (columnar) {
+#if ONLY_SINCE_SVN(1, 6)
+		if (batch_size <= 0) {
+			PyErr_SetString(PyExc_ValueError, "batch_size should be positive");
+			return NULL;
+		}
+		/* Revision properties are not part of the batches. */
+		revprops = PyList_New(0);
+		if (revprops == NULL)
+			return NULL;
+		include_merged_revisions = false;
+#else
+		PyErr_SetString(PyExc_NotImplementedError,
+			"columnar log requires Subversion 1.6");
 		return NULL;
+#endif
+	} else {
+		Py_INCREF(revprops);
+	}
 
 	if (!ra_get_log_prepare(ra, paths, include_merged_revisions,
 	revprops, &pool, &apr_paths, &apr_revprops)) {
+		Py_DECREF(revprops);
 		return NULL;
 	}
+	Py_DECREF(revprops);
 
 	ret = PyObject_New(LogIteratorObject, &LogIterator_Type);
 	ret->ra = ra;
@@ -304,6 +532,31 @@ PyObject *ra_iter_log(PyObject *self, PyObject *args, PyObject *kwargs)
 	ret->queue_size = 0;
 	ret->head = NULL;
 	ret->tail = NULL;
+	ret->batch_size = 0;
+	ret->batch_count = 0;
+	ret->interned_paths = NULL;
+	if (columnar) {
+		ret->batch_size = batch_size;
+		ret->batch_revnums = malloc(sizeof(long) * batch_size);
+		ret->batch_actions = malloc(sizeof(signed char) * batch_size);
+		ret->batch_kinds = malloc(sizeof(int) * batch_size);
+		ret->batch_copyfrom_revs = malloc(sizeof(long) * batch_size);
+		ret->batch_paths = PyList_New(0);
+		ret->batch_copyfrom_paths = PyList_New(0);
+		ret->intern_pool = Pool(ret->pool);
+		if (ret->intern_pool != NULL)
+			ret->interned_paths = apr_hash_make(ret->intern_pool);
+		if (ret->batch_revnums == NULL || ret->batch_actions == NULL ||
+			ret->batch_kinds == NULL || ret->batch_copyfrom_revs == NULL ||
+			ret->batch_paths == NULL || ret->batch_copyfrom_paths == NULL ||
+			ret->interned_paths == NULL) {
+			if (!PyErr_Occurred())
+				PyErr_NoMemory();
+			ra->busy = false;
+			Py_DECREF(ret);
+			return NULL;
+		}
+	}
 
 	Py_INCREF(ret);
 	PyThread_start_new_thread(py_iter_log, ret);
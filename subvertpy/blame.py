@@ -0,0 +1,80 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301, USA
+"""Line-by-line annotation of files."""
+
+__author__ = "Jelmer Vernooij <jelmer@jelmer.uk>"
+__docformat__ = "restructuredText"
+
+
+class BlameResult(object):
+    """Origin of each line in a file.
+
+    :ivar revnums: Array with, for each line, the revision in which it was
+        last changed
+    :ivar author_ids: Array with, for each line, the index in ``authors``
+        of the author of that revision, or -1 if it has no author
+    :ivar authors: List of author names
+    """
+
+    __slots__ = ('revnums', 'author_ids', 'authors')
+
+    def __init__(self, revnums, author_ids, authors):
+        self.revnums = revnums
+        self.author_ids = author_ids
+        self.authors = authors
+
+    def __len__(self):
+        return len(self.revnums)
+
+    def __getitem__(self, lineno):
+        """Return the revision and author of a line."""
+        author_id = self.author_ids[lineno]
+        if author_id < 0:
+            return (self.revnums[lineno], None)
+        return (self.revnums[lineno], self.authors[author_id])
+
+    def __iter__(self):
+        authors = self.authors
+        for revnum, author_id in zip(self.revnums, self.author_ids):
+            if author_id < 0:
+                yield (revnum, None)
+            else:
+                yield (revnum, authors[author_id])
+
+    def __repr__(self):
+        return "<%s for %d lines>" % (type(self).__name__, len(self))
+
+
+def blame(ra, path, start, end, include_merged_revisions=False):
+    """Determine in which revision each line of a file was last changed.
+
+    The deltas are applied and the lines are tracked in C, so this is
+    considerably faster than doing the same with
+    ``RemoteAccess.get_file_revs``.
+
+    :param ra: RemoteAccess object
+    :param path: Path of the file, relative to the session URL
+    :param start: First revision to consider
+    :param end: Revision of the file to annotate
+    :param include_merged_revisions: Whether to attribute lines to the
+        revisions they were merged from rather than the merge itself
+    :return: A `BlameResult`
+    """
+    result = ra.blame(path, start, end, include_merged_revisions)
+    if include_merged_revisions:
+        return BlameResult(result["merged_revnum"], result["merged_author"],
+                           result["authors"])
+    return BlameResult(result["revnum"], result["author"], result["authors"])
@@ -0,0 +1,492 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301, USA
+"""Client-side caches for data fetched over RA sessions."""
+
+__author__ = "Jelmer Vernooij <jelmer@jelmer.uk>"
+__docformat__ = "restructuredText"
+
+from collections import OrderedDict
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+try:
+    from urllib import unquote
+except ImportError:
+    from urllib.parse import unquote
+
+from subvertpy.dumpfile import parse_props, unparse_props
+
+
+def _props_size(props):
+    return sum(len(k) + len(v or b"") for (k, v) in props.items())
+
+
+def _move_to_end(d, key):
+    try:
+        d.move_to_end(key)
+    except AttributeError:  # Python < 3.2
+        d[key] = d.pop(key)
+
+
+class RevPropCache(object):
+    """LRU cache of revision properties.
+
+    Entries are keyed by repository UUID and revision number, so a single
+    cache can be shared between sessions for different repositories.
+
+    When the cache is backed by a database, invalidations made by other
+    processes are noticed on the next lookup, which then drops the entries
+    kept in memory.
+
+    :ivar hits: Number of lookups served from the cache
+    :ivar misses: Number of lookups that were not in the cache
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, path=None):
+        """Create a new cache.
+
+        :param max_entries: Maximum number of revisions to keep in memory
+        :param max_bytes: Maximum total size of the property names and
+            values kept in memory, or None for no limit
+        :param path: Optional path to a sqlite database in which entries
+            are also stored, so that they can be shared between processes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if path is not None:
+            import sqlite3
+            self._db = sqlite3.connect(path, timeout=30,
+                                       check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS revprops ("
+                "uuid TEXT NOT NULL, revnum INTEGER NOT NULL, "
+                "props BLOB NOT NULL, PRIMARY KEY (uuid, revnum))")
+            # Bumped on every invalidation, so that other processes know
+            # their in-memory entries may be stale.
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS generation ("
+                "value INTEGER NOT NULL)")
+            self._db.execute(
+                "INSERT INTO generation (value) SELECT 0 WHERE NOT EXISTS "
+                "(SELECT * FROM generation)")
+            self._db.commit()
+            self._generation = self._read_generation()
+        else:
+            self._db = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _read_generation(self):
+        return self._db.execute("SELECT value FROM generation").fetchone()[0]
+
+    def _forget(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def _check_generation(self):
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._forget()
+            self._generation = generation
+
+    def _add(self, key, props):
+        if key in self._entries:
+            self._bytes -= _props_size(self._entries.pop(key))
+        self._entries[key] = props
+        self._bytes += _props_size(props)
+        while self._entries and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes is not None and
+                 self._bytes > self.max_bytes)):
+            (oldkey, oldprops) = self._entries.popitem(last=False)
+            self._bytes -= _props_size(oldprops)
+
+    def get(self, uuid, revnum):
+        """Look up the properties of a revision.
+
+        :return: Dictionary with revision properties, or None if the
+            revision is not cached
+        """
+        key = (uuid, revnum)
+        with self._lock:
+            if self._db is not None:
+                self._check_generation()
+            props = self._entries.get(key)
+            if props is not None:
+                _move_to_end(self._entries, key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT props FROM revprops WHERE uuid = ? AND "
+                    "revnum = ?", (uuid, revnum)).fetchone()
+                if row is not None:
+                    props = dict(parse_props(bytes(row[0])))
+                    self._add(key, props)
+            if props is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(props)
+
+    def set(self, uuid, revnum, props):
+        """Store the properties of a revision."""
+        props = dict(props)
+        with self._lock:
+            self._add((uuid, revnum), props)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO revprops (uuid, revnum, props) "
+                    "VALUES (?, ?, ?)",
+                    (uuid, revnum, unparse_props(props)))
+                self._db.commit()
+
+    def invalidate(self, uuid, revnum):
+        """Remove a revision from the cache."""
+        with self._lock:
+            props = self._entries.pop((uuid, revnum), None)
+            if props is not None:
+                self._bytes -= _props_size(props)
+            if self._db is not None:
+                self._db.execute(
+                    "DELETE FROM revprops WHERE uuid = ? AND revnum = ?",
+                    (uuid, revnum))
+                self._db.execute("UPDATE generation SET value = value + 1")
+                generation = self._read_generation()
+                self._db.commit()
+                if generation != self._generation + 1:
+                    # Another process invalidated entries as well.
+                    self._forget()
+                self._generation = generation
+
+    def clear(self):
+        """Remove all entries kept in memory."""
+        with self._lock:
+            self._forget()
+
+
+# os.rename() does not overwrite existing files on Windows.
+_replace = getattr(os, "replace", os.rename)
+
+
+def _checksum_kind(checksum):
+    if len(checksum) == 40:
+        return "sha1"
+    elif len(checksum) == 32:
+        return "md5"
+    else:
+        raise ValueError("unknown checksum type: %r" % checksum)
+
+
+class FileContentCache(object):
+    """On-disk cache of file contents, keyed by checksum.
+
+    Files are written atomically, so the cache directory can be shared
+    between processes. When it grows beyond ``max_bytes``, the least
+    recently used files are removed.
+
+    :ivar hits: Number of lookups served from the cache
+    :ivar misses: Number of lookups that were not in the cache
+    :ivar bytes_saved: Number of bytes served from the cache
+    """
+
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        for subdir in ("objects", "index", "tmp"):
+            if not os.path.isdir(os.path.join(path, subdir)):
+                os.makedirs(os.path.join(path, subdir))
+        self._size = None
+
+    def _object_path(self, checksum):
+        checksum = checksum.lower()
+        return os.path.join(self.path, "objects", checksum[:2], checksum[2:])
+
+    def _index_path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, "index", digest)
+
+    def _write_atomic(self, path, contents):
+        parent = os.path.dirname(path)
+        if not os.path.isdir(parent):
+            try:
+                os.mkdir(parent)
+            except OSError:
+                if not os.path.isdir(parent):
+                    raise
+        (fd, tmppath) = tempfile.mkstemp(dir=os.path.join(self.path, "tmp"))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(contents, bytes):
+                    f.write(contents)
+                else:
+                    shutil.copyfileobj(contents, f)
+            _replace(tmppath, path)
+        except BaseException:
+            os.unlink(tmppath)
+            raise
+
+    def lookup_key(self, key):
+        """Find the checksum stored for a key with `set_key`, or None."""
+        try:
+            with open(self._index_path(key), 'rb') as f:
+                return f.read().decode("ascii")
+        except (IOError, OSError):
+            return None
+
+    def set_key(self, key, checksum):
+        """Remember the checksum of the contents identified by key."""
+        self._write_atomic(self._index_path(key), checksum.encode("ascii"))
+
+    def _resolve(self, checksum):
+        checksum = checksum.lower()
+        if _checksum_kind(checksum) == "md5":
+            return self.lookup_key("md5:" + checksum)
+        return checksum
+
+    def _count_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def copy_to(self, checksum, stream):
+        """Copy cached contents to a stream.
+
+        :param checksum: SHA-1 or MD5 checksum of the contents
+        :return: True if the contents were in the cache, False otherwise
+        """
+        sha1 = self._resolve(checksum)
+        f = None
+        if sha1 is not None:
+            path = self._object_path(sha1)
+            try:
+                f = open(path, 'rb')
+            except (IOError, OSError):
+                pass
+        if f is None:
+            self._count_miss()
+            return False
+        with f:
+            try:
+                # Eviction removes the least recently used files first.
+                os.utime(path, None)
+            except OSError:
+                pass
+            shutil.copyfileobj(f, stream)
+            size = f.tell()
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += size
+        return True
+
+    def add(self, f):
+        """Add the contents of a file to the cache.
+
+        :param f: File-like object, read from the current position
+        :return: SHA-1 checksum of the contents
+        """
+        sha1 = hashlib.sha1()
+        md5 = hashlib.md5()
+        (fd, tmppath) = tempfile.mkstemp(dir=os.path.join(self.path, "tmp"))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    data = f.read(64 * 1024)
+                    if not data:
+                        break
+                    sha1.update(data)
+                    md5.update(data)
+                    out.write(data)
+                size = out.tell()
+            checksum = sha1.hexdigest()
+            path = self._object_path(checksum)
+            parent = os.path.dirname(path)
+            if not os.path.isdir(parent):
+                try:
+                    os.mkdir(parent)
+                except OSError:
+                    if not os.path.isdir(parent):
+                        raise
+            _replace(tmppath, path)
+        except BaseException:
+            os.unlink(tmppath)
+            raise
+        # Older servers only provide MD5 checksums.
+        self.set_key("md5:" + md5.hexdigest(), checksum)
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+        self._evict()
+        return checksum
+
+    def _objects(self):
+        objects_dir = os.path.join(self.path, "objects")
+        for subdir in os.listdir(objects_dir):
+            for name in os.listdir(os.path.join(objects_dir, subdir)):
+                path = os.path.join(objects_dir, subdir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield (path, st)
+
+    def size(self):
+        """Return the total size of the cached contents, in bytes."""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(st.st_size for (path, st) in self._objects())
+            return self._size
+
+    def _evict(self):
+        if self.max_bytes is None or self.size() <= self.max_bytes:
+            return
+        with self._lock:
+            objects = sorted(self._objects(), key=lambda o: o[1].st_mtime)
+            for (path, st) in objects:
+                if self._size <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                self._size -= st.st_size
+
+
+class CachingRemoteAccess(object):
+    """Wrapper around a RemoteAccess session that caches revision properties.
+
+    All attributes that are not related to revision properties are passed
+    on to the wrapped session.
+    """
+
+    def __init__(self, ra, revprop_cache=None, content_cache=None):
+        """Create a new caching session.
+
+        :param ra: Session to wrap
+        :param revprop_cache: `RevPropCache` to use; a new in-memory cache
+            is created if not specified
+        :param content_cache: Optional `FileContentCache` from which file
+            contents are served by `get_file`
+        """
+        if revprop_cache is None:
+            revprop_cache = RevPropCache()
+        self._ra = ra
+        self.revprop_cache = revprop_cache
+        self.content_cache = content_cache
+        self._uuid = None
+        self._repos_root = None
+
+    def __getattr__(self, name):
+        return getattr(self._ra, name)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self._ra)
+
+    @property
+    def uuid(self):
+        if self._uuid is None:
+            self._uuid = self._ra.get_uuid()
+        return self._uuid
+
+    def _repos_path(self, path):
+        """Return the path of a file relative to the repository root."""
+        if self._repos_root is None:
+            self._repos_root = self._ra.get_repos_root().rstrip("/")
+        url = self._ra.url.rstrip("/")
+        if not url.startswith(self._repos_root):
+            raise ValueError("session URL %s is not inside %s" %
+                             (url, self._repos_root))
+        prefix = unquote(url[len(self._repos_root):]).strip("/")
+        return "/".join(p for p in (prefix, path.strip("/")) if p)
+
+    def rev_proplist(self, revnum):
+        """Return a dictionary with the properties set on a revision."""
+        props = self.revprop_cache.get(self.uuid, revnum)
+        if props is None:
+            props = self._ra.rev_proplist(revnum)
+            self.revprop_cache.set(self.uuid, revnum, props)
+        return props
+
+    def rev_prop(self, revnum, name):
+        """Return the value of a single revision property, or None."""
+        return self.rev_proplist(revnum).get(name)
+
+    def change_rev_prop(self, revnum, name, *args, **kwargs):
+        """Change a revision property."""
+        try:
+            return self._ra.change_rev_prop(revnum, name, *args, **kwargs)
+        finally:
+            self.revprop_cache.invalidate(self.uuid, revnum)
+
+    def prefetch_revprops(self, start, end):
+        """Fill the cache with the properties of a range of revisions.
+
+        Uses a single log request rather than one request per revision.
+
+        :return: Number of revisions that were added to the cache
+        """
+        count = 0
+        for entry in self._ra.iter_log(None, start, end, revprops=None):
+            (changed_paths, revnum, props) = entry[:3]
+            self.revprop_cache.set(self.uuid, revnum, props)
+            count += 1
+        return count
+
+    def get_file(self, path, stream, revnum=-1, checksum=None):
+        """Fetch a file, serving the contents from the content cache.
+
+        :param checksum: Optional SHA-1 or MD5 checksum of the contents, for
+            example from `FileSystemRoot.file_checksum`. If it is not
+            specified, the contents are looked up by the revision in which
+            the file was last changed.
+        :return: Tuple with fetched revision and properties
+        """
+        if self.content_cache is None:
+            return self._ra.get_file(path, stream, revnum)
+        key = None
+        if checksum is None:
+            dirent = self._ra.stat(path, revnum)
+            if dirent is None:
+                # Let the server report the missing file.
+                return self._ra.get_file(path, stream, revnum)
+            key = "%s:%s@%d" % (self.uuid, self._repos_path(path),
+                                dirent["created_rev"])
+            checksum = self.content_cache.lookup_key(key)
+        if checksum is not None:
+            # Only the properties have to come from the server.
+            (fetched_rev, props) = self._ra.get_file(path, None, revnum)
+            if self.content_cache.copy_to(checksum, stream):
+                return (fetched_rev, props)
+        else:
+            self.content_cache._count_miss()
+        with tempfile.TemporaryFile() as f:
+            (fetched_rev, props) = self._ra.get_file(path, f, revnum)
+            f.seek(0)
+            sha1 = self.content_cache.add(f)
+            if key is not None:
+                self.content_cache.set_key(key, sha1)
+            f.seek(0)
+            shutil.copyfileobj(f, stream)
+        return (fetched_rev, props)
@@ -241,7 +241,7 @@ static svn_error_t *proplist_receiver2(
     PyObject *prop_dict;
     PyObject *value;
 
-    prop_dict = prop_hash_to_dict(prop_hash);
+    prop_dict = prop_hash_to_dict(prop_hash, scratch_pool);
 
     if (prop_dict == NULL) {
         PyGILState_Release(state);
@@ -273,7 +273,7 @@ static svn_error_t *proplist_receiver(void *prop_list, const char *path,
     PyObject *prop_dict;
     PyObject *value;
 
-    prop_dict = prop_hash_to_dict(prop_hash);
+    prop_dict = prop_hash_to_dict(prop_hash, pool);
 
     if (prop_dict == NULL) {
         PyGILState_Release(state);
@@ -562,6 +562,399 @@ static int client_set_log_msg_func(PyObject *self, PyObject *func, void *closure
     return 0;
 }
 
+#define NOTIFY_MAX_ACTION 256
+
+typedef struct {
+    const char *path;
+    svn_wc_notify_action_t action;
+    svn_node_kind_t kind;
+    svn_revnum_t revision;
+    svn_error_t *err;
+} NotifyRecord;
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *func;
+    /* Protects pool, pending and last_delivery. Only ever taken with
+     * the GIL released, as the notify callback runs without it. */
+    PyThread_type_lock lock;
+    apr_pool_t *pool;
+    apr_array_header_t *pending;
+    int batch_size;
+    apr_interval_time_t interval;
+    apr_time_t last_delivery;
+    bool filter;
+    bool actions[NOTIFY_MAX_ACTION];
+} BatchedNotifierObject;
+
+extern PyTypeObject BatchedNotifier_Type;
+
+/* Hand the pending records to the caller. Must be called with the lock
+ * held. */
+static void batched_notifier_take(BatchedNotifierObject *notifier,
+                                  apr_pool_t **pool,
+                                  apr_array_header_t **records)
+{
+    *pool = notifier->pool;
+    *records = notifier->pending;
+    notifier->pool = svn_pool_create(NULL);
+    notifier->pending = apr_array_make(notifier->pool, notifier->batch_size,
+                                       sizeof(NotifyRecord));
+    notifier->last_delivery = apr_time_now();
+}
+
+static void notify_records_clear(apr_pool_t *pool, apr_array_header_t *records)
+{
+    int i;
+    for (i = 0; i < records->nelts; i++) {
+        NotifyRecord *record = &APR_ARRAY_IDX(records, i, NotifyRecord);
+        if (record->err != NULL)
+            svn_error_clear(record->err);
+    }
+    apr_pool_destroy(pool);
+}
+
+/* Deliver a list of records to the Python callback. Must be called with
+ * the GIL held. Takes ownership of pool. */
+static bool batched_notifier_deliver(BatchedNotifierObject *notifier,
+                                     apr_pool_t *pool,
+                                     apr_array_header_t *records)
+{
+    PyObject *batch, *ret;
+    int i;
+
+    if (records->nelts == 0) {
+        notify_records_clear(pool, records);
+        return true;
+    }
+
+    batch = PyList_New(records->nelts);
+    if (batch == NULL) {
+        notify_records_clear(pool, records);
+        return false;
+    }
+
+    for (i = 0; i < records->nelts; i++) {
+        NotifyRecord *record = &APR_ARRAY_IDX(records, i, NotifyRecord);
+        PyObject *py_err, *item;
+        if (record->err != NULL) {
+            py_err = PyErr_NewSubversionException(record->err);
+            if (py_err == NULL) {
+                Py_DECREF(batch);
+                notify_records_clear(pool, records);
+                return false;
+            }
+        } else {
+            py_err = Py_None;
+            Py_INCREF(py_err);
+        }
+        item = Py_BuildValue("(ziilN)", record->path, record->action,
+                             record->kind, record->revision, py_err);
+        if (item == NULL) {
+            Py_DECREF(batch);
+            notify_records_clear(pool, records);
+            return false;
+        }
+        PyList_SET_ITEM(batch, i, item);
+    }
+
+    notify_records_clear(pool, records);
+
+    ret = PyObject_CallFunction(notifier->func, "O", batch);
+    Py_DECREF(batch);
+    if (ret == NULL)
+        return false;
+    Py_DECREF(ret);
+    return true;
+}
+
+static bool batched_notifier_flush(BatchedNotifierObject *notifier)
+{
+    apr_pool_t *pool;
+    apr_array_header_t *records;
+
+    Py_BEGIN_ALLOW_THREADS
+    PyThread_acquire_lock(notifier->lock, WAIT_LOCK);
+    batched_notifier_take(notifier, &pool, &records);
+    PyThread_release_lock(notifier->lock);
+    Py_END_ALLOW_THREADS
+
+    return batched_notifier_deliver(notifier, pool, records);
+}
+
+/**
+ * Notify callback that queues notifications without taking the GIL.
+ *
+ * The GIL is only taken when a full batch is ready or the interval has
+ * elapsed.
+ */
+static void py_batched_notify_func(void *baton, const svn_wc_notify_t *notify, apr_pool_t *pool)
+{
+    BatchedNotifierObject *notifier = baton;
+    NotifyRecord *record;
+    apr_pool_t *batch_pool;
+    apr_array_header_t *batch = NULL;
+
+    if (notifier->filter && (notify->action < 0 ||
+                             notify->action >= NOTIFY_MAX_ACTION ||
+                             !notifier->actions[notify->action]))
+        return;
+
+    PyThread_acquire_lock(notifier->lock, WAIT_LOCK);
+    record = apr_array_push(notifier->pending);
+    if (notify->path != NULL)
+        record->path = apr_pstrdup(notifier->pool, notify->path);
+    else
+        record->path = NULL;
+    record->action = notify->action;
+    record->kind = notify->kind;
+    record->revision = notify->revision;
+    if (notify->err != NULL)
+        record->err = svn_error_dup(notify->err);
+    else
+        record->err = NULL;
+
+    if (notifier->pending->nelts >= notifier->batch_size ||
+        (notifier->interval > 0 &&
+         apr_time_now() - notifier->last_delivery >= notifier->interval))
+        batched_notifier_take(notifier, &batch_pool, &batch);
+    PyThread_release_lock(notifier->lock);
+
+    if (batch != NULL) {
+        PyGILState_STATE state = PyGILState_Ensure();
+        /* If delivery failed, the cancel func should abort the operation. */
+        batched_notifier_deliver(notifier, batch_pool, batch);
+        PyGILState_Release(state);
+    }
+}
+
+static PyObject *batched_notifier_new(PyTypeObject *type, PyObject *args, PyObject *kwargs)
+{
+    char *kwnames[] = { "func", "batch_size", "interval", "actions", NULL };
+    PyObject *func, *actions = Py_None, *iter, *item;
+    int batch_size = 100;
+    double interval = 0.5;
+    BatchedNotifierObject *ret;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|idO:BatchedNotifier",
+                                     kwnames, &func, &batch_size, &interval,
+                                     &actions))
+        return NULL;
+
+    if (!PyCallable_Check(func)) {
+        PyErr_SetString(PyExc_TypeError, "func should be callable");
+        return NULL;
+    }
+
+    if (batch_size < 1) {
+        PyErr_SetString(PyExc_ValueError, "batch_size should be at least 1");
+        return NULL;
+    }
+
+    ret = PyObject_New(BatchedNotifierObject, &BatchedNotifier_Type);
+    if (ret == NULL)
+        return NULL;
+
+    ret->lock = NULL;
+    ret->pool = NULL;
+    ret->func = func;
+    Py_INCREF(func);
+    ret->batch_size = batch_size;
+    ret->interval = (apr_interval_time_t)(interval * APR_USEC_PER_SEC);
+    memset(ret->actions, 0, sizeof(ret->actions));
+    ret->filter = (actions != Py_None);
+
+    if (ret->filter) {
+        iter = PyObject_GetIter(actions);
+        if (iter == NULL) {
+            Py_DECREF(ret);
+            return NULL;
+        }
+        while ((item = PyIter_Next(iter)) != NULL) {
+            long action = PyLong_AsLong(item);
+            Py_DECREF(item);
+            if (action == -1 && PyErr_Occurred()) {
+                Py_DECREF(iter);
+                Py_DECREF(ret);
+                return NULL;
+            }
+            if (action < 0 || action >= NOTIFY_MAX_ACTION) {
+                PyErr_Format(PyExc_ValueError, "Invalid notify action %ld",
+                             action);
+                Py_DECREF(iter);
+                Py_DECREF(ret);
+                return NULL;
+            }
+            ret->actions[action] = true;
+        }
+        Py_DECREF(iter);
+        if (PyErr_Occurred()) {
+            Py_DECREF(ret);
+            return NULL;
+        }
+    }
+
+    ret->lock = PyThread_allocate_lock();
+    if (ret->lock == NULL) {
+        Py_DECREF(ret);
+        PyErr_NoMemory();
+        return NULL;
+    }
+
+    ret->pool = Pool(NULL);
+    if (ret->pool == NULL) {
+        Py_DECREF(ret);
+        return NULL;
+    }
+    ret->pending = apr_array_make(ret->pool, batch_size, sizeof(NotifyRecord));
+    ret->last_delivery = apr_time_now();
+
+    return (PyObject *)ret;
+}
+
+static void batched_notifier_dealloc(PyObject *self)
+{
+    BatchedNotifierObject *notifier = (BatchedNotifierObject *)self;
+    if (notifier->pool != NULL)
+        notify_records_clear(notifier->pool, notifier->pending);
+    if (notifier->lock != NULL)
+        PyThread_free_lock(notifier->lock);
+    Py_DECREF(notifier->func);
+    PyObject_Del(self);
+}
+
+static PyObject *batched_notifier_flush_method(PyObject *self)
+{
+    if (!batched_notifier_flush((BatchedNotifierObject *)self))
+        return NULL;
+    Py_RETURN_NONE;
+}
+
+static Py_ssize_t batched_notifier_len(PyObject *self)
+{
+    BatchedNotifierObject *notifier = (BatchedNotifierObject *)self;
+    Py_ssize_t ret;
+
+    Py_BEGIN_ALLOW_THREADS
+    PyThread_acquire_lock(notifier->lock, WAIT_LOCK);
+    ret = notifier->pending->nelts;
+    PyThread_release_lock(notifier->lock);
+    Py_END_ALLOW_THREADS
+
+    return ret;
+}
+
+static PyMethodDef batched_notifier_methods[] = {
+    { "flush", (PyCFunction)batched_notifier_flush_method, METH_NOARGS,
+        "S.flush()\n"
+        "Deliver any queued notifications now." },
+    { NULL }
+};
+
+static PyMemberDef batched_notifier_members[] = {
+    { "func", T_OBJECT, offsetof(BatchedNotifierObject, func), READONLY,
+        "Callback that is called with lists of notifications." },
+    { "batch_size", T_INT, offsetof(BatchedNotifierObject, batch_size), READONLY,
+        "Maximum number of notifications per batch." },
+    { NULL }
+};
+
+static PySequenceMethods batched_notifier_seq = {
+    .sq_length = batched_notifier_len,
+};
+
+PyTypeObject BatchedNotifier_Type = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "client.BatchedNotifier", /*    const char *tp_name;  For printing, in format "<module>.<name>" */
+    sizeof(BatchedNotifierObject),
+    0,/*    Py_ssize_t tp_basicsize, tp_itemsize;  For allocation */
+
+    .tp_dealloc = batched_notifier_dealloc,
+    .tp_as_sequence = &batched_notifier_seq,
+    .tp_doc = "BatchedNotifier(func, batch_size=100, interval=0.5, actions=None)\n\n"
+        "Notification callback for Client.notify_func that delivers\n"
+        "notifications in batches.\n\n"
+        "Notifications are queued without taking the GIL and func is\n"
+        "called with a list of (path, action, kind, revision, error)\n"
+        "tuples once batch_size notifications are queued or interval\n"
+        "seconds have passed since the previous delivery. Remaining\n"
+        "notifications are delivered when a client operation finishes.\n"
+        "If actions is given, only notifications with one of those\n"
+        "NOTIFY_* actions are queued.",
+    .tp_methods = batched_notifier_methods,
+    .tp_members = batched_notifier_members,
+    .tp_new = batched_notifier_new,
+};
+
+/**
+ * Deliver notifications still queued in a batched notifier, if the client
+ * uses one.
+ */
+static bool client_flush_notifications(ClientObject *client)
+{
+    if (client->client->notify_func2 != py_batched_notify_func)
+        return true;
+    return batched_notifier_flush(client->client->notify_baton2);
+}
+
+/**
+ * Deliver notifications still queued after a client operation failed.
+ *
+ * Called with the exception for the failure set. If delivery fails too,
+ * its exception is raised instead, with the original one as context.
+ */
+static void client_flush_notifications_after_error(ClientObject *client)
+{
+    PyObject *type, *value, *traceback;
+#if PY_MAJOR_VERSION >= 3
+    PyObject *new_type, *new_value, *new_traceback;
+#endif
+
+    if (client->client->notify_func2 != py_batched_notify_func)
+        return;
+
+    PyErr_Fetch(&type, &value, &traceback);
+    if (batched_notifier_flush(client->client->notify_baton2)) {
+        PyErr_Restore(type, value, traceback);
+        return;
+    }
+#if PY_MAJOR_VERSION >= 3
+    if (type != NULL) {
+        PyErr_NormalizeException(&type, &value, &traceback);
+        if (traceback != NULL)
+            PyException_SetTraceback(value, traceback);
+        PyErr_Fetch(&new_type, &new_value, &new_traceback);
+        PyErr_NormalizeException(&new_type, &new_value, &new_traceback);
+        /* Steals the reference to value. */
+        PyException_SetContext(new_value, value);
+        value = NULL;
+        PyErr_Restore(new_type, new_value, new_traceback);
+    }
+#endif
+    Py_XDECREF(type);
+    Py_XDECREF(value);
+    Py_XDECREF(traceback);
+}
+
+#define RUN_CLIENT_WITH_POOL(pool, client, cmd) { \
+    svn_error_t *err; \
+    PyThreadState *_save; \
+    _save = PyEval_SaveThread(); \
+    err = (cmd); \
+    PyEval_RestoreThread(_save); \
+    if (err != NULL) { \
+        handle_svn_error(err); \
+        svn_error_clear(err); \
+        client_flush_notifications_after_error(client); \
+        apr_pool_destroy(pool); \
+        return NULL; \
+    } \
+    if (!client_flush_notifications(client)) { \
+        apr_pool_destroy(pool); \
+        return NULL; \
+    } \
+}
+
 static PyObject *client_get_notify_func(PyObject *self, void *closure)
 {
     ClientObject *client = (ClientObject *)self;
@@ -581,6 +974,9 @@ static int client_set_notify_func(PyObject *self, PyObject *func, void *closure)
     if (func == Py_None) {
         client->client->notify_func2 = NULL;
         client->client->notify_baton2 = Py_None;
+    } else if (PyObject_TypeCheck(func, &BatchedNotifier_Type)) {
+        client->client->notify_func2 = py_batched_notify_func;
+        client->client->notify_baton2 = (void *)func;
     } else {
         client->client->notify_func2 = py_wc_notify_func;
         client->client->notify_baton2 = (void *)func;
@@ -671,19 +1067,19 @@ static PyObject *client_add(PyObject *self, PyObject *args, PyObject *kwargs)
         return NULL;
 
 #if ONLY_SINCE_SVN(1, 8)
-    RUN_SVN_WITH_POOL(temp_pool,
+    RUN_CLIENT_WITH_POOL(temp_pool, client,
         svn_client_add5(path, recursive?svn_depth_infinity:svn_depth_empty,
                         force, no_ignore, no_autoprops, add_parents,
                         client->client, temp_pool)
         );
 #elif ONLY_SINCE_SVN(1, 5)
-    RUN_SVN_WITH_POOL(temp_pool,
+    RUN_CLIENT_WITH_POOL(temp_pool, client,
         svn_client_add4(path, recursive?svn_depth_infinity:svn_depth_empty,
                         force, no_ignore, add_parents,
                         client->client, temp_pool)
         );
 #else
-    RUN_SVN_WITH_POOL(temp_pool,
+    RUN_CLIENT_WITH_POOL(temp_pool, client,
         svn_client_add3(path, recursive, force, no_ignore, client->client,
                         temp_pool)
         );
@@ -738,7 +1134,7 @@ static PyObject *client_checkout(PyObject *self, PyObject *args, PyObject *kwarg
     }
 
 #if ONLY_SINCE_SVN(1, 5)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_checkout3(&result_rev, url,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_checkout3(&result_rev, url,
         path,
         &c_peg_rev, &c_rev, recurse?svn_depth_infinity:svn_depth_files,
         ignore_externals, allow_unver_obstructions, client->client, temp_pool));
@@ -750,7 +1146,7 @@ static PyObject *client_checkout(PyObject *self, PyObject *args, PyObject *kwarg
         return NULL;
     }
 
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_checkout2(&result_rev, url,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_checkout2(&result_rev, url,
         path,
         &c_peg_rev, &c_rev, recurse,
         ignore_externals, client->client, temp_pool));
@@ -862,13 +1258,13 @@ static PyObject *client_commit(PyObject *self, PyObject *args, PyObject *kwargs)
     }
 
 #if ONLY_SINCE_SVN(1, 8)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_commit6(
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_commit6(
         apr_targets, recurse?svn_depth_infinity:svn_depth_files,
         keep_locks, keep_changelist, commit_as_operations,
         include_file_externals, include_dir_externals, changelists,
         hash_revprops, py_commit_callback2, callback, client->client, temp_pool));
 #elif ONLY_SINCE_SVN(1, 5)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_commit4(
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_commit4(
         &commit_info, apr_targets, recurse?svn_depth_infinity:svn_depth_files,
         keep_locks, keep_changelist, changelists, hash_revprops,
         client->client, temp_pool));
@@ -879,7 +1275,7 @@ static PyObject *client_commit(PyObject *self, PyObject *args, PyObject *kwargs)
         return NULL;
     }
 
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_commit3(&commit_info,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_commit3(&commit_info,
                 apr_targets,
                recurse, keep_locks, client->client, temp_pool));
 #endif
@@ -931,17 +1327,17 @@ static PyObject *client_export(PyObject *self, PyObject *args, PyObject *kwargs)
     }
 
 #if ONLY_SINCE_SVN(1, 7)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_export5(&result_rev, from, to,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_export5(&result_rev, from, to,
         &c_peg_rev, &c_rev, overwrite, ignore_externals, ignore_keywords,
         recurse?svn_depth_infinity:svn_depth_files,
         native_eol, client->client, temp_pool));
 #elif ONLY_SINCE_SVN(1, 5)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_export4(&result_rev, from, to,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_export4(&result_rev, from, to,
         &c_peg_rev, &c_rev, overwrite, ignore_externals,
         recurse?svn_depth_infinity:svn_depth_files,
         native_eol, client->client, temp_pool));
 #else
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_export3(&result_rev, from, to,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_export3(&result_rev, from, to,
         &c_peg_rev, &c_rev, overwrite, ignore_externals, recurse,
         native_eol, client->client, temp_pool));
 #endif
@@ -993,7 +1389,7 @@ static PyObject *client_cat(PyObject *self, PyObject *args, PyObject *kwargs)
         &props, stream, path, &c_peg_rev, &c_rev, expand_keywords,
         client->client, temp_pool, temp_pool));
 
-    ret = prop_hash_to_dict(props);
+    ret = prop_hash_to_dict(props, temp_pool);
     if (ret == NULL) {
         apr_pool_destroy(temp_pool);
         return NULL;
@@ -1052,10 +1448,10 @@ static PyObject *client_delete(PyObject *self, PyObject *args)
     }
 
 #if ONLY_SINCE_SVN(1, 7)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_delete4(
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_delete4(
         apr_paths, force, keep_local, hash_revprops, py_commit_callback2, callback, client->client, temp_pool));
 #elif ONLY_SINCE_SVN(1, 5)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_delete3(
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_delete3(
         &commit_info, apr_paths, force, keep_local, hash_revprops, client->client, temp_pool));
 #else
     if (hash_revprops != NULL) {
@@ -1071,7 +1467,7 @@ static PyObject *client_delete(PyObject *self, PyObject *args)
         apr_pool_destroy(temp_pool);
         return NULL;
     }
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_delete2(
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_delete2(
         &commit_info, apr_paths, force, client->client, temp_pool));
 #endif
 
@@ -1127,11 +1523,11 @@ static PyObject *client_mkdir(PyObject *self, PyObject *args, PyObject *kwargs)
     }
 
 #if ONLY_SINCE_SVN(1, 7)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_mkdir4(apr_paths,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_mkdir4(apr_paths,
                 make_parents?TRUE:FALSE, hash_revprops, py_commit_callback2, callback,
                 client->client, temp_pool));
 #else
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_mkdir3(&commit_info,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_mkdir3(&commit_info,
                                                     apr_paths,
                 make_parents?TRUE:FALSE, hash_revprops, client->client, temp_pool));
 #endif
@@ -1149,7 +1545,7 @@ static PyObject *client_mkdir(PyObject *self, PyObject *args, PyObject *kwargs)
         return NULL;
     }
 
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_mkdir2(&commit_info,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_mkdir2(&commit_info,
                                                     apr_paths,
                 client->client, temp_pool));
 #endif
@@ -1270,26 +1666,26 @@ static PyObject *client_copy(PyObject *self, PyObject *args, PyObject *kwargs)
     APR_ARRAY_PUSH(src_paths, svn_client_copy_source_t *) = &src;
 #endif
 #if ONLY_SINCE_SVN(1, 9)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_copy7(src_paths,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_copy7(src_paths,
                 dst_path, copy_as_child, make_parents,
                 ignore_externals, metadata_only, pin_externals,
                 pinned_externals, revprops, py_commit_callback2,
                 callback, client->client, temp_pool));
 #elif ONLY_SINCE_SVN(1, 7)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_copy6(src_paths,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_copy6(src_paths,
                 dst_path, copy_as_child, make_parents,
                 ignore_externals, revprops, py_commit_callback2, callback,
                 client->client, temp_pool));
 #elif ONLY_SINCE_SVN(1, 6)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_copy5(&commit_info, src_paths,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_copy5(&commit_info, src_paths,
                 dst_path, copy_as_child, make_parents,
                 ignore_externals, revprops, client->client, temp_pool));
 #elif ONLY_SINCE_SVN(1, 5)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_copy4(&commit_info, src_paths,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_copy4(&commit_info, src_paths,
                 dst_path, copy_as_child, make_parents,
                 revprops, client->client, temp_pool));
 #else
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_copy2(&commit_info, src_path,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_copy2(&commit_info, src_path,
                 &c_src_rev, dst_path, client->client, temp_pool));
 #endif
 #if ONLY_BEFORE_SVN(1, 7)
@@ -1341,7 +1737,7 @@ static PyObject *client_propset(PyObject *self, PyObject *args)
 #if ONLY_SINCE_SVN(1, 5)
     /* FIXME: Support changelists */
     /* FIXME: Support depth */
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_propset3(&commit_info, propname,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_propset3(&commit_info, propname,
                 &c_propval, target, recurse?svn_depth_infinity:svn_depth_files,
                 skip_checks, base_revision_for_url,
                 NULL, revprops, client->client, temp_pool));
@@ -1353,7 +1749,7 @@ static PyObject *client_propset(PyObject *self, PyObject *args)
         apr_pool_destroy(temp_pool);
         return NULL;
     }
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_propset2(propname, &c_propval,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_propset2(propname, &c_propval,
                 target, recurse, skip_checks, client->client, temp_pool));
     ret = Py_None;
     Py_INCREF(ret);
@@ -1414,7 +1810,7 @@ static PyObject *client_propget(PyObject *self, PyObject *args)
                       svn_client_propget2(&hash_props, propname, target,
                 &c_peg_rev, &c_rev, recurse, client->client, temp_pool));
 #endif
-    ret = prop_hash_to_dict(hash_props);
+    ret = prop_hash_to_dict(hash_props, temp_pool);
     apr_pool_destroy(temp_pool);
     return ret;
 }
@@ -1491,7 +1887,7 @@ static PyObject *client_proplist(PyObject *self, PyObject *args,
 
         item = APR_ARRAY_IDX(props, i, svn_client_proplist_item_t *);
 
-        prop_dict = prop_hash_to_dict(item->prop_hash);
+        prop_dict = prop_hash_to_dict(item->prop_hash, temp_pool);
         if (prop_dict == NULL) {
             apr_pool_destroy(temp_pool);
             Py_DECREF(prop_list);
@@ -1538,7 +1934,7 @@ static PyObject *client_resolve(PyObject *self, PyObject *args)
     temp_pool = Pool(NULL);
     if (temp_pool == NULL)
         return NULL;
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_resolve(path, depth, choice,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_resolve(path, depth, choice,
             client->client, temp_pool));
 
     apr_pool_destroy(temp_pool);
@@ -1605,18 +2001,18 @@ static PyObject *client_update(PyObject *self, PyObject *args, PyObject *kwargs)
 #endif
 
 #if ONLY_SINCE_SVN(1, 7)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_update4(&result_revs,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_update4(&result_revs,
         apr_paths, &c_rev, recurse?svn_depth_infinity:svn_depth_files,
         depth_is_sticky?TRUE:FALSE, ignore_externals, allow_unver_obstructions?TRUE:FALSE,
         adds_as_modification?TRUE:FALSE, make_parents?TRUE:FALSE,
         client->client, temp_pool));
 #elif ONLY_SINCE_SVN(1, 5)
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_update3(&result_revs,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_update3(&result_revs,
         apr_paths, &c_rev, recurse?svn_depth_infinity:svn_depth_files,
         depth_is_sticky?TRUE:FALSE, ignore_externals, allow_unver_obstructions?TRUE:FALSE,
         client->client, temp_pool));
 #else
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_update2(&result_revs,
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_update2(&result_revs,
                                                     apr_paths, &c_rev,
                                                     recurse, ignore_externals, client->client, temp_pool));
 #endif
@@ -2035,7 +2431,7 @@ static PyObject *client_lock(PyObject *self, PyObject *args, PyObject *kwargs)
         return NULL;
     }
 
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_lock(targets, comment, steal_lock, client->client, temp_pool));
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_lock(targets, comment, steal_lock, client->client, temp_pool));
 
     apr_pool_destroy(temp_pool);
 
@@ -2067,7 +2463,7 @@ static PyObject *client_unlock(PyObject *self, PyObject *args, PyObject *kwargs)
         return NULL;
     }
 
-    RUN_SVN_WITH_POOL(temp_pool, svn_client_unlock(targets, break_lock, client->client, temp_pool));
+    RUN_CLIENT_WITH_POOL(temp_pool, client, svn_client_unlock(targets, break_lock, client->client, temp_pool));
 
     apr_pool_destroy(temp_pool);
 
@@ -2600,6 +2996,12 @@ moduleinit(void)
     if (PyType_Ready(&WCInfo_Type) < 0)
         return NULL;
 
+    if (PyType_Ready(&BatchedNotifier_Type) < 0)
+        return NULL;
+
+    if (PyType_Ready(&Dirent_Type) < 0)
+        return NULL;
+
     /* Make sure APR is initialized */
     apr_initialize();
 
@@ -2637,6 +3039,35 @@ moduleinit(void)
     Py_INCREF(&Config_Type);
     PyModule_AddObject(mod, "Config", (PyObject *)&Config_Type);
 
+    Py_INCREF(&BatchedNotifier_Type);
+    PyModule_AddObject(mod, "BatchedNotifier", (PyObject *)&BatchedNotifier_Type);
+
+    PyModule_AddIntConstant(mod, "NOTIFY_ADD", svn_wc_notify_add);
+    PyModule_AddIntConstant(mod, "NOTIFY_COPY", svn_wc_notify_copy);
+    PyModule_AddIntConstant(mod, "NOTIFY_DELETE", svn_wc_notify_delete);
+    PyModule_AddIntConstant(mod, "NOTIFY_RESTORE", svn_wc_notify_restore);
+    PyModule_AddIntConstant(mod, "NOTIFY_REVERT", svn_wc_notify_revert);
+    PyModule_AddIntConstant(mod, "NOTIFY_FAILED_REVERT", svn_wc_notify_failed_revert);
+    PyModule_AddIntConstant(mod, "NOTIFY_RESOLVED", svn_wc_notify_resolved);
+    PyModule_AddIntConstant(mod, "NOTIFY_SKIP", svn_wc_notify_skip);
+    PyModule_AddIntConstant(mod, "NOTIFY_UPDATE_DELETE", svn_wc_notify_update_delete);
+    PyModule_AddIntConstant(mod, "NOTIFY_UPDATE_ADD", svn_wc_notify_update_add);
+    PyModule_AddIntConstant(mod, "NOTIFY_UPDATE_UPDATE", svn_wc_notify_update_update);
+    PyModule_AddIntConstant(mod, "NOTIFY_UPDATE_COMPLETED", svn_wc_notify_update_completed);
+    PyModule_AddIntConstant(mod, "NOTIFY_UPDATE_EXTERNAL", svn_wc_notify_update_external);
+    PyModule_AddIntConstant(mod, "NOTIFY_STATUS_COMPLETED", svn_wc_notify_status_completed);
+    PyModule_AddIntConstant(mod, "NOTIFY_STATUS_EXTERNAL", svn_wc_notify_status_external);
+    PyModule_AddIntConstant(mod, "NOTIFY_COMMIT_MODIFIED", svn_wc_notify_commit_modified);
+    PyModule_AddIntConstant(mod, "NOTIFY_COMMIT_ADDED", svn_wc_notify_commit_added);
+    PyModule_AddIntConstant(mod, "NOTIFY_COMMIT_DELETED", svn_wc_notify_commit_deleted);
+    PyModule_AddIntConstant(mod, "NOTIFY_COMMIT_REPLACED", svn_wc_notify_commit_replaced);
+    PyModule_AddIntConstant(mod, "NOTIFY_COMMIT_POSTFIX_TXDELTA", svn_wc_notify_commit_postfix_txdelta);
+    PyModule_AddIntConstant(mod, "NOTIFY_BLAME_REVISION", svn_wc_notify_blame_revision);
+    PyModule_AddIntConstant(mod, "NOTIFY_LOCKED", svn_wc_notify_locked);
+    PyModule_AddIntConstant(mod, "NOTIFY_UNLOCKED", svn_wc_notify_unlocked);
+    PyModule_AddIntConstant(mod, "NOTIFY_FAILED_LOCK", svn_wc_notify_failed_lock);
+    PyModule_AddIntConstant(mod, "NOTIFY_FAILED_UNLOCK", svn_wc_notify_failed_unlock);
+
     return mod;
 }
 
@@ -0,0 +1,553 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301, USA
+"""Subversion dumpfile handling.
+
+Dumpfiles are parsed as a stream of records. Property sections are
+parsed eagerly, but text bodies are only read when asked for, so
+dumpfiles of any size can be filtered in constant memory.
+"""
+
+__author__ = "Jelmer Vernooij <jelmer@jelmer.uk>"
+__docformat__ = "restructuredText"
+
+from collections import OrderedDict
+import mmap
+import os
+
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+_LENGTH_HEADERS = (b"Prop-content-length", b"Text-content-length",
+                   b"Content-length")
+
+
+class DumpfileError(Exception):
+    """Error parsing a dumpfile."""
+
+
+def _read_headers(f):
+    """Read the next block of record headers.
+
+    Blank lines before the headers are skipped.
+
+    :param f: Binary file-like object
+    :return: Tuple with the number of bytes skipped before the headers
+        and a list of (name, value) tuples, or None at end of file
+    """
+    skipped = 0
+    while True:
+        line = f.readline()
+        if not line:
+            return None
+        if line != b"\n":
+            break
+        skipped += 1
+    headers = []
+    while line not in (b"\n", b""):
+        try:
+            (name, value) = line.rstrip(b"\n").split(b": ", 1)
+        except ValueError:
+            raise DumpfileError("Invalid header line %r" % line)
+        headers.append((name, value))
+        line = f.readline()
+    return (skipped, headers)
+
+
+def _content_length(headers):
+    """Determine the length of the body that follows a set of headers."""
+    lengths = dict(headers)
+    if b"Content-length" in lengths:
+        return int(lengths[b"Content-length"])
+    # Older dumpfiles do not always include Content-length.
+    return (int(lengths.get(b"Prop-content-length", 0)) +
+            int(lengths.get(b"Text-content-length", 0)))
+
+
+def parse_props(data):
+    """Parse a property section.
+
+    :param data: Property section, including the PROPS-END terminator
+    :return: OrderedDict mapping property names to values; deleted
+        properties (in Prop-delta records) have None as value
+    """
+    props = OrderedDict()
+    pos = 0
+    while True:
+        end = data.find(b"\n", pos)
+        if end == -1:
+            raise DumpfileError("Unterminated property section")
+        line = bytes(data[pos:end])
+        pos = end + 1
+        if line == b"PROPS-END":
+            return props
+        try:
+            (kind, length) = line.split(b" ", 1)
+            length = int(length)
+        except ValueError:
+            raise DumpfileError("Invalid property line %r" % line)
+        name = bytes(data[pos:pos+length]).decode("utf-8")
+        pos += length + 1
+        if kind == b"D":
+            props[name] = None
+            continue
+        if kind != b"K":
+            raise DumpfileError("Invalid property line %r" % line)
+        end = data.find(b"\n", pos)
+        line = bytes(data[pos:end])
+        pos = end + 1
+        if not line.startswith(b"V "):
+            raise DumpfileError("Expected property value, got %r" % line)
+        length = int(line[2:])
+        props[name] = bytes(data[pos:pos+length])
+        pos += length + 1
+
+
+def unparse_props(props):
+    """Serialise a property section.
+
+    :param props: Dictionary mapping property names to values; None
+        values are written as deletions
+    :return: Property section, including the PROPS-END terminator
+    """
+    chunks = []
+    for (name, value) in props.items():
+        if not isinstance(name, bytes):
+            name = name.encode("utf-8")
+        if value is None:
+            chunks.append(b"D %d\n%s\n" % (len(name), name))
+        else:
+            chunks.append(b"K %d\n%s\nV %d\n%s\n" %
+                          (len(name), name, len(value), value))
+    chunks.append(b"PROPS-END\n")
+    return b"".join(chunks)
+
+
+class TextView(object):
+    """Lazy, read-only view of a text body in a seekable dumpfile.
+
+    The body is only read when read() is called.
+    """
+
+    def __init__(self, f, offset, length):
+        self._f = f
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+
+    def __len__(self):
+        return self._length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._length
+        self._pos = max(0, min(offset, self._length))
+        return self._pos
+
+    def read(self, size=-1):
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size == 0:
+            return b""
+        self._f.seek(self._offset + self._pos)
+        data = self._f.read(size)
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        pass
+
+
+class MmapTextView(TextView):
+    """View of a text body in a memory mapped dumpfile.
+
+    getbuffer() returns a memoryview of the body without copying it.
+    """
+
+    def getbuffer(self):
+        return memoryview(self._f)[self._offset:self._offset+self._length]
+
+    def read(self, size=-1):
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        start = self._offset + self._pos
+        self._pos += size
+        return self._f[start:start+size]
+
+
+class StreamTextView(TextView):
+    """View of a text body in a dumpfile that can not seek.
+
+    The body can only be read once, before the next record is parsed.
+    """
+
+    def __init__(self, f, length):
+        super(StreamTextView, self).__init__(f, None, length)
+        self.valid = True
+
+    def seekable(self):
+        return False
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        raise IOError("Text body of a stream can not seek")
+
+    def read(self, size=-1):
+        if not self.valid:
+            raise DumpfileError(
+                "Text body no longer available; the parser has moved on")
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size == 0:
+            return b""
+        data = self._f.read(size)
+        if len(data) != size:
+            raise DumpfileError("Unexpected end of dumpfile")
+        self._pos += len(data)
+        return data
+
+    def _skip(self):
+        while self._pos < self._length:
+            self.read(min(COPY_CHUNK_SIZE, self._length - self._pos))
+        self.valid = False
+
+
+class Record(object):
+    """A record in a dumpfile.
+
+    :ivar headers: List of (name, value) tuples, both bytestrings
+    :ivar props: OrderedDict with properties, or None if the record has
+        no property section
+    :ivar text: Text body as a TextView or bytestring, or None if the
+        record has no text body
+    """
+
+    def __init__(self, headers, props=None, text=None):
+        self.headers = headers
+        self.props = props
+        self.text = text
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.headers)
+
+    def get_header(self, name, default=None):
+        for (key, value) in self.headers:
+            if key == name:
+                return value
+        return default
+
+    def set_header(self, name, value):
+        for i, (key, oldvalue) in enumerate(self.headers):
+            if key == name:
+                self.headers[i] = (name, value)
+                return
+        self.headers.append((name, value))
+
+    def remove_header(self, name):
+        self.headers = [(key, value) for (key, value) in self.headers
+                        if key != name]
+
+
+class FormatVersionRecord(Record):
+    """Dumpfile format version record."""
+
+    @property
+    def version(self):
+        return int(self.get_header(b"SVN-fs-dump-format-version"))
+
+
+class UUIDRecord(Record):
+    """Repository UUID record."""
+
+    @property
+    def uuid(self):
+        return self.get_header(b"UUID").decode("ascii")
+
+
+class RevisionRecord(Record):
+    """Revision record; props contains the revision properties."""
+
+    @property
+    def revnum(self):
+        return int(self.get_header(b"Revision-number"))
+
+
+class NodeRecord(Record):
+    """Node record."""
+
+    @property
+    def path(self):
+        return self.get_header(b"Node-path").decode("utf-8")
+
+    @property
+    def kind(self):
+        kind = self.get_header(b"Node-kind")
+        if kind is None:
+            return None
+        return kind.decode("ascii")
+
+    @property
+    def action(self):
+        return self.get_header(b"Node-action").decode("ascii")
+
+    @property
+    def copyfrom_path(self):
+        path = self.get_header(b"Node-copyfrom-path")
+        if path is None:
+            return None
+        return path.decode("utf-8")
+
+    @property
+    def copyfrom_rev(self):
+        rev = self.get_header(b"Node-copyfrom-rev")
+        if rev is None:
+            return -1
+        return int(rev)
+
+    def set_text(self, text):
+        """Replace the text body with full text.
+
+        Checksum and delta headers that no longer apply are removed.
+
+        :param text: New text as a bytestring or file-like object with
+            ``__len__``, or None to remove the text body
+        """
+        for name in (b"Text-delta", b"Text-delta-base-md5",
+                     b"Text-delta-base-sha1", b"Text-content-md5",
+                     b"Text-content-sha1"):
+            self.remove_header(name)
+        self.text = text
+
+
+_RECORD_TYPES = {
+    b"SVN-fs-dump-format-version": FormatVersionRecord,
+    b"UUID": UUIDRecord,
+    b"Revision-number": RevisionRecord,
+    b"Node-path": NodeRecord,
+}
+
+
+def _is_seekable(f):
+    if getattr(f, "seekable", None) is not None:
+        try:
+            return f.seekable()
+        except (IOError, OSError, ValueError):
+            return False
+    try:
+        f.tell()
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def parse(f, use_mmap=False):
+    """Parse a dumpfile.
+
+    Text bodies are not read until the consumer asks for them. For
+    seekable files the returned views stay valid for as long as the file
+    is open; when reading from a pipe they have to be read before the
+    next record is requested.
+
+    :param f: Binary file-like object
+    :param use_mmap: Memory map f. Text bodies can then be accessed
+        without copying them through ``text.getbuffer()``
+    :return: Iterator over Record objects
+    """
+    if use_mmap:
+        try:
+            f = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can not be mapped.
+            return
+        view_class = MmapTextView
+        seekable = True
+    else:
+        view_class = TextView
+        seekable = _is_seekable(f)
+    if seekable:
+        offset = f.tell()
+    stream_view = None
+    extra = 0
+    while True:
+        if seekable:
+            f.seek(offset)
+        else:
+            if stream_view is not None:
+                stream_view._skip()
+                stream_view = None
+            if extra and len(f.read(extra)) != extra:
+                raise DumpfileError("Unexpected end of dumpfile")
+        ret = _read_headers(f)
+        if ret is None:
+            return
+        (skipped, headers) = ret
+        record = _RECORD_TYPES.get(headers[0][0], Record)(headers)
+        prop_length = record.get_header(b"Prop-content-length")
+        if prop_length is not None:
+            data = f.read(int(prop_length))
+            if len(data) != int(prop_length):
+                raise DumpfileError("Unexpected end of dumpfile")
+            record.props = parse_props(data)
+        text_length = record.get_header(b"Text-content-length")
+        if text_length is not None:
+            if seekable:
+                record.text = view_class(f, f.tell(), int(text_length))
+            else:
+                record.text = stream_view = StreamTextView(
+                    f, int(text_length))
+        # Skip any content not described by the other headers.
+        extra = _content_length(headers) - (
+            int(prop_length or 0) + int(text_length or 0))
+        if seekable:
+            offset = f.tell() + int(text_length or 0) + extra
+        yield record
+
+
+def _copy_text(text, f):
+    if isinstance(text, bytes):
+        f.write(text)
+        return
+    if getattr(text, "getbuffer", None) is not None:
+        f.write(text.getbuffer())
+        return
+    if getattr(text, "seekable", None) is not None and text.seekable():
+        text.seek(0)
+    while True:
+        chunk = text.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            break
+        f.write(chunk)
+
+
+class DumpfileWriter(object):
+    """Writes records to a dumpfile.
+
+    Content length headers are recalculated from the actual property
+    section and text body of each record.
+    """
+
+    def __init__(self, f):
+        self.f = f
+
+    def write_record(self, record):
+        headers = [(name, value) for (name, value) in record.headers
+                   if name not in _LENGTH_HEADERS]
+        if record.props is not None:
+            props = unparse_props(record.props)
+        else:
+            props = None
+        content_length = 0
+        if props is not None:
+            headers.append((b"Prop-content-length", b"%d" % len(props)))
+            content_length += len(props)
+        if record.text is not None:
+            headers.append((b"Text-content-length",
+                            b"%d" % len(record.text)))
+            content_length += len(record.text)
+        if props is not None or record.text is not None:
+            headers.append((b"Content-length", b"%d" % content_length))
+        self.f.write(b"".join(
+            [b"%s: %s\n" % header for header in headers]) + b"\n")
+        if props is not None:
+            self.f.write(props)
+        if record.text is not None:
+            _copy_text(record.text, self.f)
+        if isinstance(record, RevisionRecord):
+            self.f.write(b"\n")
+        elif isinstance(record, NodeRecord):
+            self.f.write(b"\n\n")
+
+    def write_records(self, records):
+        for record in records:
+            self.write_record(record)
+
+
+def write_dumpfile(f, records):
+    """Write records to a dumpfile.
+
+    :param f: Binary file-like object to write to
+    :param records: Iterable over Record objects
+    """
+    DumpfileWriter(f).write_records(records)
+
+
+def revision_offsets(f):
+    """Find the revision records in a dumpfile.
+
+    Only headers are parsed; bodies are skipped by seeking over them.
+
+    :param f: Seekable binary file-like object, positioned at the start
+        of the dumpfile
+    :return: Iterator over (revnum, offset) tuples
+    """
+    while True:
+        offset = f.tell()
+        record = _read_headers(f)
+        if record is None:
+            return
+        (skipped, headers) = record
+        if headers[0][0] == b"Revision-number":
+            yield (int(headers[0][1]), offset + skipped)
+        f.seek(_content_length(headers), os.SEEK_CUR)
+
+
+def split_dumpfile(f, parts):
+    """Split a dumpfile into ranges of whole revisions.
+
+    The ranges have roughly the same size in bytes and can be processed
+    independently. The dumpfile preamble (format version and UUID) runs
+    from the start of the file to the start offset of the first range;
+    prepend it to a range to obtain a dumpfile that can be loaded on its
+    own.
+
+    :param f: Seekable binary file-like object, positioned at the start
+        of the dumpfile
+    :param parts: Maximum number of ranges to return
+    :return: List of (start_revnum, end_revnum, start_offset, end_offset)
+        tuples
+    """
+    if parts < 1:
+        raise ValueError("parts should be at least 1")
+    revisions = list(revision_offsets(f))
+    if not revisions:
+        return []
+    end = f.seek(0, os.SEEK_END)
+    if end is None:  # Python 2 file objects
+        end = f.tell()
+    start = revisions[0][1]
+    target = float(end - start) / parts
+    ret = []
+    (range_rev, range_offset) = revisions[0]
+    for i in range(1, len(revisions)):
+        (revnum, offset) = revisions[i]
+        if (len(ret) < parts - 1 and
+                offset - start >= target * (len(ret) + 1)):
+            ret.append((range_rev, revisions[i - 1][0], range_offset, offset))
+            (range_rev, range_offset) = (revnum, offset)
+    ret.append((range_rev, revisions[-1][0], range_offset, end))
+    return ret
@@ -0,0 +1,248 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301, USA
+"""Local index of node locations, for answering history queries offline."""
+
+__author__ = "Jelmer Vernooij <jelmer@jelmer.uk>"
+__docformat__ = "restructuredText"
+
+from bisect import bisect_right
+import json
+
+from subvertpy import ERR_FS_NOT_FOUND, SubversionException
+
+
+def _normalize(path):
+    return "/" + path.strip("/")
+
+
+def _ancestors(path):
+    """Yield a path and all its parents, ending with the root."""
+    while True:
+        yield path
+        if path == "/":
+            return
+        path = path.rsplit("/", 1)[0] or "/"
+
+
+class LocationIndex(object):
+    """Index of the revisions in which nodes were created and deleted.
+
+    The index is built from the changed paths in the log. It records only
+    additions, replacements and deletions, and where nodes were copied
+    from. That is enough to trace a node back through its history with a
+    binary search per path component, without contacting the server.
+
+    Paths are relative to the repository root, as in the changed paths
+    reported by the log.
+
+    :ivar revnum: Last revision that has been indexed, or -1
+    """
+
+    def __init__(self):
+        self.revnum = -1
+        # path -> sorted list of revisions in which path was added
+        self._birth_revs = {}
+        # path -> list of (copyfrom_path, copyfrom_rev), parallel to
+        # _birth_revs
+        self._birth_sources = {}
+        # path -> sorted list of revisions in which path was deleted
+        self._death_revs = {}
+
+    def add_revision(self, revnum, changed_paths):
+        """Add the changes from a single revision.
+
+        Revisions have to be added in increasing order.
+
+        :param changed_paths: Dictionary mapping paths to tuples with
+            action, copyfrom path and copyfrom revision, as returned by
+            `RemoteAccess.iter_log`
+        """
+        if revnum <= self.revnum:
+            raise ValueError("revision %d already indexed" % revnum)
+        for (path, change) in (changed_paths or {}).items():
+            (action, copyfrom_path, copyfrom_rev) = change[:3]
+            path = _normalize(path)
+            if action == "D":
+                self._death_revs.setdefault(path, []).append(revnum)
+                continue
+            if action not in ("A", "R"):
+                continue
+            if copyfrom_path is not None and copyfrom_rev != -1:
+                source = (_normalize(copyfrom_path), copyfrom_rev)
+            else:
+                source = None
+            self._birth_revs.setdefault(path, []).append(revnum)
+            self._birth_sources.setdefault(path, []).append(source)
+        self.revnum = revnum
+
+    def update(self, conn, end=None):
+        """Index the revisions that have been added since the last update.
+
+        :param conn: RemoteAccess session opened at the repository root
+        :param end: Last revision to index; defaults to the latest revision
+        :return: Number of revisions that were indexed
+        """
+        if conn.url.rstrip("/") != conn.get_repos_root().rstrip("/"):
+            raise ValueError("session %s is not at the repository root" %
+                             conn.url)
+        if end is None:
+            end = conn.get_latest_revnum()
+        if end <= self.revnum:
+            return 0
+        count = 0
+        for entry in conn.iter_log(None, self.revnum + 1, end,
+                                   discover_changed_paths=True,
+                                   revprops=[]):
+            (changed_paths, revnum) = entry[:2]
+            self.add_revision(revnum, changed_paths)
+            count += 1
+        self.revnum = end
+        return count
+
+    def _find_birth(self, path, revnum):
+        """Find the creation of the node at path in revnum.
+
+        :return: Tuple with the revision in which the node (or one of its
+            parents) was added, the path that was added and where it was
+            copied from (or None), or None if there is no node at path in
+            revnum
+        """
+        ret = (0, "/", None)
+        death_rev = -1
+        for ancestor in _ancestors(path):
+            revs = self._birth_revs.get(ancestor)
+            if revs:
+                i = bisect_right(revs, revnum)
+                if i > 0 and revs[i - 1] > ret[0]:
+                    ret = (revs[i - 1], ancestor,
+                           self._birth_sources[ancestor][i - 1])
+            revs = self._death_revs.get(ancestor)
+            if revs:
+                i = bisect_right(revs, revnum)
+                if i > 0:
+                    death_rev = max(death_rev, revs[i - 1])
+        # A node deleted in the revision that added one of its parents
+        # does not exist in that revision either.
+        if death_rev >= ret[0]:
+            return None
+        # Children of a directory that was added without history have to
+        # be added explicitly.
+        if ret[1] != path and ret[2] is None:
+            return None
+        return ret
+
+    def iter_history(self, path, peg_revision=-1):
+        """Trace the history of a node.
+
+        :raise SubversionException: if there is no node at path in
+            peg_revision
+        :return: Iterator over (oldest_rev, youngest_rev, path) tuples, from
+            young to old. Gaps, where the node was not present in the
+            repository, have None as path.
+        """
+        if peg_revision == -1:
+            peg_revision = self.revnum
+        if peg_revision > self.revnum:
+            raise ValueError("revision %d not indexed yet" % peg_revision)
+        path = peg_path = _normalize(path)
+        revnum = peg_revision
+        ret = []
+        while True:
+            birth = self._find_birth(path, revnum)
+            if birth is None:
+                # Copies always have an existing source, so the node is
+                # missing in peg_revision too.
+                raise SubversionException(
+                    "File not found: revision %d, path '%s'" %
+                    (peg_revision, peg_path),
+                    ERR_FS_NOT_FOUND)
+            (birth_rev, birth_path, source) = birth
+            ret.append((birth_rev, revnum, path))
+            if source is None:
+                return iter(ret)
+            (copyfrom_path, copyfrom_rev) = source
+            if copyfrom_rev < birth_rev - 1:
+                ret.append((copyfrom_rev + 1, birth_rev - 1, None))
+            path = copyfrom_path + path[len(birth_path):]
+            if path != "/":
+                path = path.rstrip("/")
+            revnum = copyfrom_rev
+
+    def get_locations(self, path, peg_revision, location_revisions):
+        """Find the paths of a node in other revisions.
+
+        :return: Dictionary mapping revision numbers to paths, for those
+            revisions in which the node existed
+        """
+        targets = sorted(set(location_revisions), reverse=True)
+        ret = {}
+        for (oldest, youngest, location) in self.iter_history(
+                path, peg_revision):
+            while targets and targets[0] >= oldest:
+                revnum = targets.pop(0)
+                if revnum <= youngest and location is not None:
+                    ret[revnum] = location
+            if not targets:
+                break
+        return ret
+
+    def get_location_segments(self, path, peg_revision, start_revision,
+                              end_revision, rcvr):
+        """Report the locations of a node over a range of revisions.
+
+        The receiver is called as rcvr(range_start, range_end, path), like
+        `RemoteAccess.get_location_segments`.
+        """
+        if peg_revision == -1:
+            peg_revision = self.revnum
+        if start_revision == -1:
+            start_revision = peg_revision
+        if end_revision == -1:
+            end_revision = 0
+        for (oldest, youngest, location) in self.iter_history(
+                path, peg_revision):
+            if oldest > start_revision:
+                continue
+            if youngest < end_revision:
+                break
+            if location is not None:
+                location = location.lstrip("/")
+            rcvr(max(oldest, end_revision), min(youngest, start_revision),
+                 location)
+
+    def save(self, f):
+        """Write the index to a file opened in text mode."""
+        json.dump({
+            "revnum": self.revnum,
+            "births": dict(
+                (path, list(zip(revs, self._birth_sources[path])))
+                for (path, revs) in self._birth_revs.items()),
+            "deaths": self._death_revs}, f)
+
+    @classmethod
+    def load(cls, f):
+        """Read an index written by `save`."""
+        data = json.load(f)
+        ret = cls()
+        ret.revnum = data["revnum"]
+        for (path, births) in data["births"].items():
+            ret._birth_revs[path] = [revnum for (revnum, source) in births]
+            ret._birth_sources[path] = [
+                tuple(source) if source is not None else None
+                for (revnum, source) in births]
+        for (path, revs) in data.get("deaths", {}).items():
+            ret._death_revs[path] = revs
+        return ret
@@ -0,0 +1,362 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA 02110-1301, USA
+"""Operations that spread their work over several sessions or threads."""
+
+__author__ = "Jelmer Vernooij <jelmer@jelmer.uk>"
+__docformat__ = "restructuredText"
+
+import os
+import threading
+import time
+
+try:
+    import queue
+except ImportError:  # Python < 3
+    import Queue as queue
+
+from subvertpy import NODE_DIR, NODE_FILE, SubversionException
+from subvertpy.properties import PROP_EXECUTABLE, PROP_SPECIAL
+from subvertpy.ra import DIRENT_KIND, RemoteAccess
+from subvertpy.repos import Repository, api_version
+
+
+def _make_executable(path):
+    mode = os.stat(path).st_mode
+    # Grant execute wherever read is granted, like svn itself does.
+    os.chmod(path, mode | ((mode & 0o444) >> 2))
+
+
+def _make_special(path):
+    with open(path, 'rb') as f:
+        contents = f.read()
+    if not contents.startswith(b"link "):
+        # Unknown kind of special file; leave the contents in place.
+        return
+    os.unlink(path)
+    os.symlink(contents[len(b"link "):].decode("utf-8"), path)
+
+
+class _ParallelExporter(object):
+
+    def __init__(self, url, dest, revision, workers, progress,
+                 ra_kwargs):
+        self.url = url
+        self.dest = dest
+        self.revision = revision
+        self.workers = workers
+        self.progress = progress
+        self.ra_kwargs = ra_kwargs
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.error = None
+        self.done = 0
+        self.total = 0
+
+    def _connect(self):
+        return RemoteAccess(self.url, **self.ra_kwargs)
+
+    def _report(self, done=0, found=0):
+        with self.lock:
+            self.done += done
+            self.total += found
+            if self.progress is not None:
+                self.progress(self.done, self.total)
+
+    def _local_path(self, path):
+        if not path:
+            return self.dest
+        return os.path.join(self.dest, *path.split("/"))
+
+    def _export_dir(self, conn, path):
+        (dirents, fetched_rev, props) = conn.get_dir(
+            path, self.revision, DIRENT_KIND)
+        nfiles = 0
+        for name, dirent in sorted(dirents.items()):
+            if path:
+                child = path + "/" + name
+            else:
+                child = name
+            if dirent["kind"] == NODE_DIR:
+                os.mkdir(self._local_path(child))
+                self.queue.put((NODE_DIR, child))
+            elif dirent["kind"] == NODE_FILE:
+                nfiles += 1
+                self.queue.put((NODE_FILE, child))
+        if nfiles:
+            self._report(found=nfiles)
+
+    def _export_file(self, conn, path):
+        local_path = self._local_path(path)
+        with open(local_path, 'wb') as f:
+            # get_file writes straight to the file descriptor with the
+            # GIL released, so other workers can run in the meantime.
+            (fetched_rev, props) = conn.get_file(path, f, self.revision)
+        if PROP_SPECIAL in props and hasattr(os, "symlink"):
+            _make_special(local_path)
+        elif PROP_EXECUTABLE in props:
+            _make_executable(local_path)
+        self._report(done=1)
+
+    def _worker(self):
+        conn = None
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is not None:
+                    continue
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    (kind, path) = item
+                    if kind == NODE_DIR:
+                        self._export_dir(conn, path)
+                    else:
+                        self._export_file(conn, path)
+                except BaseException as e:
+                    with self.lock:
+                        if self.error is None:
+                            self.error = e
+            finally:
+                self.queue.task_done()
+
+    def run(self):
+        conn = self._connect()
+        if self.revision == -1:
+            self.revision = conn.get_latest_revnum()
+        if conn.check_path("", self.revision) != NODE_DIR:
+            raise ValueError("%s is not a directory at revision %d" %
+                             (self.url, self.revision))
+        del conn
+        if not os.path.isdir(self.dest):
+            os.mkdir(self.dest)
+        self.queue.put((NODE_DIR, ""))
+        threads = []
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker)
+            t.daemon = True
+            t.start()
+            threads.append(t)
+        try:
+            self.queue.join()
+        finally:
+            for t in threads:
+                self.queue.put(None)
+            for t in threads:
+                t.join()
+        if self.error is not None:
+            raise self.error
+        return self.revision
+
+
+def parallel_export(url, dest, revision=-1, workers=4, progress=None,
+                    **kwargs):
+    """Export a directory tree using several RA sessions at once.
+
+    Each worker thread opens its own RemoteAccess session, lists directories
+    with get_dir() and fetches files with get_file(). File contents are
+    written straight to disk with the GIL released.
+
+    svn:executable and svn:special are applied, but unlike
+    ``Client.export`` no keyword expansion or end-of-line translation is
+    done and externals are not fetched.
+
+    :param url: URL of the directory to export
+    :param dest: Local path to export to; created if it does not exist
+    :param revision: Revision to export, -1 for the latest revision
+    :param workers: Number of sessions to use
+    :param progress: Optional callback, called with (done, total) number
+        of files as files are discovered and fetched
+    :param kwargs: Extra arguments for the RemoteAccess constructor,
+        e.g. ``auth``
+    :return: Revision that was exported
+    """
+    if workers < 1:
+        raise ValueError("workers should be at least 1")
+    exporter = _ParallelExporter(url, dest, revision, workers, progress,
+                                 kwargs)
+    return exporter.run()
+
+
+class VerifyResult(object):
+    """Summary of a verification run.
+
+    :ivar start_rev: First revision that was verified
+    :ivar end_rev: Last revision that was verified
+    :ivar verified: Number of revisions that passed verification
+    :ivar errors: Dictionary mapping revision numbers to the exceptions
+        raised when verifying them
+    :ivar elapsed: Wall clock time taken, in seconds
+    """
+
+    def __init__(self, start_rev, end_rev):
+        self.start_rev = start_rev
+        self.end_rev = end_rev
+        self.verified = 0
+        self.errors = {}
+        self.elapsed = 0.0
+
+    @property
+    def ok(self):
+        """Whether all revisions passed verification."""
+        return not self.errors
+
+    def __repr__(self):
+        return "<%s r%d:%d verified=%d errors=%r>" % (
+            type(self).__name__, self.start_rev, self.end_rev, self.verified,
+            sorted(self.errors))
+
+
+class _RangeVerifyFailed(Exception):
+    """Raised to stop verifying a range that failed as a whole."""
+
+
+class _ParallelVerifier(object):
+
+    def __init__(self, path, start_rev, end_rev, workers, chunk_size,
+                 progress):
+        self.path = path
+        self.workers = workers
+        self.progress = progress
+        self.result = VerifyResult(start_rev, end_rev)
+        self.queue = queue.Queue()
+        # Chunks are aligned to chunk_size, so that with the default size
+        # each worker reads from a single FSFS shard at a time.
+        chunk_start = start_rev
+        while chunk_start <= end_rev:
+            chunk_end = min(
+                end_rev, (chunk_start // chunk_size + 1) * chunk_size - 1)
+            self.queue.put((chunk_start, chunk_end))
+            chunk_start = chunk_end + 1
+        self.lock = threading.Lock()
+        self.error = None
+
+    def _report(self, revnum, error, elapsed):
+        with self.lock:
+            if error is None:
+                self.result.verified += 1
+            else:
+                self.result.errors[revnum] = error
+            if self.progress is not None:
+                self.progress(revnum, error, elapsed)
+
+    def _verify_range(self, repo, start_rev, end_rev):
+        # Next revision to be verified, and when the previous one was
+        # finished
+        state = [start_rev, time.time()]
+
+        def verified(revnum, elapsed):
+            state[0] = revnum + 1
+            state[1] = time.time()
+            self._report(revnum, None, elapsed)
+
+        def failed(revnum, error):
+            if revnum is None:
+                # The checks that cover the whole range failed. They run
+                # before any revision is verified, so stop here and find
+                # out which revisions are affected below.
+                raise _RangeVerifyFailed()
+            state[0] = revnum + 1
+            now = time.time()
+            self._report(revnum, error, now - state[1])
+            state[1] = now
+
+        kwargs = {"progress_func": verified}
+        if api_version() >= (1, 9):
+            kwargs["error_func"] = failed
+        try:
+            repo.verify_fs(None, start_rev, end_rev, **kwargs)
+        except (SubversionException, _RangeVerifyFailed):
+            pass
+        else:
+            return
+        # A failure can not always be attributed to a single revision, so
+        # verify the remaining revisions one at a time.
+        for revnum in range(state[0], end_rev + 1):
+            start = time.time()
+            try:
+                repo.verify_fs(None, revnum, revnum)
+            except SubversionException as e:
+                self._report(revnum, e, time.time() - start)
+            else:
+                self._report(revnum, None, time.time() - start)
+
+    def _worker(self):
+        try:
+            repo = Repository(self.path)
+            while self.error is None:
+                try:
+                    (start_rev, end_rev) = self.queue.get_nowait()
+                except queue.Empty:
+                    return
+                self._verify_range(repo, start_rev, end_rev)
+        except BaseException as e:
+            with self.lock:
+                if self.error is None:
+                    self.error = e
+
+    def run(self):
+        start = time.time()
+        threads = []
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker)
+            t.daemon = True
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+        if self.error is not None:
+            raise self.error
+        self.result.elapsed = time.time() - start
+        return self.result
+
+
+def parallel_verify(path, start_rev=0, end_rev=-1, workers=4,
+                    chunk_size=1000, progress=None):
+    """Verify a local repository using several threads at once.
+
+    The revision range is split into chunks of chunk_size revisions, which
+    are verified by worker threads that each have their own Repository
+    handle. Verification runs with the GIL released, so it scales with the
+    number of cores. Unlike ``Repository.verify_fs``, verification carries
+    on after a revision fails. With Subversion older than 1.9, the rest of
+    a chunk is then verified one revision at a time.
+
+    Requires Subversion 1.7 or later.
+
+    :param path: Path to the repository
+    :param start_rev: First revision to verify
+    :param end_rev: Last revision to verify, -1 for the youngest revision
+    :param workers: Number of threads to use
+    :param chunk_size: Number of revisions to hand to a worker at a time
+    :param progress: Optional callback, called as
+        progress(revnum, error, elapsed) once for every revision. error is
+        None if the revision passed verification, elapsed is the time it
+        took in seconds.
+    :return: `VerifyResult`
+    """
+    if workers < 1:
+        raise ValueError("workers should be at least 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size should be at least 1")
+    if end_rev == -1:
+        end_rev = Repository(path).fs().youngest_revision()
+    if start_rev < 0 or start_rev > end_rev:
+        raise ValueError("Invalid revision range %d:%d" % (start_rev, end_rev))
+    verifier = _ParallelVerifier(path, start_rev, end_rev, workers,
+                                 chunk_size, progress)
+    return verifier.run()
@@ -19,8 +19,12 @@ __author__ = "Jelmer Vernooij <jelmer@jelmer.uk>"
 __docformat__ = "restructuredText"
 
 
+from array import array
 import bisect
 import calendar
+from collections import OrderedDict, namedtuple
+import re
+import threading
 import time
 try:
     import urlparse
@@ -72,62 +76,232 @@ def time_from_cstring(text):
     return (int(calendar.timegm(tm)) * 1000000 + tm_usec)
 
 
-def parse_externals_description(base_url, val):
+class _LRUCache(object):
+    """Small thread-safe cache that discards the least recently used item."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return None
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            if len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class ExternalDefinition(namedtuple(
+        "ExternalDefinition", ["path", "url", "revision", "peg_revision"])):
+    """A single item from an svn:externals property.
+
+    :ivar path: Local path of the external, relative to the directory on
+        which the property is set
+    :ivar url: Absolute URL of the external, without peg revision
+    :ivar revision: Operative revision (from -r), or None for HEAD
+    :ivar peg_revision: Peg revision (from URL@REV), or None for HEAD
+    """
+
+    __slots__ = ()
+
+
+# A token is either a quoted string or a run of non-whitespace characters,
+# in which a backslash escapes the next character.
+_EXTERNALS_TOKEN_RE = re.compile(
+    r'"((?:[^"\\]|\\.)*)"|\'((?:[^\'\\]|\\.)*)\'|((?:[^\s\\]|\\.)+)')
+_EXTERNALS_UNESCAPE_RE = re.compile(r"\\(.)")
+_EXTERNALS_PEG_RE = re.compile(r"(.*)@(\d+|HEAD|\{.*\})$", re.IGNORECASE)
+_EXTERNALS_CACHE_SIZE = 1024
+_externals_cache = _LRUCache(_EXTERNALS_CACHE_SIZE)
+
+
+def _is_external_url(text):
+    return ("://" in text or text.startswith("^/") or text.startswith("/") or
+            text.startswith("../"))
+
+
+def _tokenize_externals_line(line):
+    ret = []
+    for (double, single, bare) in _EXTERNALS_TOKEN_RE.findall(line):
+        token = double or single or bare
+        if "\\" in token:
+            token = _EXTERNALS_UNESCAPE_RE.sub(r"\1", token)
+        ret.append(token)
+    return ret
+
+
+def _parse_external_revision(text):
+    if text.upper() == "HEAD":
+        return None
+    if text.startswith("{"):
+        raise InvalidExternalsDescription(
+            "date revisions are not supported: %s" % text)
+    try:
+        return int(text)
+    except ValueError:
+        raise InvalidExternalsDescription("invalid revision: %s" % text)
+
+
+def _resolve_external_url(base_url, repos_root_url, url):
+    if url.startswith("^/"):
+        if repos_root_url is None:
+            raise ValueError(
+                "repository root URL required for %r" % url)
+        return urlparse.urljoin(repos_root_url.rstrip("/") + "/", url[2:])
+    if url.startswith("//"):
+        return urlparse.urlsplit(base_url).scheme + ":" + url
+    return urlparse.urljoin(base_url + "/", url)
+
+
+def _parse_externals_line(base_url, repos_root_url, line):
+    tokens = _tokenize_externals_line(line)
+    revision = None
+    args = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "-r":
+            if i + 1 == len(tokens):
+                raise InvalidExternalsDescription()
+            revision = _parse_external_revision(tokens[i + 1])
+            i += 2
+            continue
+        if token.startswith("-r"):
+            revision = _parse_external_revision(token[2:])
+        else:
+            args.append(token)
+        i += 1
+    if len(args) != 2:
+        raise InvalidExternalsDescription()
+    if _is_external_url(args[0]):
+        # Subversion 1.5 and later: [-r REV] URL[@PEG] PATH
+        (url, path) = args
+    else:
+        # Older format: PATH [-r REV] URL
+        (path, url) = args
+    m = _EXTERNALS_PEG_RE.match(url)
+    if m is not None:
+        url = m.group(1)
+        peg_revision = _parse_external_revision(m.group(2))
+    else:
+        peg_revision = None
+    return ExternalDefinition(
+        path, _resolve_external_url(base_url, repos_root_url, url),
+        revision, peg_revision)
+
+
+def parse_externals(base_url, val, repos_root_url=None):
+    """Parse an svn:externals property value.
+
+    Both the pre-1.5 and the current syntax are supported, including peg
+    revisions, quoting and URLs relative to the directory (``../``), the
+    repository root (``^/``), the scheme (``//``) and the server root
+    (``/``). Results are cached, since the same definitions tend to be set
+    on many directories.
+
+    :param base_url: URL on which the property is set. Used for
+        relative externals.
+    :param val: Property value
+    :param repos_root_url: Repository root URL, used for ``^/`` externals
+    :return: Tuple of `ExternalDefinition` objects, in the order in which
+        they appear in the property
+    """
+    key = (base_url, repos_root_url, val)
+    ret = _externals_cache.get(key)
+    if ret is not None:
+        return ret
+    ret = tuple(
+        _parse_externals_line(base_url, repos_root_url, line)
+        for line in val.splitlines()
+        if line.strip() and not line.lstrip().startswith("#"))
+    _externals_cache.set(key, ret)
+    return ret
+
+
+def parse_externals_description(base_url, val, repos_root_url=None):
     """Parse an svn:externals property value.
 
     :param base_url: URL on which the property is set. Used for
         relative externals.
+    :param repos_root_url: Repository root URL, used for ``^/`` externals
 
     :returns: dictionary with local names as keys, (revnum, url)
               as value. revnum is the revision number and is
               set to None if not applicable.
     """
-    def is_url(u):
-        return ("://" in u)
     ret = {}
-    for line in val.splitlines():
-        if line == "" or line[0] == "#":
-            continue
-        pts = line.rsplit(None, 3)
-        if len(pts) == 4:
-            if pts[0] == "-r":  # -r X URL DIR
-                revno = int(pts[1])
-                path = pts[3]
-                relurl = pts[2]
-            elif pts[1] == "-r":  # DIR -r X URL
-                revno = int(pts[2])
-                path = pts[0]
-                relurl = pts[3]
-            else:
-                raise InvalidExternalsDescription()
-        elif len(pts) == 3:
-            if pts[1].startswith("-r"):  # DIR -rX URL
-                revno = int(pts[1][2:])
-                path = pts[0]
-                relurl = pts[2]
-            elif pts[0].startswith("-r"):  # -rX URL DIR
-                revno = int(pts[0][2:])
-                path = pts[2]
-                relurl = pts[1]
-            else:
-                raise InvalidExternalsDescription()
-        elif len(pts) == 2:
-            if not is_url(pts[0]):
-                relurl = pts[1]
-                path = pts[0]
-            else:
-                relurl = pts[0]
-                path = pts[1]
-            revno = None
+    for item in parse_externals(base_url, val, repos_root_url):
+        if item.revision is not None:
+            revnum = item.revision
         else:
-            raise InvalidExternalsDescription()
-        if relurl.startswith("//"):
-            raise NotImplementedError(
-                "Relative to the scheme externals not yet supported")
-        if relurl.startswith("^/"):
-            raise NotImplementedError(
-                "Relative to the repository root externals not yet supported")
-        ret[path] = (revno, urlparse.urljoin(base_url+"/", relurl))
+            revnum = item.peg_revision
+        ret[item.path] = (revnum, item.url)
+    return ret
+
+
+_MERGEINFO_RANGES_RE = re.compile(r"\d+(?:-\d+)?\*?(?:,\d+(?:-\d+)?\*?)*$")
+
+_MERGEINFO_CACHE_SIZE = 256
+_mergeinfo_cache = _LRUCache(_MERGEINFO_CACHE_SIZE)
+
+
+def _parse_ranges(text):
+    """Parse a comma-separated list of revision ranges.
+
+    :return: List of (start, end, inheritable) tuples
+    """
+    if not _MERGEINFO_RANGES_RE.match(text):
+        raise ValueError("invalid range list %r" % text)
+    ret = []
+    append = ret.append
+    # The whole list has been validated already, so there is no need for
+    # further error checking here.
+    for r in text.split(","):
+        if r[-1] == "*":
+            inheritable = False
+            r = r[:-1]
+        else:
+            inheritable = True
+        (start, sep, end) = r.partition("-")
+        start = int(start)
+        if sep:
+            append((start, int(end), inheritable))
+        else:
+            append((start, start, inheritable))
+    return ret
+
+
+def _parse_mergeinfo(text):
+    """Parse a mergeinfo property into a tuple of (path, ranges) pairs.
+
+    Results are cached, since the same mergeinfo is often set on many paths.
+    """
+    ret = _mergeinfo_cache.get(text)
+    if ret is not None:
+        return ret
+    ret = []
+    for line in text.splitlines():
+        if not line:
+            continue
+        (path, ranges) = line.rsplit(":", 1)
+        if not path.startswith("/"):
+            raise ValueError("invalid mergeinfo path %r" % path)
+        ret.append((path, tuple(_parse_ranges(ranges))))
+    ret = tuple(ret)
+    _mergeinfo_cache.set(text, ret)
     return ret
 
 
@@ -136,24 +310,20 @@ def parse_mergeinfo_property(text):
 
     :param text: Property contents
     """
-    ret = {}
-    for line in text.splitlines():
-        (path, ranges) = line.rsplit(":", 1)
-        assert path.startswith("/")
-        ret[path] = []
-        for range in ranges.split(","):
-            if range[-1] == "*":
-                inheritable = False
-                range = range[:-1]
-            else:
-                inheritable = True
-            try:
-                (start, end) = range.split("-", 1)
-                ret[path].append((int(start), int(end), inheritable))
-            except ValueError:
-                ret[path].append((int(range), int(range), inheritable))
+    return dict((path, list(ranges))
+                for (path, ranges) in _parse_mergeinfo(text))
 
-    return ret
+
+def _format_range(range_params):
+    (start, end, inheritable) = range_params
+    if inheritable:
+        suffix = ""
+    else:
+        suffix = "*"
+    if start == end:
+        return "%d%s" % (start, suffix)
+    else:
+        return "%d-%d%s" % (start, end, suffix)
 
 
 def generate_mergeinfo_property(merges):
@@ -162,20 +332,12 @@ def generate_mergeinfo_property(merges):
     :param merges: dictionary mapping paths to lists of ranges
     :return: Property contents
     """
-    def formatrange(range_params):
-        (start, end, inheritable) = range_params
-        suffix = ""
-        if not inheritable:
-            suffix = "*"
-        if start == end:
-            return "%d%s" % (start, suffix)
-        else:
-            return "%d-%d%s" % (start, end, suffix)
-    text = ""
+    lines = []
     for (path, ranges) in merges.items():
         assert path.startswith("/")
-        text += "%s:%s\n" % (path, ",".join(map(formatrange, ranges)))
-    return text
+        lines.append("%s:%s\n" % (
+            path, ",".join(map(_format_range, ranges))))
+    return "".join(lines)
 
 
 def range_includes_revnum(ranges, revnum):
@@ -255,6 +417,272 @@ def mergeinfo_add_revision(mergeinfo, path, revnum):
     return mergeinfo
 
 
+def _union_state(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a or b
+
+
+def _intersect_state(a, b):
+    if a is None or b is None:
+        return None
+    return a and b
+
+
+def _remove_state(a, b):
+    if b is not None:
+        return None
+    return a
+
+
+class RangeList(object):
+    """Sorted list of revision ranges, as used in mergeinfo.
+
+    Ranges are inclusive (start, end, inheritable) tuples. The ranges are
+    kept in parallel arrays, disjoint and with adjacent ranges with the same
+    inheritability merged, so that set operations are a single sweep over
+    both lists.
+    """
+
+    __slots__ = ('_starts', '_ends', '_inheritable')
+
+    def __init__(self, ranges=()):
+        self._starts = array('l')
+        self._ends = array('l')
+        self._inheritable = array('b')
+        ranges = list(ranges)
+        last = None
+        for (start, end, inheritable) in ranges:
+            if start > end or (last is not None and start <= last):
+                # Unsorted or overlapping
+                break
+            self._append(start, end, bool(inheritable))
+            last = end
+        else:
+            return
+        self.__init__()
+        _fold(self, ranges)
+
+    def _append(self, start, end, inheritable):
+        if (self._ends and self._ends[-1] == start - 1 and
+                bool(self._inheritable[-1]) == inheritable):
+            self._ends[-1] = end
+        else:
+            self._starts.append(start)
+            self._ends.append(end)
+            self._inheritable.append(inheritable)
+
+    @classmethod
+    def parse(cls, text):
+        """Parse a range list as used in svn:mergeinfo, e.g. "1-5,7*"."""
+        return cls(_parse_ranges(text))
+
+    def __str__(self):
+        return ",".join(map(_format_range, self))
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, list(self))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        for (start, end, inheritable) in zip(
+                self._starts, self._ends, self._inheritable):
+            yield (start, end, bool(inheritable))
+
+    def __eq__(self, other):
+        if isinstance(other, RangeList):
+            return (self._starts == other._starts and
+                    self._ends == other._ends and
+                    self._inheritable == other._inheritable)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        ret = self.__eq__(other)
+        if ret is NotImplemented:
+            return ret
+        return not ret
+
+    __hash__ = None
+
+    def __contains__(self, revnum):
+        i = bisect.bisect_right(self._starts, revnum)
+        return i > 0 and self._ends[i - 1] >= revnum
+
+    def revision_count(self):
+        """Return the number of revisions in the range list."""
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def union(self, other):
+        """Return the revisions that are in either range list.
+
+        Revisions that are inheritable in either list are inheritable in
+        the result.
+        """
+        return _combine(self, other, _union_state)
+
+    def intersect(self, other):
+        """Return the revisions that are in both range lists.
+
+        Revisions are only inheritable in the result if they are
+        inheritable in both lists.
+        """
+        return _combine(self, other, _intersect_state)
+
+    def remove(self, other):
+        """Return the revisions that are not in the other range list."""
+        return _combine(self, other, _remove_state)
+
+    def inheritable(self):
+        """Return only the inheritable ranges."""
+        return RangeList(r for r in self if r[2])
+
+    __or__ = union
+    __and__ = intersect
+    __sub__ = remove
+
+
+def _fold(ret, ranges):
+    """Add arbitrary, possibly overlapping ranges to an empty range list."""
+    events = {}
+    for (start, end, inheritable) in ranges:
+        if start > end:
+            raise ValueError("invalid range %d-%d" % (start, end))
+        events.setdefault(start, []).append((1, inheritable))
+        events.setdefault(end + 1, []).append((-1, inheritable))
+    counts = [0, 0]
+    points = sorted(events)
+    for (lo, hi) in zip(points, points[1:]):
+        for (delta, inheritable) in events[lo]:
+            counts[bool(inheritable)] += delta
+        if counts[True]:
+            ret._append(lo, hi - 1, True)
+        elif counts[False]:
+            ret._append(lo, hi - 1, False)
+
+
+def _combine(a, b, fn):
+    """Combine two range lists by sweeping over their boundaries.
+
+    :param fn: Function that determines the state of a revision in the
+        result (None, False or True) from its states in a and b
+    """
+    ret = RangeList()
+    points = set(a._starts)
+    points.update(e + 1 for e in a._ends)
+    points.update(b._starts)
+    points.update(e + 1 for e in b._ends)
+    points = sorted(points)
+    ia = ib = 0
+    na = len(a._starts)
+    nb = len(b._starts)
+    for (lo, hi) in zip(points, points[1:]):
+        while ia < na and a._ends[ia] < lo:
+            ia += 1
+        while ib < nb and b._ends[ib] < lo:
+            ib += 1
+        if ia < na and a._starts[ia] <= lo:
+            sa = bool(a._inheritable[ia])
+        else:
+            sa = None
+        if ib < nb and b._starts[ib] <= lo:
+            sb = bool(b._inheritable[ib])
+        else:
+            sb = None
+        state = fn(sa, sb)
+        if state is not None:
+            ret._append(lo, hi - 1, state)
+    return ret
+
+
+class Mergeinfo(dict):
+    """Mergeinfo, mapping merge source paths to `RangeList` objects."""
+
+    @classmethod
+    def parse(cls, text):
+        """Parse the contents of a svn:mergeinfo property."""
+        ret = cls()
+        for (path, ranges) in _parse_mergeinfo(text):
+            if path in ret:
+                ret[path] = ret[path].union(RangeList(ranges))
+            else:
+                ret[path] = RangeList(ranges)
+        return ret
+
+    @classmethod
+    def from_dict(cls, merges):
+        """Create from a dictionary mapping paths to lists of ranges."""
+        return cls((path, RangeList(ranges))
+                   for (path, ranges) in merges.items())
+
+    def to_dict(self):
+        """Convert to a dictionary mapping paths to lists of ranges."""
+        return dict((path, list(ranges)) for (path, ranges) in self.items())
+
+    def __str__(self):
+        return "".join("%s:%s\n" % (path, self[path])
+                       for path in sorted(self) if len(self[path]))
+
+    def _combine(self, other, op, keep_missing):
+        ret = Mergeinfo()
+        for (path, ranges) in self.items():
+            if path in other:
+                ranges = op(ranges, other[path])
+            elif not keep_missing:
+                continue
+            if len(ranges):
+                ret[path] = ranges
+        return ret
+
+    def union(self, other):
+        ret = self._combine(other, RangeList.union, True)
+        for (path, ranges) in other.items():
+            if path not in ret and len(ranges):
+                ret[path] = ranges
+        return ret
+
+    def intersect(self, other):
+        return self._combine(other, RangeList.intersect, False)
+
+    def remove(self, other):
+        return self._combine(other, RangeList.remove, True)
+
+    def inherit(self, relpath):
+        """Return the mergeinfo that a child path inherits.
+
+        :param relpath: Path of the child relative to the path on which
+            this mergeinfo is set
+        """
+        ret = Mergeinfo()
+        relpath = relpath.strip("/")
+        for (path, ranges) in self.items():
+            ranges = ranges.inheritable()
+            if not len(ranges):
+                continue
+            if relpath:
+                path = path.rstrip("/") + "/" + relpath
+            ret[path] = ranges
+        return ret
+
+    def elides_to(self, parent, relpath):
+        """Check whether this mergeinfo is redundant given a parent's.
+
+        :param parent: Mergeinfo set on an ancestor
+        :param relpath: Path relative to the ancestor
+        :return: True if this mergeinfo equals what would be inherited
+        """
+        return dict(self) == dict(parent.inherit(relpath))
+
+    __or__ = union
+    __and__ = intersect
+    __sub__ = remove
+
+
 PROP_EXECUTABLE = 'svn:executable'
 PROP_EXECUTABLE_VALUE = '*'
 PROP_EXTERNALS = 'svn:externals'
@@ -422,19 +422,87 @@ def mark_busy(unbound):
     return convert
 
 
+class Dirent(object):
+    """Directory entry as returned by the server.
+
+    Can also be used as a read-only mapping, with the keys used on the wire
+    ("name", "kind", "size", "has-props", "created-rev", "created-date" and
+    "last-author").
+    """
+
+    __slots__ = ('name', 'kind', 'size', 'has_props', 'created_rev',
+                 'created_date', 'last_author')
+
+    _keys = (('name', 'name'), ('kind', 'kind'), ('size', 'size'),
+             ('has-props', 'has_props'), ('created-rev', 'created_rev'),
+             ('created-date', 'created_date'),
+             ('last-author', 'last_author'))
+
+    def __init__(self, name, kind, size, has_props, created_rev,
+                 created_date=None, last_author=None):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.has_props = has_props
+        self.created_rev = created_rev
+        self.created_date = created_date
+        self.last_author = last_author
+
+    def keys(self):
+        return [key for (key, attr) in self._keys
+                if getattr(self, attr) is not None]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        for (k, attr) in self._keys:
+            if k == key:
+                value = getattr(self, attr)
+                if value is not None:
+                    return value
+                break
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (dict, Dirent)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        ret = self.__eq__(other)
+        if ret is NotImplemented:
+            return ret
+        return not ret
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, dict(self.items()))
+
+
 def unmarshall_dirent(d):
-    ret = {
-        "name": d[0],
-        "kind": d[1],
-        "size": d[2],
-        "has-props": bool(d[3]),
-        "created-rev": d[4],
-        }
-    if d[5] != []:
-        ret["created-date"] = d[5]
-    if d[6] != []:
-        ret["last-author"] = d[6]
-    return ret
+    return Dirent(d[0], d[1], d[2], bool(d[3]), d[4],
+                  d[5] if d[5] != [] else None,
+                  d[6] if d[6] != [] else None)
 
 
 class SVNClient(SVNConnection):
@@ -19,13 +19,19 @@
 #include <stdbool.h>
 #include <Python.h>
 #include <apr_general.h>
+#include <svn_delta.h>
 #include <svn_fs.h>
 #include <svn_path.h>
 #include <svn_repos.h>
 #include <apr_md5.h>
 
+#include "editor.h"
 #include "util.h"
 
+#if ONLY_SINCE_SVN(1, 7)
+#include <svn_cache_config.h>
+#endif
+
 extern PyTypeObject FileSystemRoot_Type;
 extern PyTypeObject Repository_Type;
 extern PyTypeObject FileSystem_Type;
@@ -92,6 +98,36 @@ static void repos_dealloc(PyObject *self)
 	PyObject_Del(repos);
 }
 
+#if ONLY_SINCE_SVN(1, 7)
+/* Caching options for libsvn_fs, as set by set_cache_config(). -1 means
+ * that the library default is used. */
+static int cache_fulltexts = -1;
+static int cache_txdeltas = -1;
+static int cache_revprops = -1;
+
+static apr_hash_t *fs_cache_config(apr_pool_t *pool)
+{
+	apr_hash_t *fs_config;
+
+	if (cache_fulltexts == -1 && cache_txdeltas == -1 && cache_revprops == -1)
+		return NULL;
+
+	fs_config = apr_hash_make(pool);
+	if (cache_fulltexts != -1)
+		apr_hash_set(fs_config, SVN_FS_CONFIG_FSFS_CACHE_FULLTEXTS,
+					 APR_HASH_KEY_STRING, cache_fulltexts?"1":"0");
+	if (cache_txdeltas != -1)
+		apr_hash_set(fs_config, SVN_FS_CONFIG_FSFS_CACHE_DELTAS,
+					 APR_HASH_KEY_STRING, cache_txdeltas?"1":"0");
+#if ONLY_SINCE_SVN(1, 8)
+	if (cache_revprops != -1)
+		apr_hash_set(fs_config, SVN_FS_CONFIG_FSFS_CACHE_REVPROPS,
+					 APR_HASH_KEY_STRING, cache_revprops?"1":"0");
+#endif
+	return fs_config;
+}
+#endif
+
 static PyObject *repos_init(PyTypeObject *type, PyObject *args, PyObject *kwargs)
 {
 	const char *path;
@@ -99,6 +135,9 @@ static PyObject *repos_init(PyTypeObject *type, PyObject *args, PyObject *kwargs
 	svn_error_t *err;
 	RepositoryObject *ret;
 	PyObject *py_path;
+#if ONLY_SINCE_SVN(1, 7)
+	apr_hash_t *fs_config;
+#endif
 
 	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O", kwnames, &py_path))
 		return NULL;
@@ -119,9 +158,16 @@ static PyObject *repos_init(PyTypeObject *type, PyObject *args, PyObject *kwargs
 		return NULL;
 	}
 
+#if ONLY_SINCE_SVN(1, 7)
+	fs_config = fs_cache_config(ret->pool);
+	Py_BEGIN_ALLOW_THREADS
+	err = svn_repos_open2(&ret->repos, path, fs_config, ret->pool);
+	Py_END_ALLOW_THREADS
+#else
 	Py_BEGIN_ALLOW_THREADS
 	err = svn_repos_open(&ret->repos, path, ret->pool);
 	Py_END_ALLOW_THREADS
+#endif
 
 	if (err != NULL) {
 		handle_svn_error(err);
@@ -137,12 +183,25 @@ typedef struct {
 	PyObject_VAR_HEAD
 	apr_pool_t *pool;
 	svn_fs_root_t *root;
+	svn_revnum_t revnum;
+	/* Memoised node information, or NULL if disabled */
+	PyObject *node_cache;
+	int node_cache_max;
+	unsigned long node_cache_hits, node_cache_misses;
 } FileSystemRootObject;
 
+#define DEFAULT_ROOT_CACHE_SIZE 16
+#define DEFAULT_NODE_CACHE_SIZE 1024
+
 typedef struct {
 	PyObject_VAR_HEAD
 	RepositoryObject *repos;
 	svn_fs_t *fs;
+	/* Recently used revision roots, most recently used first */
+	FileSystemRootObject **roots;
+	int roots_len, roots_max;
+	int node_cache_max;
+	unsigned long root_cache_hits, root_cache_misses;
 } FileSystemObject;
 
 static PyObject *repos_fs(PyObject *self)
@@ -165,6 +224,19 @@ static PyObject *repos_fs(PyObject *self)
 	ret->fs = fs;
 	ret->repos = reposobj;
 	Py_INCREF(reposobj);
+	/* fs_dealloc has to cope with a failed allocation below. */
+	ret->roots = NULL;
+	ret->roots_len = 0;
+	ret->roots_max = 0;
+	ret->node_cache_max = DEFAULT_NODE_CACHE_SIZE;
+	ret->root_cache_hits = 0;
+	ret->root_cache_misses = 0;
+	ret->roots = calloc(DEFAULT_ROOT_CACHE_SIZE, sizeof(FileSystemRootObject *));
+	if (ret->roots == NULL) {
+		Py_DECREF(ret);
+		return PyErr_NoMemory();
+	}
+	ret->roots_max = DEFAULT_ROOT_CACHE_SIZE;
 
 	return (PyObject *)ret;
 }
@@ -208,10 +280,24 @@ static PyObject *fs_get_revision_root(FileSystemObject *self, PyObject *args)
 	FileSystemRootObject *ret;
 	apr_pool_t *pool;
 	svn_fs_root_t *root;
+	int i;
 
 	if (!PyArg_ParseTuple(args, "l", &rev))
 		return NULL;
 
+	for (i = 0; i < self->roots_len; i++) {
+		if (self->roots[i]->revnum == rev) {
+			ret = self->roots[i];
+			memmove(&self->roots[1], &self->roots[0],
+					i * sizeof(FileSystemRootObject *));
+			self->roots[0] = ret;
+			self->root_cache_hits++;
+			Py_INCREF(ret);
+			return (PyObject *)ret;
+		}
+	}
+	self->root_cache_misses++;
+
 	pool = Pool(NULL);
 	if (pool == NULL)
 		return NULL;
@@ -219,15 +305,94 @@ static PyObject *fs_get_revision_root(FileSystemObject *self, PyObject *args)
 	RUN_SVN_WITH_POOL(pool, svn_fs_revision_root(&root, self->fs, rev, pool));
 
 	ret = PyObject_New(FileSystemRootObject, &FileSystemRoot_Type);
-	if (ret == NULL)
+	if (ret == NULL) {
+		apr_pool_destroy(pool);
 		return NULL;
+	}
 
 	ret->root = root;
 	ret->pool = pool;
+	ret->revnum = rev;
+	ret->node_cache_max = self->node_cache_max;
+	ret->node_cache_hits = 0;
+	ret->node_cache_misses = 0;
+	ret->node_cache = NULL;
+	if (ret->node_cache_max > 0) {
+		ret->node_cache = PyDict_New();
+		if (ret->node_cache == NULL) {
+			Py_DECREF(ret);
+			return NULL;
+		}
+	}
+
+	if (self->roots_max > 0) {
+		if (self->roots_len == self->roots_max) {
+			self->roots_len--;
+			Py_DECREF(self->roots[self->roots_len]);
+		}
+		memmove(&self->roots[1], &self->roots[0],
+				self->roots_len * sizeof(FileSystemRootObject *));
+		self->roots[0] = ret;
+		self->roots_len++;
+		Py_INCREF(ret);
+	}
 
 	return (PyObject *)ret;
 }
 
+static void fs_clear_root_cache(FileSystemObject *self)
+{
+	while (self->roots_len > 0) {
+		self->roots_len--;
+		Py_DECREF(self->roots[self->roots_len]);
+	}
+}
+
+static PyObject *fs_set_root_cache_size(FileSystemObject *self, PyObject *args,
+										PyObject *kwargs)
+{
+	char *kwnames[] = { "size", "node_cache_size", NULL };
+	int size, node_cache_size = DEFAULT_NODE_CACHE_SIZE;
+	FileSystemRootObject **roots;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "i|i:set_root_cache_size",
+									 kwnames, &size, &node_cache_size))
+		return NULL;
+
+	if (size < 0 || node_cache_size < 0) {
+		PyErr_SetString(PyExc_ValueError, "cache sizes can not be negative");
+		return NULL;
+	}
+
+	/* Roots that are already cached keep their node cache size, so start
+	 * afresh. */
+	fs_clear_root_cache(self);
+	roots = realloc(self->roots, (size + 1) * sizeof(FileSystemRootObject *));
+	if (roots == NULL)
+		return PyErr_NoMemory();
+	self->roots = roots;
+	self->roots_max = size;
+	self->node_cache_max = node_cache_size;
+
+	Py_RETURN_NONE;
+}
+
+static PyObject *fs_root_cache_clear(FileSystemObject *self)
+{
+	fs_clear_root_cache(self);
+	Py_RETURN_NONE;
+}
+
+static PyObject *fs_root_cache_info(FileSystemObject *self)
+{
+	return Py_BuildValue("{s:k,s:k,s:i,s:i,s:i}",
+						 "hits", self->root_cache_hits,
+						 "misses", self->root_cache_misses,
+						 "size", self->roots_len,
+						 "max_size", self->roots_max,
+						 "node_cache_size", self->node_cache_max);
+}
+
 static PyObject *fs_get_revision_proplist(FileSystemObject *self, PyObject *args)
 {
 	svn_revnum_t rev;
@@ -244,7 +409,7 @@ static PyObject *fs_get_revision_proplist(FileSystemObject *self, PyObject *args
 
 	RUN_SVN_WITH_POOL(temp_pool, svn_fs_revision_proplist(&props, self->fs, rev, temp_pool));
 
-	ret = prop_hash_to_dict(props);
+	ret = prop_hash_to_dict(props, temp_pool);
 
 	apr_pool_destroy(temp_pool);
 
@@ -256,12 +421,28 @@ static PyMethodDef fs_methods[] = {
 	{ "youngest_revision", (PyCFunction)fs_get_youngest_revision, METH_NOARGS, NULL },
 	{ "revision_root", (PyCFunction)fs_get_revision_root, METH_VARARGS, NULL },
 	{ "revision_proplist", (PyCFunction)fs_get_revision_proplist, METH_VARARGS, NULL },
+	{ "set_root_cache_size", (PyCFunction)fs_set_root_cache_size,
+		METH_VARARGS|METH_KEYWORDS,
+		"S.set_root_cache_size(size, node_cache_size=1024)\n"
+		"Set the number of revision roots that are kept around for reuse by\n"
+		"revision_root(), and the number of is_dir, file_length,\n"
+		"file_checksum and proplist results each new root memoises.\n"
+		"A size of 0 disables the respective cache. Cached roots are dropped." },
+	{ "clear_root_cache", (PyCFunction)fs_root_cache_clear, METH_NOARGS,
+		"S.clear_root_cache()\n"
+		"Drop all cached revision roots." },
+	{ "root_cache_info", (PyCFunction)fs_root_cache_info, METH_NOARGS,
+		"S.root_cache_info() -> dict\n"
+		"Return the hits, misses, size and max_size of the revision root\n"
+		"cache, and the node_cache_size for new roots." },
 	{ NULL, }
 };
 
 static void fs_dealloc(PyObject *self)
 {
 	FileSystemObject *fsobj = (FileSystemObject *)self;
+	fs_clear_root_cache(fsobj);
+	free(fsobj->roots);
 	Py_DECREF(fsobj->repos);
 	PyObject_DEL(fsobj);
 }
@@ -327,22 +508,120 @@ PyTypeObject FileSystem_Type = {
 
 };
 
+/* Defined next to dump_fs below. */
+static svn_stream_t *counting_stream(svn_stream_t *inner, apr_uint64_t *bytes, apr_pool_t *pool);
+
+typedef struct {
+	PyObject *progress_func;
+	svn_stream_t *feedback;
+	apr_uint64_t bytes;
+	apr_time_t start;
+	int nodes;
+} LoadBaton;
+
+#if ONLY_SINCE_SVN(1, 8)
+/* Write the feedback that svn_repos_load_fs2 would have written. */
+static svn_error_t *load_feedback(svn_stream_t *feedback,
+								  const svn_repos_notify_t *notify,
+								  apr_pool_t *pool)
+{
+	switch (notify->action) {
+		case svn_repos_notify_load_txn_start:
+			return svn_stream_printf(feedback, pool,
+				"<<< Started new transaction, based on original revision %ld\n",
+				notify->old_revision);
+		case svn_repos_notify_load_node_start:
+			switch (notify->node_action) {
+				case svn_node_action_change:
+					return svn_stream_printf(feedback, pool,
+						"     * editing path : %s ...", notify->path);
+				case svn_node_action_delete:
+					return svn_stream_printf(feedback, pool,
+						"     * deleting path : %s ...", notify->path);
+				case svn_node_action_add:
+					return svn_stream_printf(feedback, pool,
+						"     * adding path : %s ...", notify->path);
+				case svn_node_action_replace:
+					return svn_stream_printf(feedback, pool,
+						"     * replacing path : %s ...", notify->path);
+			}
+			return NULL;
+		case svn_repos_notify_load_node_done:
+			return svn_stream_printf(feedback, pool, " done.\n");
+		case svn_repos_notify_load_txn_committed:
+			if (notify->old_revision == SVN_INVALID_REVNUM ||
+				notify->old_revision == notify->new_revision)
+				return svn_stream_printf(feedback, pool,
+					"\n------- Committed revision %ld >>>\n\n",
+					notify->new_revision);
+			return svn_stream_printf(feedback, pool,
+				"\n------- Committed new rev %ld (loaded from original rev %ld) >>>\n\n",
+				notify->new_revision, notify->old_revision);
+		default:
+			return NULL;
+	}
+}
+
+static void py_load_notify(void *baton, const svn_repos_notify_t *notify, apr_pool_t *pool)
+{
+	LoadBaton *load = baton;
+	PyGILState_STATE state;
+	PyObject *ret;
+
+	if (load->feedback != NULL) {
+		/* Errors are picked up by the cancel func */
+		svn_error_clear(load_feedback(load->feedback, notify, pool));
+	}
+
+	switch (notify->action) {
+		case svn_repos_notify_load_txn_start:
+			load->nodes = 0;
+			return;
+		case svn_repos_notify_load_node_start:
+			load->nodes++;
+			return;
+		case svn_repos_notify_load_txn_committed:
+			break;
+		default:
+			return;
+	}
+
+	state = PyGILState_Ensure();
+	if (PyErr_Occurred()) {
+		/* An earlier callback failed; the operation is being aborted. */
+		PyGILState_Release(state);
+		return;
+	}
+	ret = PyObject_CallFunction(load->progress_func, "liKd",
+		notify->new_revision, load->nodes,
+		(unsigned PY_LONG_LONG)load->bytes,
+		(double)(apr_time_now() - load->start) / APR_USEC_PER_SEC);
+	/* If ret was NULL, the cancel func should abort the operation. */
+	Py_XDECREF(ret);
+	PyGILState_Release(state);
+}
+#endif
+
 static PyObject *repos_load_fs(PyObject *self, PyObject *args, PyObject *kwargs)
 {
 	const char *parent_dir = NULL;
-	PyObject *dumpstream, *feedback_stream;
+	PyObject *dumpstream, *feedback_stream = Py_None;
 	unsigned char use_pre_commit_hook = 0, use_post_commit_hook = 0;
 	char *kwnames[] = { "dumpstream", "feedback_stream", "uuid_action",
 		                "parent_dir", "use_pre_commit_hook",
-						"use_post_commit_hook", NULL };
-	int uuid_action;
+						"use_post_commit_hook", "progress_func", NULL };
+	int uuid_action = svn_repos_load_uuid_default;
 	apr_pool_t *temp_pool;
 	RepositoryObject *reposobj = (RepositoryObject *)self;
+	svn_stream_t *stream, *feedback = NULL;
+	LoadBaton load;
 
-	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOi|zbb", kwnames,
+	load.progress_func = Py_None;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OizbbO:load_fs", kwnames,
 								&dumpstream, &feedback_stream, &uuid_action,
 								&parent_dir, &use_pre_commit_hook,
-								&use_post_commit_hook))
+								&use_post_commit_hook, &load.progress_func))
 		return NULL;
 
 	if (uuid_action != svn_repos_load_uuid_default &&
@@ -352,12 +631,50 @@ static PyObject *repos_load_fs(PyObject *self, PyObject *args, PyObject *kwargs)
 		return NULL;
 	}
 
+#if ONLY_BEFORE_SVN(1, 8)
+	if (load.progress_func != Py_None) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"progress_func is only supported in Subversion >= 1.8");
+		return NULL;
+	}
+#endif
+
 	temp_pool = Pool(NULL);
 	if (temp_pool == NULL)
 		return NULL;
+
+	stream = new_py_input_stream(temp_pool, dumpstream);
+	if (stream == NULL) {
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+
+	if (feedback_stream != Py_None) {
+		feedback = new_py_stream(temp_pool, feedback_stream);
+		if (feedback == NULL) {
+			apr_pool_destroy(temp_pool);
+			return NULL;
+		}
+	}
+
+#if ONLY_SINCE_SVN(1, 8)
+	if (load.progress_func != Py_None) {
+		load.feedback = feedback;
+		load.bytes = 0;
+		stream = counting_stream(stream, &load.bytes, temp_pool);
+		load.start = apr_time_now();
+		load.nodes = 0;
+		RUN_SVN_WITH_POOL(temp_pool, svn_repos_load_fs3(reposobj->repos,
+					stream, uuid_action, parent_dir, use_pre_commit_hook,
+					use_post_commit_hook, FALSE, py_load_notify, &load,
+					py_cancel_check, NULL, temp_pool));
+		apr_pool_destroy(temp_pool);
+		Py_RETURN_NONE;
+	}
+#endif
+
 	RUN_SVN_WITH_POOL(temp_pool, svn_repos_load_fs2(reposobj->repos,
-				new_py_stream(temp_pool, dumpstream),
-				new_py_stream(temp_pool, feedback_stream),
+				stream, feedback,
 				uuid_action, parent_dir, use_pre_commit_hook,
 				use_post_commit_hook, py_cancel_check, NULL,
 				temp_pool));
@@ -383,21 +700,77 @@ static PyObject *repos_delete(PyObject *self, PyObject *args)
 	Py_RETURN_NONE;
 }
 
-static PyObject *repos_hotcopy(RepositoryObject *self, PyObject *args)
+#if ONLY_SINCE_SVN(1, 9)
+static void py_hotcopy_notify(void *baton, const svn_repos_notify_t *notify, apr_pool_t *pool)
+{
+	PyObject *notify_func = baton;
+	PyGILState_STATE state;
+	PyObject *ret;
+
+	if (notify->action != svn_repos_notify_hotcopy_rev_range)
+		return;
+
+	state = PyGILState_Ensure();
+	if (PyErr_Occurred()) {
+		/* An earlier callback failed; the operation is being aborted. */
+		PyGILState_Release(state);
+		return;
+	}
+	ret = PyObject_CallFunction(notify_func, "ll", notify->start_revision,
+								notify->end_revision);
+	/* If ret was NULL, the cancel func should abort the operation. */
+	Py_XDECREF(ret);
+	PyGILState_Release(state);
+}
+#endif
+
+static PyObject *repos_hotcopy(PyObject *self, PyObject *args, PyObject *kwargs)
 {
+	char *kwnames[] = { "src_path", "dest_path", "clean_logs", "incremental",
+		"notify_func", NULL };
 	char *src_path, *dest_path;
-	bool clean_logs = false;
+	bool clean_logs = false, incremental = false;
+	PyObject *notify_func = Py_None;
 	apr_pool_t *temp_pool;
 
-	if (!PyArg_ParseTuple(args, "ss|b", &src_path, &dest_path, &clean_logs))
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ss|bbO:hotcopy", kwnames,
+									 &src_path, &dest_path, &clean_logs,
+									 &incremental, &notify_func))
+		return NULL;
+
+#if ONLY_BEFORE_SVN(1, 8)
+	if (incremental) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"Incremental hotcopy requires Subversion 1.8 or later");
+		return NULL;
+	}
+#endif
+#if ONLY_BEFORE_SVN(1, 9)
+	if (notify_func != Py_None) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"notify_func requires Subversion 1.9 or later");
 		return NULL;
+	}
+#endif
 
 	temp_pool = Pool(NULL);
 	if (temp_pool == NULL)
 		return NULL;
 
+#if ONLY_SINCE_SVN(1, 9)
+	RUN_SVN_WITH_POOL(temp_pool,
+		svn_repos_hotcopy3(src_path, dest_path, clean_logs?TRUE:FALSE,
+			incremental?TRUE:FALSE,
+			(notify_func == Py_None)?NULL:py_hotcopy_notify, notify_func,
+			py_cancel_check, NULL, temp_pool));
+#elif ONLY_SINCE_SVN(1, 8)
+	RUN_SVN_WITH_POOL(temp_pool,
+		svn_repos_hotcopy2(src_path, dest_path, clean_logs?TRUE:FALSE,
+			incremental?TRUE:FALSE, py_cancel_check, NULL, temp_pool));
+#else
 	RUN_SVN_WITH_POOL(temp_pool,
 		svn_repos_hotcopy(src_path, dest_path, clean_logs?TRUE:FALSE, temp_pool));
+#endif
 
 	apr_pool_destroy(temp_pool);
 
@@ -430,6 +803,177 @@ static PyObject *api_version(PyObject *self)
 						 ver->patch, ver->tag);
 }
 
+#if ONLY_SINCE_SVN(1, 7)
+static bool cache_flag_from_object(PyObject *obj, int *flag)
+{
+	int ret;
+
+	if (obj == Py_None)
+		return true;
+	ret = PyObject_IsTrue(obj);
+	if (ret == -1)
+		return false;
+	*flag = ret;
+	return true;
+}
+
+static PyObject *py_cache_flag(int flag)
+{
+	if (flag == -1)
+		Py_RETURN_NONE;
+	return PyBool_FromLong(flag);
+}
+#endif
+
+static PyObject *set_cache_config(PyObject *self, PyObject *args,
+								  PyObject *kwargs)
+{
+#if ONLY_SINCE_SVN(1, 7)
+	char *kwnames[] = { "cache_size", "file_handle_count", "single_threaded",
+		"cache_fulltexts", "cache_txdeltas", "cache_revprops", NULL };
+	PyObject *py_cache_size = Py_None, *py_file_handle_count = Py_None;
+	PyObject *py_single_threaded = Py_None, *py_fulltexts = Py_None;
+	PyObject *py_txdeltas = Py_None, *py_revprops = Py_None;
+	svn_cache_config_t settings;
+	int fulltexts = cache_fulltexts, txdeltas = cache_txdeltas;
+	int revprops = cache_revprops, single_threaded = -1;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|OOOOOO", kwnames,
+									 &py_cache_size, &py_file_handle_count,
+									 &py_single_threaded, &py_fulltexts,
+									 &py_txdeltas, &py_revprops))
+		return NULL;
+
+	settings = *svn_cache_config_get();
+
+	if (py_cache_size != Py_None) {
+		unsigned PY_LONG_LONG cache_size;
+		cache_size = PyLong_AsUnsignedLongLong(py_cache_size);
+		if (cache_size == (unsigned PY_LONG_LONG)-1 && PyErr_Occurred())
+			return NULL;
+		settings.cache_size = cache_size;
+	}
+
+	if (py_file_handle_count != Py_None) {
+		long file_handle_count;
+		file_handle_count = PyLong_AsLong(py_file_handle_count);
+		if (file_handle_count == -1 && PyErr_Occurred())
+			return NULL;
+		if (file_handle_count < 0) {
+			PyErr_SetString(PyExc_ValueError,
+							"file_handle_count can not be negative");
+			return NULL;
+		}
+		settings.file_handle_count = file_handle_count;
+	}
+
+	if (!cache_flag_from_object(py_single_threaded, &single_threaded) ||
+		!cache_flag_from_object(py_fulltexts, &fulltexts) ||
+		!cache_flag_from_object(py_txdeltas, &txdeltas) ||
+		!cache_flag_from_object(py_revprops, &revprops))
+		return NULL;
+
+#if ONLY_BEFORE_SVN(1, 8)
+	if (py_revprops != Py_None) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"cache_revprops requires Subversion 1.8 or later");
+		return NULL;
+	}
+#endif
+
+	if (single_threaded != -1)
+		settings.single_threaded = single_threaded?TRUE:FALSE;
+
+	svn_cache_config_set(&settings);
+	cache_fulltexts = fulltexts;
+	cache_txdeltas = txdeltas;
+	cache_revprops = revprops;
+
+	Py_RETURN_NONE;
+#else
+	PyErr_SetString(PyExc_NotImplementedError,
+					"set_cache_config requires Subversion 1.7 or later");
+	return NULL;
+#endif
+}
+
+static PyObject *get_cache_config(PyObject *self)
+{
+#if ONLY_SINCE_SVN(1, 7)
+	const svn_cache_config_t *settings = svn_cache_config_get();
+
+	return Py_BuildValue("{sKsnsNsNsNsN}",
+						 "cache_size",
+						 (unsigned PY_LONG_LONG)settings->cache_size,
+						 "file_handle_count",
+						 (Py_ssize_t)settings->file_handle_count,
+						 "single_threaded",
+						 PyBool_FromLong(settings->single_threaded),
+						 "cache_fulltexts", py_cache_flag(cache_fulltexts),
+						 "cache_txdeltas", py_cache_flag(cache_txdeltas),
+						 "cache_revprops", py_cache_flag(cache_revprops));
+#else
+	PyErr_SetString(PyExc_NotImplementedError,
+					"get_cache_config requires Subversion 1.7 or later");
+	return NULL;
+#endif
+}
+
+static PyObject *repos_dir_delta(PyObject *self, PyObject *args,
+								 PyObject *kwargs)
+{
+	char *kwnames[] = { "src_root", "src_path", "tgt_root", "tgt_path",
+		"editor", "text_deltas", "depth", "entry_props", "ignore_ancestry",
+		NULL };
+	FileSystemRootObject *src_root, *tgt_root;
+	char *src_path, *tgt_path;
+	PyObject *update_editor;
+	bool text_deltas = true, entry_props = false, ignore_ancestry = false;
+	int depth = svn_depth_infinity;
+	apr_pool_t *temp_pool;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O!sO!sO|bibb:dir_delta",
+									 kwnames, &FileSystemRoot_Type, &src_root,
+									 &src_path, &FileSystemRoot_Type,
+									 &tgt_root, &tgt_path, &update_editor,
+									 &text_deltas, &depth, &entry_props,
+									 &ignore_ancestry))
+		return NULL;
+
+	temp_pool = Pool(NULL);
+	if (temp_pool == NULL)
+		return NULL;
+	/* Only INCREF here, py_editor takes care of the DECREF */
+	Py_INCREF(update_editor);
+#if ONLY_SINCE_SVN(1, 5)
+	RUN_SVN_WITH_POOL(temp_pool,
+					  svn_repos_dir_delta2(src_root->root, src_path, "",
+										   tgt_root->root, tgt_path,
+										   &py_editor, update_editor,
+										   NULL, NULL, text_deltas, depth,
+										   entry_props, ignore_ancestry,
+										   temp_pool));
+#else
+	if (depth != svn_depth_infinity) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"depth != infinity only supported for svn >= 1.5");
+		Py_DECREF(update_editor);
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+	RUN_SVN_WITH_POOL(temp_pool,
+					  svn_repos_dir_delta(src_root->root, src_path, "",
+										  tgt_root->root, tgt_path,
+										  &py_editor, update_editor,
+										  NULL, NULL, text_deltas, TRUE,
+										  entry_props, ignore_ancestry,
+										  temp_pool));
+#endif
+	apr_pool_destroy(temp_pool);
+
+	Py_RETURN_NONE;
+}
+
 static PyMethodDef repos_module_methods[] = {
 	{ "create", (PyCFunction)repos_create, METH_VARARGS,
 		"create(path, config=None, fs_config=None)\n\n"
@@ -437,9 +981,32 @@ static PyMethodDef repos_module_methods[] = {
 	{ "delete", (PyCFunction)repos_delete, METH_VARARGS,
 		"delete(path)\n\n"
 		"Delete a repository." },
-	{ "hotcopy", (PyCFunction)repos_hotcopy, METH_VARARGS,
-		"hotcopy(src_path, dest_path, clean_logs=False)\n\n"
-		"Make a hot copy of a repository." },
+	{ "hotcopy", (PyCFunction)repos_hotcopy, METH_VARARGS|METH_KEYWORDS,
+		"hotcopy(src_path, dest_path, clean_logs=False, incremental=False, "
+		"notify_func=None)\n\n"
+		"Make a hot copy of a repository.\n"
+		"With incremental=True, only data that is missing from an existing\n"
+		"copy at dest_path is copied (Subversion >= 1.8).\n"
+		"notify_func is called as notify_func(start_rev, end_rev) for each\n"
+		"range of revisions that has been copied (Subversion >= 1.9)." },
+	{ "dir_delta", (PyCFunction)repos_dir_delta, METH_VARARGS|METH_KEYWORDS,
+		"dir_delta(src_root, src_path, tgt_root, tgt_path, editor, "
+		"text_deltas=True, depth=DEPTH_INFINITY, entry_props=False, "
+		"ignore_ancestry=False)\n\n"
+		"Send the differences between two trees to an editor." },
+	{ "set_cache_config", (PyCFunction)set_cache_config,
+		METH_VARARGS|METH_KEYWORDS,
+		"set_cache_config(cache_size=None, file_handle_count=None, "
+		"single_threaded=None, cache_fulltexts=None, cache_txdeltas=None, "
+		"cache_revprops=None)\n\n"
+		"Configure the caches used by libsvn_fs. Arguments that are None are\n"
+		"left unchanged. The cache size only takes effect if it is set\n"
+		"before the first repository is opened; the other caching options\n"
+		"apply to repositories opened afterwards." },
+	{ "get_cache_config", (PyCFunction)get_cache_config, METH_NOARGS,
+		"get_cache_config() -> dict\n\n"
+		"Return the current cache configuration. Caching options that have\n"
+		"not been set are None, meaning that the library default is used." },
 	{ "api_version", (PyCFunction)api_version, METH_NOARGS,
 		"api_version() -> (major, minor, patch, tag)\n\n"
 		"Version of libsvn_client Subvertpy was compiled against."
@@ -473,26 +1040,165 @@ static PyObject *repos_has_capability(RepositoryObject *self, PyObject *args)
 #endif
 }
 
-static PyObject *repos_verify(RepositoryObject *self, PyObject *args)
+typedef struct {
+	PyObject *progress_func;
+	PyObject *error_func;
+	svn_stream_t *feedback;
+	apr_time_t last;
+} VerifyBaton;
+
+#if ONLY_SINCE_SVN(1, 9)
+static svn_error_t *py_verify_error(void *baton, svn_revnum_t revision,
+									svn_error_t *verify_err,
+									apr_pool_t *pool)
+{
+	VerifyBaton *verify = baton;
+	PyGILState_STATE state;
+	PyTypeObject *cls;
+	PyObject *args, *exc, *ret;
+
+	state = PyGILState_Ensure();
+	args = PyErr_NewSubversionException(verify_err);
+	if (args == NULL) {
+		PyGILState_Release(state);
+		return py_svn_error();
+	}
+	cls = PyErr_GetSubversionExceptionTypeObject();
+	exc = PyObject_CallObject((PyObject *)cls, args);
+	Py_DECREF(cls);
+	Py_DECREF(args);
+	if (exc == NULL) {
+		PyGILState_Release(state);
+		return py_svn_error();
+	}
+	/* Failures that are not specific to a revision have no revnum. */
+	if (SVN_IS_VALID_REVNUM(revision))
+		ret = PyObject_CallFunction(verify->error_func, "lN", revision, exc);
+	else
+		ret = PyObject_CallFunction(verify->error_func, "ON", Py_None, exc);
+	if (ret == NULL) {
+		/* Stop verifying and let the Python exception propagate. */
+		PyGILState_Release(state);
+		return py_svn_error();
+	}
+	Py_DECREF(ret);
+	PyGILState_Release(state);
+	/* Carry on with the next revision. */
+	return NULL;
+}
+#endif
+
+#if ONLY_SINCE_SVN(1, 7)
+static void py_verify_notify(void *baton, const svn_repos_notify_t *notify, apr_pool_t *pool)
+{
+	VerifyBaton *verify = baton;
+	PyGILState_STATE state;
+	PyObject *ret;
+	apr_time_t now;
+
+	if (notify->action != svn_repos_notify_verify_rev_end)
+		return;
+
+	if (verify->feedback != NULL) {
+		/* Errors are picked up by the cancel func */
+		svn_error_clear(svn_stream_printf(verify->feedback, pool,
+			"* Verified revision %ld.\n", notify->revision));
+	}
+
+	now = apr_time_now();
+	if (verify->progress_func == Py_None) {
+		verify->last = now;
+		return;
+	}
+	state = PyGILState_Ensure();
+	if (PyErr_Occurred()) {
+		/* An earlier callback failed; the operation is being aborted. */
+		PyGILState_Release(state);
+		return;
+	}
+	ret = PyObject_CallFunction(verify->progress_func, "ld",
+		notify->revision,
+		(double)(now - verify->last) / APR_USEC_PER_SEC);
+	/* If ret was NULL, the cancel func should abort the operation. */
+	Py_XDECREF(ret);
+	PyGILState_Release(state);
+	verify->last = now;
+}
+#endif
+
+static PyObject *repos_verify(RepositoryObject *self, PyObject *args, PyObject *kwargs)
 {
+	char *kwnames[] = { "feedback_stream", "start_rev", "end_rev",
+		"progress_func", "error_func", NULL };
 	apr_pool_t *temp_pool;
 	PyObject *py_feedback_stream;
 	svn_revnum_t start_rev, end_rev;
-	svn_stream_t *stream;
-	if (!PyArg_ParseTuple(args, "Oll", &py_feedback_stream, &start_rev, &end_rev))
+	VerifyBaton verify;
+
+	verify.progress_func = Py_None;
+	verify.error_func = Py_None;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "Oll|OO:verify_fs", kwnames,
+									 &py_feedback_stream, &start_rev,
+									 &end_rev, &verify.progress_func,
+									 &verify.error_func))
+		return NULL;
+
+#if ONLY_BEFORE_SVN(1, 9)
+	if (verify.error_func != Py_None) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"error_func requires Subversion 1.9 or later");
+		return NULL;
+	}
+#endif
+
+#if ONLY_BEFORE_SVN(1, 7)
+	if (verify.progress_func != Py_None) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"progress_func requires Subversion 1.7 or later");
 		return NULL;
+	}
+#endif
+
 	temp_pool = Pool(NULL);
 	if (temp_pool == NULL) {
 		return NULL;
 	}
-	stream = new_py_stream(temp_pool, py_feedback_stream);
-	if (stream == NULL) {
+	if (py_feedback_stream == Py_None) {
+		verify.feedback = NULL;
+	} else {
+		verify.feedback = new_py_stream(temp_pool, py_feedback_stream);
+		if (verify.feedback == NULL) {
+			apr_pool_destroy(temp_pool);
+			return NULL;
+		}
+	}
+#if ONLY_SINCE_SVN(1, 9)
+	if (verify.error_func != Py_None) {
+		verify.last = apr_time_now();
+		RUN_SVN_WITH_POOL(temp_pool,
+			svn_repos_verify_fs3(self->repos, start_rev, end_rev,
+				FALSE, FALSE, py_verify_notify, &verify,
+				py_verify_error, &verify, py_cancel_check, NULL,
+				temp_pool));
 		apr_pool_destroy(temp_pool);
-		return NULL;
+		Py_RETURN_NONE;
+	}
+#endif
+#if ONLY_SINCE_SVN(1, 7)
+	if (verify.progress_func != Py_None) {
+		verify.last = apr_time_now();
+		RUN_SVN_WITH_POOL(temp_pool,
+			svn_repos_verify_fs2(self->repos, start_rev, end_rev,
+				py_verify_notify, &verify, py_cancel_check, NULL,
+				temp_pool));
+		apr_pool_destroy(temp_pool);
+		Py_RETURN_NONE;
 	}
+#endif
 	RUN_SVN_WITH_POOL(temp_pool,
 		svn_repos_verify_fs(self->repos,
-			stream, start_rev, end_rev,
+			verify.feedback, start_rev, end_rev,
 			py_cancel_check, NULL, temp_pool));
 	apr_pool_destroy(temp_pool);
 
@@ -535,32 +1241,335 @@ static PyObject *repos_pack(RepositoryObject *self, PyObject *args)
 #endif
 }
 
-static PyMethodDef repos_methods[] = {
-	{ "load_fs", (PyCFunction)repos_load_fs, METH_VARARGS|METH_KEYWORDS, NULL },
-	{ "fs", (PyCFunction)repos_fs, METH_NOARGS, NULL },
-	{ "has_capability", (PyCFunction)repos_has_capability, METH_VARARGS, NULL },
-	{ "verify_fs", (PyCFunction)repos_verify, METH_VARARGS,
-		"S.verify_repos(feedback_stream, start_revnum, end_revnum)" },
-	{ "pack_fs", (PyCFunction)repos_pack, METH_VARARGS, NULL },
-	{ NULL, }
-};
+typedef struct {
+	svn_stream_t *inner;
+	apr_uint64_t *bytes;
+} CountingStreamBaton;
 
-PyTypeObject Repository_Type = {
-	PyVarObject_HEAD_INIT(NULL, 0)
-	"repos.Repository", /*	const char *tp_name;  For printing, in format "<module>.<name>" */
-	sizeof(RepositoryObject),
-	0,/*	Py_ssize_t tp_basicsize, tp_itemsize;  For allocation */
+static svn_error_t *counting_stream_write(void *baton, const char *data, apr_size_t *len)
+{
+	CountingStreamBaton *counter = baton;
+	SVN_ERR(svn_stream_write(counter->inner, data, len));
+	*counter->bytes += *len;
+	return NULL;
+}
 
-	/* Methods to implement standard operations */
+static svn_error_t *counting_stream_read(void *baton, char *buffer, apr_size_t *len)
+{
+	CountingStreamBaton *counter = baton;
+#if ONLY_SINCE_SVN(1, 9)
+	SVN_ERR(svn_stream_read_full(counter->inner, buffer, len));
+#else
+	SVN_ERR(svn_stream_read(counter->inner, buffer, len));
+#endif
+	*counter->bytes += *len;
+	return NULL;
+}
 
-	repos_dealloc, /*	destructor tp_dealloc;	*/
-	NULL, /*	printfunc tp_print;	*/
-	NULL, /*	getattrfunc tp_getattr;	*/
-	NULL, /*	setattrfunc tp_setattr;	*/
-	NULL, /*	cmpfunc tp_compare;	*/
-	NULL, /*	reprfunc tp_repr;	*/
+static svn_error_t *counting_stream_close(void *baton)
+{
+	CountingStreamBaton *counter = baton;
+	return svn_stream_close(counter->inner);
+}
 
-	/* Method suites for standard classes */
+#if ONLY_SINCE_SVN(1, 7)
+typedef struct {
+	svn_stream_mark_t *inner;
+	apr_uint64_t bytes;
+} CountingStreamMark;
+
+/* Passing marks through lets svn_stream_readline() read ahead in chunks
+ * rather than a byte at a time. */
+static svn_error_t *counting_stream_mark(void *baton, svn_stream_mark_t **mark, apr_pool_t *pool)
+{
+	CountingStreamBaton *counter = baton;
+	CountingStreamMark *ret;
+
+	ret = apr_palloc(pool, sizeof(CountingStreamMark));
+	SVN_ERR(svn_stream_mark(counter->inner, &ret->inner, pool));
+	ret->bytes = *counter->bytes;
+	*mark = (svn_stream_mark_t *)ret;
+	return NULL;
+}
+
+static svn_error_t *counting_stream_seek(void *baton, const svn_stream_mark_t *mark)
+{
+	CountingStreamBaton *counter = baton;
+	const CountingStreamMark *counting_mark = (const CountingStreamMark *)mark;
+
+	if (counting_mark == NULL) {
+		SVN_ERR(svn_stream_seek(counter->inner, NULL));
+		*counter->bytes = 0;
+	} else {
+		SVN_ERR(svn_stream_seek(counter->inner, counting_mark->inner));
+		*counter->bytes = counting_mark->bytes;
+	}
+	return NULL;
+}
+#endif
+
+/**
+ * Wrap a stream so that the number of bytes read from or written to it
+ * is added to *bytes.
+ */
+static svn_stream_t *counting_stream(svn_stream_t *inner, apr_uint64_t *bytes, apr_pool_t *pool)
+{
+	svn_stream_t *stream;
+	CountingStreamBaton *counter;
+	counter = apr_pcalloc(pool, sizeof(CountingStreamBaton));
+	counter->inner = inner;
+	counter->bytes = bytes;
+	stream = svn_stream_create(counter, pool);
+	svn_stream_set_read(stream, counting_stream_read);
+	svn_stream_set_write(stream, counting_stream_write);
+	svn_stream_set_close(stream, counting_stream_close);
+#if ONLY_SINCE_SVN(1, 7)
+	if (svn_stream_supports_mark(inner)) {
+		svn_stream_set_mark(stream, counting_stream_mark);
+		svn_stream_set_seek(stream, counting_stream_seek);
+	}
+#endif
+	return stream;
+}
+
+typedef struct {
+	PyObject *progress_func;
+	apr_uint64_t bytes;
+	apr_time_t start;
+	/* Last revision that was dumped completely, and the number of bytes
+	 * written up to the end of it */
+	svn_revnum_t last_rev;
+	apr_uint64_t last_offset;
+} DumpBaton;
+
+#if ONLY_SINCE_SVN(1, 7)
+static void py_dump_notify(void *baton, const svn_repos_notify_t *notify, apr_pool_t *pool)
+{
+	DumpBaton *dump = baton;
+	PyGILState_STATE state;
+	PyObject *ret;
+
+	if (notify->action != svn_repos_notify_dump_rev_end)
+		return;
+
+	dump->last_rev = notify->revision;
+	dump->last_offset = dump->bytes;
+
+	if (dump->progress_func == Py_None)
+		return;
+
+	state = PyGILState_Ensure();
+	if (PyErr_Occurred()) {
+		/* An earlier callback failed; the operation is being aborted. */
+		PyGILState_Release(state);
+		return;
+	}
+	ret = PyObject_CallFunction(dump->progress_func, "lKd",
+		notify->revision, (unsigned PY_LONG_LONG)dump->bytes,
+		(double)(apr_time_now() - dump->start) / APR_USEC_PER_SEC);
+	/* If ret was NULL, the cancel func should abort the operation. */
+	Py_XDECREF(ret);
+	PyGILState_Release(state);
+}
+#else
+/**
+ * Track the "* Dumped revision N." lines that svn_repos_dump_fs2 writes
+ * to its feedback stream once a revision is complete.
+ */
+static svn_error_t *dump_feedback_write(void *baton, const char *data, apr_size_t *len)
+{
+	DumpBaton *dump = baton;
+	const char *line, *end;
+	long revnum;
+
+	for (line = data; line < data + *len; line = end + 1) {
+		end = memchr(line, '\n', data + *len - line);
+		if (end == NULL)
+			end = data + *len;
+		/* Warnings don't start with an asterisk. */
+		if (end - line > 2 && line[0] == '*' && line[1] == ' ' &&
+			sscanf(line + 2, "%*[^0-9]%ld", &revnum) == 1) {
+			dump->last_rev = revnum;
+			dump->last_offset = dump->bytes;
+		}
+	}
+	return NULL;
+}
+#endif
+
+/**
+ * Record how far an interrupted dump got on the exception that is being
+ * raised, so that the caller can truncate the output and resume.
+ */
+static void dump_set_resume_info(DumpBaton *dump)
+{
+	PyObject *type, *value, *traceback, *py_revnum, *py_offset;
+
+	PyErr_Fetch(&type, &value, &traceback);
+	PyErr_NormalizeException(&type, &value, &traceback);
+	if (value != NULL) {
+		if (SVN_IS_VALID_REVNUM(dump->last_rev)) {
+			py_revnum = py_from_svn_revnum(dump->last_rev);
+		} else {
+			py_revnum = Py_None;
+			Py_INCREF(py_revnum);
+		}
+		py_offset = PyLong_FromUnsignedLongLong(dump->last_offset);
+		if (py_revnum == NULL || py_offset == NULL ||
+			PyObject_SetAttrString(value, "last_revnum", py_revnum) != 0 ||
+			PyObject_SetAttrString(value, "last_offset", py_offset) != 0) {
+			/* Don't mask the original error. */
+			PyErr_Clear();
+		}
+		Py_XDECREF(py_revnum);
+		Py_XDECREF(py_offset);
+	}
+	PyErr_Restore(type, value, traceback);
+}
+
+static PyObject *repos_dump(RepositoryObject *self, PyObject *args, PyObject *kwargs)
+{
+	char *kwnames[] = { "stream", "start_rev", "end_rev", "incremental",
+		"use_deltas", "progress_func", NULL };
+	PyObject *py_stream;
+	svn_revnum_t start_rev = 0, end_rev = SVN_INVALID_REVNUM, youngest;
+	unsigned char incremental = 1, use_deltas = 1;
+	apr_pool_t *temp_pool;
+	svn_stream_t *stream;
+	svn_error_t *err;
+	DumpBaton dump;
+#if ONLY_BEFORE_SVN(1, 7)
+	svn_stream_t *feedback_stream;
+#endif
+
+	dump.progress_func = Py_None;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|llbbO:dump_fs", kwnames,
+									 &py_stream, &start_rev, &end_rev,
+									 &incremental, &use_deltas,
+									 &dump.progress_func))
+		return NULL;
+
+	temp_pool = Pool(NULL);
+	if (temp_pool == NULL)
+		return NULL;
+
+	RUN_SVN_WITH_POOL(temp_pool,
+		svn_fs_youngest_rev(&youngest, svn_repos_fs(self->repos), temp_pool));
+
+	if (!SVN_IS_VALID_REVNUM(end_rev))
+		end_rev = youngest;
+
+	if (start_rev < 0 || start_rev > end_rev || end_rev > youngest) {
+		PyErr_Format(PyExc_ValueError,
+					 "Invalid revision range %ld:%ld (youngest is %ld)",
+					 start_rev, end_rev, youngest);
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+
+	stream = new_py_output_stream(temp_pool, py_stream);
+	if (stream == NULL) {
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+
+	dump.bytes = 0;
+	stream = counting_stream(stream, &dump.bytes, temp_pool);
+	dump.start = apr_time_now();
+	dump.last_rev = SVN_INVALID_REVNUM;
+	dump.last_offset = 0;
+
+	Py_BEGIN_ALLOW_THREADS
+#if ONLY_SINCE_SVN(1, 7)
+	err = svn_repos_dump_fs3(self->repos, stream, start_rev, end_rev,
+			incremental?TRUE:FALSE, use_deltas?TRUE:FALSE,
+			py_dump_notify, &dump, py_cancel_check, NULL, temp_pool);
+#else
+	feedback_stream = svn_stream_create(&dump, temp_pool);
+	svn_stream_set_write(feedback_stream, dump_feedback_write);
+	err = svn_repos_dump_fs2(self->repos, stream, feedback_stream,
+			start_rev, end_rev, incremental?TRUE:FALSE,
+			use_deltas?TRUE:FALSE, py_cancel_check, NULL, temp_pool);
+#endif
+	/* Flush what has been written, also after a failure, so that the
+	 * file matches last_offset. */
+	if (err == NULL)
+		err = svn_stream_close(stream);
+	else
+		svn_error_clear(svn_stream_close(stream));
+	Py_END_ALLOW_THREADS
+
+	if (err != NULL) {
+		handle_svn_error(err);
+		svn_error_clear(err);
+		apr_pool_destroy(temp_pool);
+		dump_set_resume_info(&dump);
+		return NULL;
+	}
+
+	apr_pool_destroy(temp_pool);
+
+	return py_from_svn_revnum(dump.last_rev);
+}
+
+static PyMethodDef repos_methods[] = {
+	{ "load_fs", (PyCFunction)repos_load_fs, METH_VARARGS|METH_KEYWORDS,
+		"S.load_fs(dumpstream, feedback_stream=None, uuid_action=LOAD_UUID_DEFAULT, parent_dir=None, use_pre_commit_hook=False, use_post_commit_hook=False, progress_func=None)\n\n"
+		"Load a dumpfile into the repository.\n"
+		"dumpstream can be a path, a file descriptor or a file-like object.\n"
+		"Paths and objects with a file descriptor are read without\n"
+		"holding the GIL.\n"
+		"progress_func is called as progress_func(revnum, nodes, bytes_read, elapsed)\n"
+		"after each revision has been committed (Subversion >= 1.8).\n"
+		"It can be combined with feedback_stream." },
+	{ "dump_fs", (PyCFunction)repos_dump, METH_VARARGS|METH_KEYWORDS,
+		"S.dump_fs(stream, start_rev=0, end_rev=-1, incremental=True, use_deltas=True, progress_func=None) -> revnum\n\n"
+		"Write a dump of a range of revisions to stream.\n"
+		"The dump is written directly to the file descriptor of stream\n"
+		"if it has one, without holding the GIL.\n"
+		"progress_func is called as progress_func(revnum, bytes_written, elapsed)\n"
+		"after each revision has been written completely (Subversion >= 1.7).\n"
+		"Returns the last revision that was dumped.\n"
+		"If the dump fails, the exception has last_revnum and last_offset\n"
+		"attributes: the last revision that was dumped completely (or None)\n"
+		"and the number of bytes written up to its end. The dump can be\n"
+		"resumed by truncating the output to last_offset and dumping\n"
+		"incrementally from the revision after last_revnum." },
+	{ "fs", (PyCFunction)repos_fs, METH_NOARGS, NULL },
+	{ "has_capability", (PyCFunction)repos_has_capability, METH_VARARGS, NULL },
+	{ "verify_fs", (PyCFunction)repos_verify, METH_VARARGS|METH_KEYWORDS,
+		"S.verify_fs(feedback_stream, start_rev, end_rev, progress_func=None,\n"
+		"            error_func=None)\n\n"
+		"Verify a range of revisions. feedback_stream may be None.\n"
+		"progress_func is called as progress_func(revnum, elapsed) after each\n"
+		"revision has been verified (Subversion >= 1.7).\n"
+		"Raises SubversionException for the first revision that fails, unless\n"
+		"error_func is given (Subversion >= 1.9). Verification then carries on\n"
+		"and calls error_func(revnum, exception) for each failure; revnum is\n"
+		"None for failures that do not belong to a single revision. If\n"
+		"error_func raises an exception, verification stops and the\n"
+		"exception is propagated." },
+	{ "pack_fs", (PyCFunction)repos_pack, METH_VARARGS, NULL },
+	{ NULL, }
+};
+
+PyTypeObject Repository_Type = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	"repos.Repository", /*	const char *tp_name;  For printing, in format "<module>.<name>" */
+	sizeof(RepositoryObject),
+	0,/*	Py_ssize_t tp_basicsize, tp_itemsize;  For allocation */
+
+	/* Methods to implement standard operations */
+
+	repos_dealloc, /*	destructor tp_dealloc;	*/
+	NULL, /*	printfunc tp_print;	*/
+	NULL, /*	getattrfunc tp_getattr;	*/
+	NULL, /*	setattrfunc tp_setattr;	*/
+	NULL, /*	cmpfunc tp_compare;	*/
+	NULL, /*	reprfunc tp_repr;	*/
+
+	/* Method suites for standard classes */
 
 	NULL, /*	PyNumberMethods *tp_as_number;	*/
 	NULL, /*	PySequenceMethods *tp_as_sequence;	*/
@@ -620,10 +1629,89 @@ static void fs_root_dealloc(PyObject *self)
 {
 	FileSystemRootObject *fsobj = (FileSystemRootObject *)self;
 
+	Py_XDECREF(fsobj->node_cache);
 	apr_pool_destroy(fsobj->pool);
 	PyObject_DEL(fsobj);
 }
 
+enum {
+	NODE_CACHE_IS_DIR,
+	NODE_CACHE_FILE_LENGTH,
+	NODE_CACHE_FILE_CHECKSUM,
+	NODE_CACHE_PROPLIST,
+};
+
+/**
+ * Look up a memoised result for a node.
+ *
+ * Returns a new reference, or NULL if there is none; an exception is
+ * only set if the lookup itself failed.
+ */
+static PyObject *fs_root_cache_get(FileSystemRootObject *self, int what,
+								   const char *path, int extra)
+{
+	PyObject *key, *ret;
+
+	if (self->node_cache == NULL)
+		return NULL;
+
+	key = Py_BuildValue("(isi)", what, path, extra);
+	if (key == NULL)
+		return NULL;
+	ret = PyDict_GetItem(self->node_cache, key);
+	Py_DECREF(key);
+	if (ret == NULL) {
+		self->node_cache_misses++;
+		return NULL;
+	}
+	self->node_cache_hits++;
+	Py_INCREF(ret);
+	return ret;
+}
+
+/**
+ * Memoise a result for a node.
+ *
+ * Returns value, or NULL (after releasing value) if it could not be
+ * stored. Once the cache is full it is emptied, which bounds its memory
+ * use without tracking the age of each entry.
+ */
+static PyObject *fs_root_cache_set(FileSystemRootObject *self, int what,
+								   const char *path, int extra,
+								   PyObject *value)
+{
+	PyObject *key;
+	int ret;
+
+	if (self->node_cache == NULL || value == NULL)
+		return value;
+
+	if (PyDict_Size(self->node_cache) >= self->node_cache_max)
+		PyDict_Clear(self->node_cache);
+
+	key = Py_BuildValue("(isi)", what, path, extra);
+	if (key == NULL) {
+		Py_DECREF(value);
+		return NULL;
+	}
+	ret = PyDict_SetItem(self->node_cache, key, value);
+	Py_DECREF(key);
+	if (ret != 0) {
+		Py_DECREF(value);
+		return NULL;
+	}
+	return value;
+}
+
+static PyObject *fs_root_get_cache_info(FileSystemRootObject *self)
+{
+	return Py_BuildValue("{s:k,s:k,s:n,s:i}",
+						 "hits", self->node_cache_hits,
+						 "misses", self->node_cache_misses,
+						 "size", (self->node_cache == NULL)?0:PyDict_Size(self->node_cache),
+						 "max_size", self->node_cache_max);
+}
+
 static PyObject *py_string_from_svn_node_id(const svn_fs_id_t *id)
 {
 	apr_pool_t *temp_pool;
@@ -743,16 +1831,23 @@ static PyObject *fs_root_is_dir(FileSystemRootObject *self, PyObject *args)
 	apr_pool_t *temp_pool;
 	char *path;
 
+	PyObject *ret;
+
 	if (!PyArg_ParseTuple(args, "s", &path))
 		return NULL;
 
+	ret = fs_root_cache_get(self, NODE_CACHE_IS_DIR, path, 0);
+	if (ret != NULL || PyErr_Occurred())
+		return ret;
+
 	temp_pool = Pool(NULL);
 	if (temp_pool == NULL)
 		return NULL;
 	RUN_SVN_WITH_POOL(temp_pool, svn_fs_is_dir(&is_dir, self->root,
 											   path, temp_pool));
 	apr_pool_destroy(temp_pool);
-	return PyBool_FromLong(is_dir);
+	return fs_root_cache_set(self, NODE_CACHE_IS_DIR, path, 0,
+							 PyBool_FromLong(is_dir));
 }
 
 static PyObject *fs_root_is_file(FileSystemRootObject *self, PyObject *args)
@@ -779,16 +1874,23 @@ static PyObject *fs_root_file_length(FileSystemRootObject *self, PyObject *args)
 	apr_pool_t *temp_pool;
 	char *path;
 
+	PyObject *ret;
+
 	if (!PyArg_ParseTuple(args, "s", &path))
 		return NULL;
 
+	ret = fs_root_cache_get(self, NODE_CACHE_FILE_LENGTH, path, 0);
+	if (ret != NULL || PyErr_Occurred())
+		return ret;
+
 	temp_pool = Pool(NULL);
 	if (temp_pool == NULL)
 		return NULL;
 	RUN_SVN_WITH_POOL(temp_pool, svn_fs_file_length(&filesize, self->root,
 											   path, temp_pool));
 	apr_pool_destroy(temp_pool);
-	return PyLong_FromLong(filesize);
+	return fs_root_cache_set(self, NODE_CACHE_FILE_LENGTH, path, 0,
+							 PyLong_FromLong(filesize));
 }
 
 static PyObject *fs_node_file_proplist(FileSystemRootObject *self, PyObject *args)
@@ -798,16 +1900,29 @@ static PyObject *fs_node_file_proplist(FileSystemRootObject *self, PyObject *arg
 	char *path;
 	apr_hash_t *proplist;
 
+	PyObject *props;
+
 	if (!PyArg_ParseTuple(args, "s", &path))
 		return NULL;
 
-	temp_pool = Pool(NULL);
-	if (temp_pool == NULL)
-		return NULL;
-	RUN_SVN_WITH_POOL(temp_pool, svn_fs_node_proplist(&proplist, self->root,
-											   path, temp_pool));
-	ret = prop_hash_to_dict(proplist);
-	apr_pool_destroy(temp_pool);
+	props = fs_root_cache_get(self, NODE_CACHE_PROPLIST, path, 0);
+	if (props == NULL) {
+		if (PyErr_Occurred())
+			return NULL;
+		temp_pool = Pool(NULL);
+		if (temp_pool == NULL)
+			return NULL;
+		RUN_SVN_WITH_POOL(temp_pool, svn_fs_node_proplist(&proplist, self->root,
+												   path, temp_pool));
+		props = prop_hash_to_dict(proplist, temp_pool);
+		apr_pool_destroy(temp_pool);
+		props = fs_root_cache_set(self, NODE_CACHE_PROPLIST, path, 0, props);
+		if (props == NULL)
+			return NULL;
+	}
+	/* Callers may modify the dictionary, so never hand out the cached one. */
+	ret = PyDict_Copy(props);
+	Py_DECREF(props);
 	return ret;
 }
 
@@ -817,11 +1932,11 @@ static PyObject *fs_root_file_checksum(FileSystemRootObject *self, PyObject *arg
 	bool force = false;
 	char *path;
 #if ONLY_SINCE_SVN(1, 6)
-	svn_checksum_kind_t kind;
+	svn_checksum_kind_t kind = svn_checksum_md5;
 	const char *cstr;
 	svn_checksum_t *checksum;
 #else
-	int kind;
+	int kind = 0;
 	unsigned char checksum[APR_MD5_DIGESTSIZE];
 #endif
 	PyObject *ret;
@@ -829,6 +1944,10 @@ static PyObject *fs_root_file_checksum(FileSystemRootObject *self, PyObject *arg
 	if (!PyArg_ParseTuple(args, "s|ib", &path, &kind, &force))
 		return NULL;
 
+	ret = fs_root_cache_get(self, NODE_CACHE_FILE_CHECKSUM, path, kind);
+	if (ret != NULL || PyErr_Occurred())
+		return ret;
+
 	temp_pool = Pool(NULL);
 	if (temp_pool == NULL)
 		return NULL;
@@ -854,12 +1973,16 @@ static PyObject *fs_root_file_checksum(FileSystemRootObject *self, PyObject *arg
 	ret = PyBytes_FromStringAndSize((char *)checksum, APR_MD5_DIGESTSIZE);
 #endif
 	apr_pool_destroy(temp_pool);
-	return ret;
+	/* A missing checksum may still be computed by a later forced call. */
+	if (ret == Py_None)
+		return ret;
+	return fs_root_cache_set(self, NODE_CACHE_FILE_CHECKSUM, path, kind, ret);
 }
 
 static PyObject *fs_root_file_contents(FileSystemRootObject *self, PyObject *args)
 {
 	svn_stream_t *stream;
+	svn_filesize_t size;
 	apr_pool_t *pool;
 	StreamObject *ret;
 	char *path;
@@ -872,18 +1995,625 @@ static PyObject *fs_root_file_contents(FileSystemRootObject *self, PyObject *arg
 		return NULL;
 	RUN_SVN_WITH_POOL(pool, svn_fs_file_contents(&stream, self->root,
 											   path, pool));
+	RUN_SVN_WITH_POOL(pool, svn_fs_file_length(&size, self->root,
+											   path, pool));
 
 	ret = PyObject_New(StreamObject, &Stream_Type);
-	if (ret == NULL)
+	if (ret == NULL) {
+		apr_pool_destroy(pool);
 		return NULL;
+	}
 
 	ret->pool = pool;
 	ret->closed = FALSE;
 	ret->stream = stream;
+	ret->offset = 0;
+	ret->size = size;
 
     return (PyObject *)ret;
 }
 
+static PyObject *fs_root_dir_entries(FileSystemRootObject *self, PyObject *args)
+{
+	apr_pool_t *temp_pool;
+	apr_hash_t *entries;
+	apr_hash_index_t *idx;
+	PyObject *ret;
+	char *path;
+
+	if (!PyArg_ParseTuple(args, "s", &path))
+		return NULL;
+
+	temp_pool = Pool(NULL);
+	if (temp_pool == NULL)
+		return NULL;
+	RUN_SVN_WITH_POOL(temp_pool, svn_fs_dir_entries(&entries, self->root,
+											   path, temp_pool));
+	ret = PyDict_New();
+	if (ret == NULL) {
+		apr_pool_destroy(temp_pool);
+		return NULL;
+	}
+
+	for (idx = apr_hash_first(temp_pool, entries); idx != NULL;
+		 idx = apr_hash_next(idx)) {
+		svn_fs_dirent_t *dirent;
+		PyObject *py_kind;
+		apr_hash_this(idx, NULL, NULL, (void **)&dirent);
+		py_kind = PyLong_FromLong(dirent->kind);
+		if (py_kind == NULL) {
+			apr_pool_destroy(temp_pool);
+			Py_DECREF(ret);
+			return NULL;
+		}
+		if (PyDict_SetItemString(ret, dirent->name, py_kind) != 0) {
+			apr_pool_destroy(temp_pool);
+			Py_DECREF(py_kind);
+			Py_DECREF(ret);
+			return NULL;
+		}
+		Py_DECREF(py_kind);
+	}
+	apr_pool_destroy(temp_pool);
+	return ret;
+}
+
+/* Number of nodes that FileSystemRoot.walk visits per release of the GIL */
+#define DEFAULT_WALK_BATCH_SIZE 1000
+
+typedef struct {
+	char *path;
+	svn_node_kind_t kind;
+} WalkNode;
+
+typedef struct {
+	char *path;
+	svn_node_kind_t kind;
+	svn_filesize_t size;
+	const char *checksum;
+	apr_hash_t *props;
+} WalkEntry;
+
+typedef struct {
+	PyObject_HEAD
+	FileSystemRootObject *root;
+	/* Nodes that still have to be visited; the next one is at the end */
+	WalkNode *stack;
+	size_t stack_len, stack_size;
+	/* Nodes that have been visited but not yet returned */
+	WalkEntry *batch;
+	size_t batch_len, batch_pos, batch_size;
+	/* Pool for checksums and properties of the current batch */
+	apr_pool_t *batch_pool;
+	bool include_props, include_checksums;
+	bool busy;
+} WalkIteratorObject;
+
+static char *walk_join(const char *parent, const char *name)
+{
+	size_t parent_len, name_len;
+	char *ret;
+
+	parent_len = strlen(parent);
+	if (parent_len == 1 && parent[0] == '/')
+		parent_len = 0;
+	name_len = strlen(name);
+	ret = malloc(parent_len + name_len + 2);
+	if (ret == NULL)
+		return NULL;
+	memcpy(ret, parent, parent_len);
+	ret[parent_len] = '/';
+	memcpy(ret + parent_len + 1, name, name_len + 1);
+	return ret;
+}
+
+static int walk_compare_dirents(const void *a, const void *b)
+{
+	return strcmp((*(svn_fs_dirent_t * const *)a)->name,
+				  (*(svn_fs_dirent_t * const *)b)->name);
+}
+
+static svn_error_t *walk_push_children(WalkIteratorObject *walk,
+									   const char *path)
+{
+	apr_hash_t *entries;
+	apr_hash_index_t *idx;
+	svn_fs_dirent_t **dirents;
+	size_t count, i = 0;
+
+	SVN_ERR(svn_fs_dir_entries(&entries, walk->root->root, path,
+							   walk->batch_pool));
+	count = apr_hash_count(entries);
+	if (count == 0)
+		return NULL;
+	dirents = apr_palloc(walk->batch_pool, count * sizeof(svn_fs_dirent_t *));
+	for (idx = apr_hash_first(walk->batch_pool, entries); idx != NULL;
+		 idx = apr_hash_next(idx)) {
+		apr_hash_this(idx, NULL, NULL, (void **)&dirents[i++]);
+	}
+	qsort(dirents, count, sizeof(svn_fs_dirent_t *), walk_compare_dirents);
+
+	if (walk->stack_len + count > walk->stack_size) {
+		size_t new_size = (walk->stack_len + count) * 2;
+		WalkNode *new_stack = realloc(walk->stack, new_size * sizeof(WalkNode));
+		if (new_stack == NULL)
+			return svn_error_create(APR_ENOMEM, NULL, NULL);
+		walk->stack = new_stack;
+		walk->stack_size = new_size;
+	}
+
+	/* Push in reverse order, so that children are visited in order */
+	for (i = count; i > 0; i--) {
+		char *child_path = walk_join(path, dirents[i-1]->name);
+		if (child_path == NULL)
+			return svn_error_create(APR_ENOMEM, NULL, NULL);
+		walk->stack[walk->stack_len].path = child_path;
+		walk->stack[walk->stack_len].kind = dirents[i-1]->kind;
+		walk->stack_len++;
+	}
+	return NULL;
+}
+
+/* Visit the next batch of nodes. Called without the GIL. */
+static svn_error_t *walk_fill_batch(WalkIteratorObject *walk)
+{
+	svn_fs_root_t *root = walk->root->root;
+
+	while (walk->stack_len > 0 && walk->batch_len < walk->batch_size) {
+		WalkEntry *entry = &walk->batch[walk->batch_len++];
+		walk->stack_len--;
+		entry->path = walk->stack[walk->stack_len].path;
+		entry->kind = walk->stack[walk->stack_len].kind;
+		entry->size = -1;
+		entry->checksum = NULL;
+		entry->props = NULL;
+
+		if (entry->kind == svn_node_dir) {
+			SVN_ERR(walk_push_children(walk, entry->path));
+		} else if (entry->kind == svn_node_file) {
+			SVN_ERR(svn_fs_file_length(&entry->size, root, entry->path,
+									   walk->batch_pool));
+#if ONLY_SINCE_SVN(1, 6)
+			if (walk->include_checksums) {
+				svn_checksum_t *checksum;
+				SVN_ERR(svn_fs_file_checksum(&checksum, svn_checksum_md5,
+											 root, entry->path, TRUE,
+											 walk->batch_pool));
+				entry->checksum = svn_checksum_to_cstring(checksum,
+														  walk->batch_pool);
+			}
+#endif
+		}
+
+		if (walk->include_props) {
+			SVN_ERR(svn_fs_node_proplist(&entry->props, root, entry->path,
+										 walk->batch_pool));
+		}
+	}
+	return NULL;
+}
+
+static void walk_clear_batch(WalkIteratorObject *walk)
+{
+	size_t i;
+
+	for (i = 0; i < walk->batch_len; i++)
+		free(walk->batch[i].path);
+	walk->batch_len = 0;
+	walk->batch_pos = 0;
+	apr_pool_clear(walk->batch_pool);
+}
+
+static void walk_clear_stack(WalkIteratorObject *walk)
+{
+	while (walk->stack_len > 0)
+		free(walk->stack[--walk->stack_len].path);
+}
+
+static PyObject *walk_next(WalkIteratorObject *self)
+{
+	WalkEntry *entry;
+	PyObject *py_checksum, *py_props;
+
+	if (self->busy) {
+		PyErr_SetString(PyExc_RuntimeError,
+						"Walk is already in progress in another thread");
+		return NULL;
+	}
+
+	if (self->batch_pos == self->batch_len) {
+		svn_error_t *err;
+
+		walk_clear_batch(self);
+		if (self->stack_len == 0)
+			return NULL;
+
+		self->busy = true;
+		Py_BEGIN_ALLOW_THREADS
+		err = walk_fill_batch(self);
+		Py_END_ALLOW_THREADS
+		self->busy = false;
+
+		if (err != NULL) {
+			handle_svn_error(err);
+			svn_error_clear(err);
+			walk_clear_batch(self);
+			walk_clear_stack(self);
+			return NULL;
+		}
+	}
+
+	entry = &self->batch[self->batch_pos++];
+
+	if (entry->checksum != NULL) {
+		py_checksum = PyUnicode_FromString(entry->checksum);
+		if (py_checksum == NULL)
+			return NULL;
+	} else {
+		py_checksum = Py_None;
+		Py_INCREF(py_checksum);
+	}
+
+	if (entry->props != NULL) {
+		py_props = prop_hash_to_dict(entry->props, self->batch_pool);
+		if (py_props == NULL) {
+			Py_DECREF(py_checksum);
+			return NULL;
+		}
+	} else {
+		py_props = Py_None;
+		Py_INCREF(py_props);
+	}
+
+	return Py_BuildValue("(siLNN)", entry->path, entry->kind,
+						 (PY_LONG_LONG)entry->size, py_checksum, py_props);
+}
+
+static void walk_dealloc(PyObject *self)
+{
+	WalkIteratorObject *walk = (WalkIteratorObject *)self;
+
+	walk_clear_batch(walk);
+	walk_clear_stack(walk);
+	free(walk->stack);
+	free(walk->batch);
+	apr_pool_destroy(walk->batch_pool);
+	Py_DECREF(walk->root);
+	PyObject_Del(self);
+}
+
+PyTypeObject WalkIterator_Type = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	"repos.WalkIterator", /*	const char *tp_name;  For printing, in format "<module>.<name>" */
+	sizeof(WalkIteratorObject),
+	0,/*	Py_ssize_t tp_basicsize, tp_itemsize;  For allocation */
+
+	/* Methods to implement standard operations */
+
+	.tp_dealloc = walk_dealloc, /*	destructor tp_dealloc;	*/
+
+#if PY_MAJOR_VERSION < 3
+	/* Flags to define presence of optional/expanded features */
+	.tp_flags = Py_TPFLAGS_HAVE_ITER, /*	long tp_flags;	*/
+#endif
+
+	/* Iterators */
+	.tp_iter = PyObject_SelfIter,
+	.tp_iternext = (iternextfunc)walk_next,
+};
+
+static PyObject *fs_root_walk(FileSystemRootObject *self, PyObject *args,
+							  PyObject *kwargs)
+{
+	char *kwnames[] = { "path", "include_props", "include_checksums",
+		"batch_size", NULL };
+	char *path;
+	bool include_props = false, include_checksums = false;
+	int batch_size = DEFAULT_WALK_BATCH_SIZE;
+	svn_node_kind_t kind;
+	apr_pool_t *temp_pool;
+	WalkIteratorObject *ret;
+	size_t path_len;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "s|bbi", kwnames, &path,
+									 &include_props, &include_checksums,
+									 &batch_size))
+		return NULL;
+
+	if (batch_size <= 0) {
+		PyErr_SetString(PyExc_ValueError, "batch_size must be positive");
+		return NULL;
+	}
+
+#if ONLY_BEFORE_SVN(1, 6)
+	if (include_checksums) {
+		PyErr_SetString(PyExc_NotImplementedError,
+						"Checksums require Subversion 1.6 or later");
+		return NULL;
+	}
+#endif
+
+	temp_pool = Pool(NULL);
+	if (temp_pool == NULL)
+		return NULL;
+	RUN_SVN_WITH_POOL(temp_pool, svn_fs_check_path(&kind, self->root, path,
+												   temp_pool));
+	apr_pool_destroy(temp_pool);
+
+	ret = PyObject_New(WalkIteratorObject, &WalkIterator_Type);
+	if (ret == NULL)
+		return NULL;
+
+	ret->batch_pool = Pool(NULL);
+	if (ret->batch_pool == NULL) {
+		PyObject_Del(ret);
+		return NULL;
+	}
+	ret->root = self;
+	Py_INCREF(self);
+	ret->include_props = include_props;
+	ret->include_checksums = include_checksums;
+	ret->busy = false;
+	ret->batch_size = batch_size;
+	ret->batch_len = 0;
+	ret->batch_pos = 0;
+	ret->stack_len = 0;
+	ret->stack_size = 16;
+	ret->batch = malloc(batch_size * sizeof(WalkEntry));
+	ret->stack = malloc(ret->stack_size * sizeof(WalkNode));
+	if (ret->batch == NULL || ret->stack == NULL) {
+		Py_DECREF(ret);
+		return PyErr_NoMemory();
+	}
+
+	if (kind == svn_node_none)
+		return (PyObject *)ret;
+
+	/* Start with the node itself, as an absolute path */
+	while (*path == '/')
+		path++;
+	path_len = strlen(path);
+	while (path_len > 0 && path[path_len-1] == '/')
+		path_len--;
+	ret->stack[0].path = malloc(path_len + 2);
+	if (ret->stack[0].path == NULL) {
+		Py_DECREF(ret);
+		return PyErr_NoMemory();
+	}
+	ret->stack[0].path[0] = '/';
+	memcpy(ret->stack[0].path + 1, path, path_len);
+	ret->stack[0].path[path_len + 1] = '\0';
+	ret->stack[0].kind = kind;
+	ret->stack_len = 1;
+
+	return (PyObject *)ret;
+}
+
+/* Number of history entries that FileSystemRoot.node_history fetches per
+ * release of the GIL */
+#define DEFAULT_HISTORY_BATCH_SIZE 100
+
+typedef struct {
+	char *path;
+	svn_revnum_t revnum;
+} HistoryEntry;
+
+typedef struct {
+	PyObject_HEAD
+	FileSystemRootObject *root;
+	/* Current history object, allocated in pool; NULL when exhausted */
+	svn_fs_history_t *history;
+	apr_pool_t *pool, *oldpool;
+	bool cross_copies;
+	HistoryEntry *batch;
+	size_t batch_len, batch_pos, batch_size;
+	bool busy;
+} HistoryIteratorObject;
+
+/* Fetch the next batch of history entries. Called without the GIL. */
+static svn_error_t *history_fill_batch(HistoryIteratorObject *iter)
+{
+	while (iter->history != NULL && iter->batch_len < iter->batch_size) {
+		HistoryEntry *entry;
+		const char *path;
+		svn_revnum_t revnum;
+		apr_pool_t *tmp_pool;
+
+		/* The previous history object lives in pool, so the new one is
+		 * allocated in oldpool, after which the two are swapped. */
+		apr_pool_clear(iter->oldpool);
+		SVN_ERR(svn_fs_history_prev(&iter->history, iter->history,
+									iter->cross_copies?TRUE:FALSE,
+									iter->oldpool));
+		if (iter->history == NULL)
+			break;
+		SVN_ERR(svn_fs_history_location(&path, &revnum, iter->history,
+										iter->oldpool));
+		tmp_pool = iter->pool;
+		iter->pool = iter->oldpool;
+		iter->oldpool = tmp_pool;
+
+		entry = &iter->batch[iter->batch_len];
+		entry->path = strdup(path);
+		if (entry->path == NULL)
+			return svn_error_create(APR_ENOMEM, NULL, NULL);
+		entry->revnum = revnum;
+		iter->batch_len++;
+	}
+	return NULL;
+}
+
+static void history_clear_batch(HistoryIteratorObject *iter)
+{
+	size_t i;
+
+	for (i = 0; i < iter->batch_len; i++)
+		free(iter->batch[i].path);
+	iter->batch_len = 0;
+	iter->batch_pos = 0;
+}
+
+static PyObject *history_next(HistoryIteratorObject *self)
+{
+	HistoryEntry *entry;
+
+	if (self->busy) {
+		PyErr_SetString(PyExc_RuntimeError,
+						"History is already being read in another thread");
+		return NULL;
+	}
+
+	if (self->batch_pos == self->batch_len) {
+		svn_error_t *err;
+
+		history_clear_batch(self);
+		if (self->history == NULL)
+			return NULL;
+
+		self->busy = true;
+		Py_BEGIN_ALLOW_THREADS
+		err = history_fill_batch(self);
+		Py_END_ALLOW_THREADS
+		self->busy = false;
+
+		if (err != NULL) {
+			handle_svn_error(err);
+			svn_error_clear(err);
+			history_clear_batch(self);
+			self->history = NULL;
+			return NULL;
+		}
+
+		if (self->batch_len == 0)
+			return NULL;
+	}
+
+	entry = &self->batch[self->batch_pos++];
+	return Py_BuildValue("(sl)", entry->path, entry->revnum);
+}
+
+static void history_dealloc(PyObject *self)
+{
+	HistoryIteratorObject *iter = (HistoryIteratorObject *)self;
+
+	history_clear_batch(iter);
+	free(iter->batch);
+	if (iter->pool != NULL)
+		apr_pool_destroy(iter->pool);
+	if (iter->oldpool != NULL)
+		apr_pool_destroy(iter->oldpool);
+	Py_DECREF(iter->root);
+	PyObject_Del(self);
+}
+
+PyTypeObject HistoryIterator_Type = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	"repos.HistoryIterator", /*	const char *tp_name;  For printing, in format "<module>.<name>" */
+	sizeof(HistoryIteratorObject),
+	0,/*	Py_ssize_t tp_basicsize, tp_itemsize;  For allocation */
+
+	/* Methods to implement standard operations */
+
+	.tp_dealloc = history_dealloc, /*	destructor tp_dealloc;	*/
+
+#if PY_MAJOR_VERSION < 3
+	/* Flags to define presence of optional/expanded features */
+	.tp_flags = Py_TPFLAGS_HAVE_ITER, /*	long tp_flags;	*/
+#endif
+
+	/* Iterators */
+	.tp_iter = PyObject_SelfIter,
+	.tp_iternext = (iternextfunc)history_next,
+};
+
+static PyObject *fs_root_node_history(FileSystemRootObject *self,
+									  PyObject *args, PyObject *kwargs)
+{
+	char *kwnames[] = { "path", "cross_copies", "batch_size", NULL };
+	char *path;
+	bool cross_copies = true;
+	int batch_size = DEFAULT_HISTORY_BATCH_SIZE;
+	HistoryIteratorObject *ret;
+	svn_error_t *err;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwargs, "s|bi:node_history",
+									 kwnames, &path, &cross_copies,
+									 &batch_size))
+		return NULL;
+
+	if (batch_size <= 0) {
+		PyErr_SetString(PyExc_ValueError, "batch_size must be positive");
+		return NULL;
+	}
+
+	ret = PyObject_New(HistoryIteratorObject, &HistoryIterator_Type);
+	if (ret == NULL)
+		return NULL;
+
+	ret->root = self;
+	Py_INCREF(self);
+	ret->cross_copies = cross_copies;
+	ret->busy = false;
+	ret->batch_size = batch_size;
+	ret->batch_len = 0;
+	ret->batch_pos = 0;
+	ret->history = NULL;
+	ret->oldpool = NULL;
+	ret->batch = malloc(batch_size * sizeof(HistoryEntry));
+	ret->pool = Pool(NULL);
+	if (ret->pool == NULL) {
+		Py_DECREF(ret);
+		return NULL;
+	}
+	ret->oldpool = Pool(NULL);
+	if (ret->oldpool == NULL) {
+		Py_DECREF(ret);
+		return NULL;
+	}
+	if (ret->batch == NULL) {
+		Py_DECREF(ret);
+		return PyErr_NoMemory();
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	err = svn_fs_node_history(&ret->history, self->root, path, ret->pool);
+	Py_END_ALLOW_THREADS
+
+	if (err != NULL) {
+		handle_svn_error(err);
+		svn_error_clear(err);
+		Py_DECREF(ret);
+		return NULL;
+	}
+
+	return (PyObject *)ret;
+}
+
+static PyObject *fs_root_replay(FileSystemRootObject *self, PyObject *args)
+{
+	apr_pool_t *temp_pool;
+	svn_revnum_t low_water_mark;
+	PyObject *update_editor;
+	bool send_deltas = true;
+
+	if (!PyArg_ParseTuple(args, "Ol|b:replay", &update_editor, &low_water_mark,
+						  &send_deltas))
+		return NULL;
+
+	temp_pool = Pool(NULL);
+	if (temp_pool == NULL)
+		return NULL;
+	/* Only INCREF here, py_editor takes care of the DECREF */
+	Py_INCREF(update_editor);
+	RUN_SVN_WITH_POOL(temp_pool,
+					  svn_repos_replay2(self->root, "", low_water_mark,
+										send_deltas, &py_editor, update_editor,
+										NULL, NULL, temp_pool));
+	apr_pool_destroy(temp_pool);
+
+	Py_RETURN_NONE;
+}
+
 static PyMethodDef fs_root_methods[] = {
 	{ "paths_changed", (PyCFunction)fs_root_paths_changed, METH_NOARGS, NULL },
 	{ "is_dir", (PyCFunction)fs_root_is_dir, METH_VARARGS, NULL },
@@ -892,6 +2622,29 @@ static PyMethodDef fs_root_methods[] = {
 	{ "file_content", (PyCFunction)fs_root_file_contents, METH_VARARGS, NULL },
 	{ "file_checksum", (PyCFunction)fs_root_file_checksum, METH_VARARGS, NULL },
 	{ "proplist", (PyCFunction)fs_node_file_proplist, METH_VARARGS, NULL },
+	{ "cache_info", (PyCFunction)fs_root_get_cache_info, METH_NOARGS,
+		"S.cache_info() -> dict\n"
+		"Return the hits, misses, size and max_size of the cache of\n"
+		"is_dir, file_length, file_checksum and proplist results." },
+	{ "replay", (PyCFunction)fs_root_replay, METH_VARARGS,
+		"S.replay(update_editor, low_water_mark, send_deltas=True)\n"
+		"Send the changes made in this revision root to an editor." },
+	{ "node_history", (PyCFunction)fs_root_node_history,
+		METH_VARARGS|METH_KEYWORDS,
+		"S.node_history(path, cross_copies=True, batch_size=100)\n"
+		"Iterate over the history of a node, from young to old. Yields\n"
+		"(path, revnum) tuples for the revisions in which the node changed.\n"
+		"Entries are fetched in batches of batch_size without holding the GIL." },
+	{ "dir_entries", (PyCFunction)fs_root_dir_entries, METH_VARARGS,
+		"S.dir_entries(path) -> dict\n"
+		"Return a dictionary mapping the names of the entries of a directory\n"
+		"to their node kind." },
+	{ "walk", (PyCFunction)fs_root_walk, METH_VARARGS|METH_KEYWORDS,
+		"S.walk(path, include_props=False, include_checksums=False, batch_size=1000)\n"
+		"Iterate over a node and all nodes below it, depth-first and sorted\n"
+		"by name. Yields (path, kind, size, checksum, props) tuples; size is -1\n"
+		"for directories, checksum (MD5) and props are None unless requested.\n"
+		"Nodes are visited in batches of batch_size without holding the GIL." },
 	{ NULL, }
 };
 
@@ -970,6 +2723,12 @@ static PyObject *moduleinit(void)
 	if (PyType_Ready(&FileSystemRoot_Type) < 0)
 		return NULL;
 
+	if (PyType_Ready(&WalkIterator_Type) < 0)
+		return NULL;
+
+	if (PyType_Ready(&HistoryIterator_Type) < 0)
+		return NULL;
+
 	if (PyType_Ready(&Stream_Type) < 0)
 		return NULL;
 
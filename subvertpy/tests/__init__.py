@@ -441,10 +441,15 @@ class SubversionTestCase(TestCaseInTempDir):
 
 def test_suite():
     names = [
+        'blame',
+        'cache',
         'client',
         'core',
         'delta',
+        'dumpfile',
+        'locations',
         'marshall',
+        'parallel',
         'properties',
         'ra',
         'repos',
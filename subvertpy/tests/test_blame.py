@@ -0,0 +1,93 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Subversion blame tests."""
+
+from subvertpy import ra
+from subvertpy.blame import BlameResult, blame
+from subvertpy.tests import (
+    SubversionTestCase,
+    TestCase,
+    )
+
+
+class BlameResultTests(TestCase):
+
+    def test_iter(self):
+        result = BlameResult([1, 3, 2], [0, -1, 1], ["jelmer", "bob"])
+        self.assertEqual(3, len(result))
+        self.assertEqual([(1, "jelmer"), (3, None), (2, "bob")],
+                         list(result))
+
+    def test_getitem(self):
+        result = BlameResult([1, 3], [0, -1], ["jelmer"])
+        self.assertEqual((1, "jelmer"), result[0])
+        self.assertEqual((3, None), result[1])
+
+
+class BlameTests(SubversionTestCase):
+
+    def setUp(self):
+        super(BlameTests, self).setUp()
+        self.repos_url = self.make_repository("d")
+        self.ra = ra.RemoteAccess(
+            self.repos_url, auth=ra.Auth([ra.get_username_provider()]))
+
+        cb = self.get_commit_editor(self.repos_url)
+        cb.add_file("bar").modify(b"a\nb\nc\n")
+        cb.close()
+
+        cb = self.get_commit_editor(self.repos_url)
+        cb.open_file("bar").modify(b"a\nB\nc\nd\n")
+        cb.close()
+
+        cb = self.get_commit_editor(self.repos_url)
+        cb.open_file("bar").modify(b"a\nB\nd\n")
+        cb.close()
+
+    def tearDown(self):
+        del self.ra
+        super(BlameTests, self).tearDown()
+
+    def test_blame(self):
+        result = blame(self.ra, "bar", 1, 3)
+        self.assertEqual([1, 2, 2], list(result.revnums))
+        self.assertEqual(1, len(result.authors))
+        self.assertEqual([0, 0, 0], list(result.author_ids))
+
+    def test_blame_start(self):
+        result = blame(self.ra, "bar", 2, 3)
+        self.assertEqual([2, 2, 2], list(result.revnums))
+
+    def test_blame_older(self):
+        result = blame(self.ra, "bar", 1, 1)
+        self.assertEqual([1, 1, 1], list(result.revnums))
+
+    def test_blame_raw(self):
+        result = self.ra.blame("bar", 1, 2)
+        self.assertEqual([1, 2, 1, 2], list(result["revnum"]))
+        self.assertEqual([0, 0, 0, 0], list(result["author"]))
+        self.assertNotIn("merged_revnum", result)
+
+    def test_blame_include_merged_revisions(self):
+        result = self.ra.blame("bar", 1, 3, include_merged_revisions=True)
+        self.assertEqual([1, 2, 2], list(result["revnum"]))
+        self.assertEqual([1, 2, 2], list(result["merged_revnum"]))
+
+    def test_busy(self):
+        result = self.ra.blame("bar", 1, 3)
+        self.assertEqual(3, len(result["revnum"]))
+        # The session can be reused once blame has returned.
+        self.assertEqual(3, self.ra.get_latest_revnum())
@@ -0,0 +1,215 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for subvertpy.cache."""
+
+import hashlib
+from io import BytesIO
+import os
+
+from subvertpy import SubversionException, ra
+from subvertpy.cache import (
+    CachingRemoteAccess,
+    FileContentCache,
+    RevPropCache,
+    )
+from subvertpy.tests import (
+    SubversionTestCase,
+    TestCase,
+    TestCaseInTempDir,
+    )
+
+
+class RevPropCacheTests(TestCase):
+
+    def test_get_set(self):
+        cache = RevPropCache()
+        self.assertIs(None, cache.get("uuid", 1))
+        cache.set("uuid", 1, {"svn:log": b"msg"})
+        self.assertEqual({"svn:log": b"msg"}, cache.get("uuid", 1))
+        self.assertIs(None, cache.get("otheruuid", 1))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(2, cache.misses)
+
+    def test_invalidate(self):
+        cache = RevPropCache()
+        cache.set("uuid", 1, {"svn:log": b"msg"})
+        cache.invalidate("uuid", 1)
+        self.assertIs(None, cache.get("uuid", 1))
+        self.assertEqual(0, len(cache))
+
+    def test_max_entries(self):
+        cache = RevPropCache(max_entries=2)
+        cache.set("uuid", 1, {})
+        cache.set("uuid", 2, {})
+        cache.get("uuid", 1)
+        cache.set("uuid", 3, {})
+        self.assertEqual(2, len(cache))
+        self.assertIs(None, cache.get("uuid", 2))
+        self.assertEqual({}, cache.get("uuid", 1))
+
+    def test_max_bytes(self):
+        cache = RevPropCache(max_bytes=20)
+        cache.set("uuid", 1, {"svn:log": b"x" * 10})
+        cache.set("uuid", 2, {"svn:log": b"y" * 10})
+        self.assertEqual(1, len(cache))
+        self.assertIs(None, cache.get("uuid", 1))
+
+
+class PersistentRevPropCacheTests(TestCaseInTempDir):
+
+    def test_shared(self):
+        path = os.path.join(self.test_dir, "revprops.db")
+        cache = RevPropCache(path=path)
+        cache.set("uuid", 1, {"svn:log": b"msg", "svn:author": b"joe"})
+        other = RevPropCache(path=path)
+        self.assertEqual({"svn:log": b"msg", "svn:author": b"joe"},
+                         other.get("uuid", 1))
+        cache.invalidate("uuid", 1)
+        self.assertIs(None, other.get("uuid", 1))
+
+    def test_invalidate_other_process(self):
+        path = os.path.join(self.test_dir, "revprops.db")
+        cache = RevPropCache(path=path)
+        other = RevPropCache(path=path)
+        cache.set("uuid", 1, {"svn:log": b"old"})
+        self.assertEqual({"svn:log": b"old"}, other.get("uuid", 1))
+        cache.invalidate("uuid", 1)
+        cache.set("uuid", 1, {"svn:log": b"new"})
+        self.assertEqual({"svn:log": b"new"}, other.get("uuid", 1))
+        self.assertEqual({"svn:log": b"new"}, cache.get("uuid", 1))
+
+
+class FileContentCacheTests(TestCaseInTempDir):
+
+    def test_add(self):
+        cache = FileContentCache(os.path.join(self.test_dir, "cache"))
+        checksum = cache.add(BytesIO(b"contents"))
+        self.assertEqual(hashlib.sha1(b"contents").hexdigest(), checksum)
+        f = BytesIO()
+        self.assertTrue(cache.copy_to(checksum, f))
+        self.assertEqual(b"contents", f.getvalue())
+        f = BytesIO()
+        self.assertTrue(cache.copy_to(
+            hashlib.md5(b"contents").hexdigest(), f))
+        self.assertEqual(b"contents", f.getvalue())
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(16, cache.bytes_saved)
+
+    def test_missing(self):
+        cache = FileContentCache(os.path.join(self.test_dir, "cache"))
+        self.assertFalse(cache.copy_to("0" * 40, BytesIO()))
+        self.assertFalse(cache.copy_to("0" * 32, BytesIO()))
+        self.assertEqual(2, cache.misses)
+
+    def test_keys(self):
+        cache = FileContentCache(os.path.join(self.test_dir, "cache"))
+        self.assertIs(None, cache.lookup_key("foo@1"))
+        cache.set_key("foo@1", "0" * 40)
+        self.assertEqual("0" * 40, cache.lookup_key("foo@1"))
+
+    def test_evict(self):
+        cache = FileContentCache(
+            os.path.join(self.test_dir, "cache"), max_bytes=10)
+        first = cache.add(BytesIO(b"a" * 6))
+        os.utime(cache._object_path(first), (0, 0))
+        second = cache.add(BytesIO(b"b" * 6))
+        self.assertEqual(6, cache.size())
+        self.assertFalse(cache.copy_to(first, BytesIO()))
+        self.assertTrue(cache.copy_to(second, BytesIO()))
+
+
+class CachingRemoteAccessTests(SubversionTestCase):
+
+    def setUp(self):
+        super(CachingRemoteAccessTests, self).setUp()
+        self.repos_url = self.make_repository("d")
+        dc = self.get_commit_editor(self.repos_url)
+        dc.add_dir("foo")
+        dc.close()
+        self.ra = CachingRemoteAccess(ra.RemoteAccess(
+            self.repos_url, auth=ra.Auth([ra.get_username_provider()])))
+
+    def tearDown(self):
+        del self.ra
+        super(CachingRemoteAccessTests, self).tearDown()
+
+    def test_rev_proplist(self):
+        props = self.ra.rev_proplist(1)
+        self.assertEqual(props, self.ra.rev_proplist(1))
+        self.assertEqual(1, self.ra.revprop_cache.hits)
+        self.assertEqual(1, self.ra.revprop_cache.misses)
+        self.assertEqual(props["svn:log"], self.ra.rev_prop(1, "svn:log"))
+
+    def test_change_rev_prop(self):
+        self.ra.rev_proplist(1)
+        self.ra.change_rev_prop(1, "svn:log", "changed")
+        self.assertEqual(b"changed", self.ra.rev_prop(1, "svn:log"))
+
+    def test_prefetch(self):
+        self.assertEqual(1, self.ra.prefetch_revprops(1, 1))
+        self.ra.rev_proplist(1)
+        self.assertEqual(0, self.ra.revprop_cache.misses)
+
+    def test_get_file(self):
+        dc = self.get_commit_editor(self.repos_url)
+        dc.add_file("bar").modify(b"contents")
+        dc.close()
+        self.ra.content_cache = FileContentCache(
+            os.path.join(self.test_dir, "cache"))
+        f = BytesIO()
+        (fetched_rev, props) = self.ra.get_file("bar", f)
+        self.assertEqual(b"contents", f.getvalue())
+        self.assertEqual(0, self.ra.content_cache.hits)
+        f = BytesIO()
+        self.assertEqual((fetched_rev, props), self.ra.get_file("bar", f))
+        self.assertEqual(b"contents", f.getvalue())
+        self.assertEqual(1, self.ra.content_cache.hits)
+        f = BytesIO()
+        self.ra.get_file(
+            "bar", f, checksum=hashlib.md5(b"contents").hexdigest())
+        self.assertEqual(b"contents", f.getvalue())
+        self.assertEqual(2, self.ra.content_cache.hits)
+
+    def test_get_file_subdir_session(self):
+        dc = self.get_commit_editor(self.repos_url)
+        dc.open_dir("foo").add_file("foo/bar").modify(b"contents")
+        dc.add_file("bar").modify(b"other")
+        dc.close()
+        cache = FileContentCache(os.path.join(self.test_dir, "cache"))
+        self.ra.content_cache = cache
+        f = BytesIO()
+        self.ra.get_file("foo/bar", f)
+        subdir = CachingRemoteAccess(
+            ra.RemoteAccess(self.repos_url + "/foo",
+                            auth=ra.Auth([ra.get_username_provider()])),
+            content_cache=cache)
+        f = BytesIO()
+        subdir.get_file("bar", f)
+        self.assertEqual(b"contents", f.getvalue())
+        self.assertEqual(1, cache.hits)
+        f = BytesIO()
+        self.ra.get_file("bar", f)
+        self.assertEqual(b"other", f.getvalue())
+        self.assertEqual(1, cache.hits)
+
+    def test_get_file_missing(self):
+        self.ra.content_cache = FileContentCache(
+            os.path.join(self.test_dir, "cache"))
+        self.assertRaises(SubversionException, self.ra.get_file,
+                          "nonexistent", BytesIO())
+
+    def test_passthrough(self):
+        self.assertEqual(1, self.ra.get_latest_revnum())
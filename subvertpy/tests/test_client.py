@@ -103,6 +103,57 @@ class TestClient(SubversionTestCase):
                            ignore_keywords=True)
         self.assertEqual(["foo"], os.listdir("de"))
 
+    def test_batched_notify(self):
+        batches = []
+        notifier = client.BatchedNotifier(batches.append, batch_size=2,
+                                          interval=60)
+        self.client.notify_func = notifier
+        self.assertIs(notifier, self.client.notify_func)
+        self.build_tree({"dc/sub": None, "dc/sub/foo": b"bla",
+                         "dc/sub/bar": b"bla", "dc/sub/blie": b"bla"})
+        self.client.add("dc/sub")
+        self.assertEqual([2, 2], [len(batch) for batch in batches])
+        self.assertEqual(0, len(notifier))
+        (path, action, kind, revision, err) = batches[0][0]
+        self.assertTrue(path.endswith("sub"))
+        self.assertEqual(client.NOTIFY_ADD, action)
+        self.assertEqual(NODE_DIR, kind)
+        self.assertIs(None, err)
+
+    def test_batched_notify_filter(self):
+        batches = []
+        self.client.notify_func = client.BatchedNotifier(
+            batches.append, actions=[client.NOTIFY_UPDATE_COMPLETED])
+        self.build_tree({"dc/foo": b"bla"})
+        self.client.add("dc/foo")
+        self.assertEqual([], batches)
+        self.client.export(self.repos_url, "de")
+        self.assertEqual(
+            [[client.NOTIFY_UPDATE_COMPLETED]],
+            [[n[1] for n in batch] for batch in batches])
+
+    def test_batched_notify_failed_checkout(self):
+        batches = []
+        notifier = client.BatchedNotifier(batches.append, batch_size=100,
+                                          interval=60)
+        self.client.notify_func = notifier
+        self.assertRaises(SubversionException, self.client.checkout,
+                          self.repos_url + "/nonexistent", "co")
+        # Whatever the failed checkout queued has been delivered, rather
+        # than being left for the next operation.
+        self.assertEqual(0, len(notifier))
+        del batches[:]
+        self.build_tree({"dc/foo": b"bla"})
+        self.client.add("dc/foo")
+        self.assertEqual(
+            [[client.NOTIFY_ADD]],
+            [[n[1] for n in batch] for batch in batches])
+
+    def test_batched_notify_invalid(self):
+        self.assertRaises(ValueError, client.BatchedNotifier,
+                          lambda batch: None, batch_size=0)
+        self.assertRaises(TypeError, client.BatchedNotifier, None)
+
     def test_add_recursive(self):
         self.build_tree({"dc/trunk/foo": b'bla', "dc/trunk": None})
         self.client.add("dc/trunk")
@@ -15,6 +15,10 @@
 
 """Subversion core library tests."""
 
+import os
+import subprocess
+import sys
+
 import subvertpy
 from subvertpy.tests import TestCase
 
@@ -27,3 +31,34 @@ class TestCore(TestCase):
     def test_exc(self):
         self.assertTrue(
             isinstance(subvertpy.SubversionException("foo", 1), Exception))
+
+
+class TestLazyImport(TestCase):
+
+    def imported_modules(self, statement):
+        """Run a statement in a new interpreter.
+
+        :return: Set with the names of the modules loaded afterwards
+        """
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.path.dirname(
+            os.path.dirname(os.path.abspath(subvertpy.__file__)))
+        env.pop("SUBVERTPY_CHECK_MTIME", None)
+        p = subprocess.Popen(
+            [sys.executable, "-c",
+             statement + "; import sys; print('\\n'.join(sys.modules))"],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (stdout, stderr) = p.communicate()
+        self.assertEqual(0, p.returncode, stderr)
+        return set(stdout.decode("utf-8").splitlines())
+
+    def test_import_does_not_load_extensions(self):
+        modules = self.imported_modules(
+            "import subvertpy, subvertpy.properties, subvertpy.delta")
+        self.assertIn("subvertpy.properties", modules)
+        for name in subvertpy._EXTENSIONS:
+            self.assertNotIn("subvertpy." + name, modules)
+
+    def test_lazy_attribute(self):
+        modules = self.imported_modules("import subvertpy; subvertpy.repos")
+        self.assertIn("subvertpy.repos", modules)
@@ -0,0 +1,258 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for subvertpy.dumpfile."""
+
+from io import BytesIO
+
+from subvertpy.dumpfile import (
+    DumpfileError,
+    FormatVersionRecord,
+    NodeRecord,
+    RevisionRecord,
+    UUIDRecord,
+    parse,
+    parse_props,
+    revision_offsets,
+    split_dumpfile,
+    unparse_props,
+    write_dumpfile,
+    )
+from subvertpy.tests import TestCase, TestCaseInTempDir
+
+
+PREAMBLE = (b"SVN-fs-dump-format-version: 2\n\n"
+            b"UUID: 38f0a982-fd1f-4e00-aa6b-a20720f4b9ca\n\n")
+
+
+def revision_record(revnum, log=b"msg"):
+    props = (b"K 7\nsvn:log\nV %d\n%s\nPROPS-END\n" % (len(log), log))
+    return (b"Revision-number: %d\n"
+            b"Prop-content-length: %d\n"
+            b"Content-length: %d\n\n%s\n" %
+            (revnum, len(props), len(props), props))
+
+
+def node_record(path, text):
+    props = b"PROPS-END\n"
+    return (b"Node-path: %s\n"
+            b"Node-kind: file\n"
+            b"Node-action: add\n"
+            b"Prop-content-length: %d\n"
+            b"Text-content-length: %d\n"
+            b"Content-length: %d\n\n%s%s\n\n" %
+            (path, len(props), len(text), len(props) + len(text),
+             props, text))
+
+
+def make_dumpfile(revisions):
+    records = [PREAMBLE]
+    for i in range(revisions):
+        records.append(revision_record(i))
+        if i > 0:
+            # Bodies that look like headers must be skipped.
+            records.append(node_record(
+                b"file%d" % i, b"Revision-number: 42\n\n" * i))
+    return b"".join(records)
+
+
+class UnseekableFile(object):
+
+    def __init__(self, contents):
+        self._f = BytesIO(contents)
+
+    def seekable(self):
+        return False
+
+    def read(self, size=-1):
+        return self._f.read(size)
+
+    def readline(self):
+        return self._f.readline()
+
+
+class PropsTests(TestCase):
+
+    def test_roundtrip(self):
+        data = b"K 7\nsvn:log\nV 3\nfoo\nD 6\nsvn:eo\nPROPS-END\n"
+        props = parse_props(data)
+        self.assertEqual([("svn:log", b"foo"), ("svn:eo", None)],
+                         list(props.items()))
+        self.assertEqual(data, unparse_props(props))
+
+    def test_empty(self):
+        self.assertEqual({}, parse_props(b"PROPS-END\n"))
+
+    def test_invalid(self):
+        self.assertRaises(DumpfileError, parse_props, b"K 7\nsvn:log\n")
+        self.assertRaises(DumpfileError, parse_props, b"X 1\na\nPROPS-END\n")
+
+
+class ParseTests(TestCase):
+
+    def parse(self, contents):
+        return list(parse(BytesIO(contents)))
+
+    def test_records(self):
+        records = self.parse(make_dumpfile(2))
+        self.assertEqual(
+            [FormatVersionRecord, UUIDRecord, RevisionRecord, RevisionRecord,
+             NodeRecord], [type(r) for r in records])
+        self.assertEqual(2, records[0].version)
+        self.assertEqual("38f0a982-fd1f-4e00-aa6b-a20720f4b9ca",
+                         records[1].uuid)
+        self.assertEqual(1, records[3].revnum)
+        self.assertEqual({"svn:log": b"msg"}, records[3].props)
+        self.assertIs(None, records[3].text)
+        node = records[4]
+        self.assertEqual("file1", node.path)
+        self.assertEqual("file", node.kind)
+        self.assertEqual("add", node.action)
+        self.assertIs(None, node.copyfrom_path)
+        self.assertEqual(-1, node.copyfrom_rev)
+        self.assertEqual({}, node.props)
+        self.assertEqual(len(b"Revision-number: 42\n\n"), len(node.text))
+
+    def test_lazy_text(self):
+        records = self.parse(make_dumpfile(3))
+        nodes = [r for r in records if isinstance(r, NodeRecord)]
+        # Views stay valid after parsing has finished.
+        self.assertEqual(b"Revision-number: 42\n\n" * 2, nodes[1].text.read())
+        self.assertEqual(b"Revision-number: 42\n\n", nodes[0].text.read())
+        self.assertEqual(b"", nodes[0].text.read())
+        nodes[0].text.seek(0)
+        self.assertEqual(b"Rev", nodes[0].text.read(3))
+
+    def test_stream(self):
+        texts = []
+        for record in parse(UnseekableFile(make_dumpfile(3))):
+            if record.text is not None:
+                texts.append(record.text.read(5))
+        self.assertEqual([b"Revis", b"Revis"], texts)
+
+    def test_stream_stale_view(self):
+        records = list(parse(UnseekableFile(make_dumpfile(3))))
+        nodes = [r for r in records if isinstance(r, NodeRecord)]
+        self.assertRaises(DumpfileError, nodes[0].text.read)
+
+    def test_invalid(self):
+        self.assertRaises(DumpfileError, self.parse, b"garbage\n")
+
+
+class MmapTests(TestCaseInTempDir):
+
+    def test_mmap(self):
+        with open("dump", "wb") as f:
+            f.write(make_dumpfile(2))
+        with open("dump", "rb") as f:
+            records = list(parse(f, use_mmap=True))
+            node = records[-1]
+            self.assertEqual(b"Revision-number: 42\n\n",
+                             node.text.getbuffer().tobytes())
+            self.assertEqual(b"Revision-number: 42\n\n", node.text.read())
+            out = BytesIO()
+            write_dumpfile(out, records)
+            self.assertEqual(make_dumpfile(2), out.getvalue())
+
+    def test_empty(self):
+        with open("dump", "wb"):
+            pass
+        with open("dump", "rb") as f:
+            self.assertEqual([], list(parse(f, use_mmap=True)))
+
+
+class WriteTests(TestCase):
+
+    def test_roundtrip(self):
+        contents = make_dumpfile(4)
+        out = BytesIO()
+        write_dumpfile(out, parse(BytesIO(contents)))
+        self.assertEqual(contents, out.getvalue())
+
+    def test_roundtrip_stream(self):
+        contents = make_dumpfile(4)
+        out = BytesIO()
+        write_dumpfile(out, parse(UnseekableFile(contents)))
+        self.assertEqual(contents, out.getvalue())
+
+    def test_filter(self):
+        out = BytesIO()
+        records = []
+        for record in parse(BytesIO(make_dumpfile(3))):
+            if isinstance(record, NodeRecord) and record.path == "file1":
+                continue
+            if isinstance(record, RevisionRecord):
+                record.props["svn:log"] = b"rewritten"
+            records.append(record)
+        write_dumpfile(out, records)
+        records = list(parse(BytesIO(out.getvalue())))
+        self.assertEqual(["file2"], [r.path for r in records
+                                     if isinstance(r, NodeRecord)])
+        self.assertEqual([b"rewritten"] * 3,
+                         [r.props["svn:log"] for r in records
+                          if isinstance(r, RevisionRecord)])
+
+    def test_set_text(self):
+        records = list(parse(BytesIO(make_dumpfile(2))))
+        node = records[-1]
+        node.set_header(b"Text-content-md5", b"0" * 32)
+        node.set_text(b"new contents")
+        self.assertIs(None, node.get_header(b"Text-content-md5"))
+        out = BytesIO()
+        write_dumpfile(out, records)
+        node = list(parse(BytesIO(out.getvalue())))[-1]
+        self.assertEqual(b"new contents", node.text.read())
+        self.assertEqual(b"22", node.get_header(b"Content-length"))
+
+
+class SplitTests(TestCase):
+
+    def test_revision_offsets(self):
+        contents = make_dumpfile(3)
+        offsets = list(revision_offsets(BytesIO(contents)))
+        self.assertEqual([0, 1, 2], [revnum for (revnum, offset) in offsets])
+        for (revnum, offset) in offsets:
+            self.assertTrue(contents[offset:].startswith(
+                b"Revision-number: %d\n" % revnum))
+
+    def test_split_one(self):
+        contents = make_dumpfile(3)
+        self.assertEqual(
+            [(0, 2, len(PREAMBLE), len(contents))],
+            split_dumpfile(BytesIO(contents), 1))
+
+    def test_split(self):
+        contents = make_dumpfile(10)
+        ranges = split_dumpfile(BytesIO(contents), 3)
+        self.assertEqual(3, len(ranges))
+        self.assertEqual(0, ranges[0][0])
+        self.assertEqual(9, ranges[-1][1])
+        self.assertEqual(len(PREAMBLE), ranges[0][2])
+        self.assertEqual(len(contents), ranges[-1][3])
+        for (first, second) in zip(ranges, ranges[1:]):
+            self.assertEqual(first[1] + 1, second[0])
+            self.assertEqual(first[3], second[2])
+
+    def test_split_more_parts_than_revisions(self):
+        contents = make_dumpfile(2)
+        self.assertEqual(2, len(split_dumpfile(BytesIO(contents), 5)))
+
+    def test_split_empty(self):
+        self.assertEqual([], split_dumpfile(BytesIO(PREAMBLE), 2))
+
+    def test_split_invalid(self):
+        self.assertRaises(ValueError, split_dumpfile, BytesIO(PREAMBLE), 0)
+        self.assertRaises(DumpfileError, split_dumpfile,
+                          BytesIO(b"garbage\n"), 2)
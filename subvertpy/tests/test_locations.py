@@ -0,0 +1,147 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for subvertpy.locations."""
+
+from io import StringIO
+
+from subvertpy import ERR_FS_NOT_FOUND, SubversionException, ra
+from subvertpy.locations import LocationIndex
+from subvertpy.tests import SubversionTestCase, TestCase
+
+
+def make_index():
+    index = LocationIndex()
+    index.add_revision(0, {})
+    index.add_revision(1, {"/trunk": ("A", None, -1)})
+    index.add_revision(2, {"/trunk/foo": ("A", None, -1)})
+    index.add_revision(3, {"/trunk/foo": ("M", None, -1)})
+    index.add_revision(4, {"/branches": ("A", None, -1),
+                           "/branches/b": ("A", "/trunk", 2)})
+    index.add_revision(5, {"/branches/b/bar": ("A", "/branches/b/foo", 4),
+                           "/branches/b/foo": ("D", None, -1)})
+    return index
+
+
+class LocationIndexTests(TestCase):
+
+    def test_get_locations(self):
+        index = make_index()
+        self.assertEqual(
+            {5: "/branches/b/bar", 4: "/branches/b/foo", 2: "/trunk/foo"},
+            index.get_locations("branches/b/bar", 5, [1, 2, 3, 4, 5]))
+
+    def test_get_locations_unrelated(self):
+        index = make_index()
+        self.assertEqual({3: "/trunk/foo", 2: "/trunk/foo"},
+                         index.get_locations("/trunk/foo", 3, [1, 2, 3]))
+
+    def test_get_location_segments(self):
+        index = make_index()
+        segments = []
+        index.get_location_segments(
+            "/branches/b/bar", -1, -1, -1,
+            lambda *args: segments.append(args))
+        self.assertEqual(
+            [(5, 5, "branches/b/bar"), (4, 4, "branches/b/foo"),
+             (3, 3, None), (2, 2, "trunk/foo")], segments)
+
+    def test_get_location_segments_range(self):
+        index = make_index()
+        segments = []
+        index.get_location_segments(
+            "/branches/b/bar", 5, 4, 3, lambda *args: segments.append(args))
+        self.assertEqual([(4, 4, "branches/b/foo"), (3, 3, None)], segments)
+
+    def test_deleted(self):
+        index = make_index()
+        self.assertEqual(
+            {4: "/branches/b/foo", 2: "/trunk/foo"},
+            index.get_locations("/branches/b/foo", 4, [2, 4]))
+        try:
+            index.get_locations("/branches/b/foo", 5, [4])
+        except SubversionException as e:
+            self.assertEqual(ERR_FS_NOT_FOUND, e.args[1])
+        else:
+            self.fail("deleted node was found")
+
+    def test_readded(self):
+        index = make_index()
+        index.add_revision(6, {"/trunk/foo": ("D", None, -1)})
+        index.add_revision(7, {"/trunk/foo": ("A", None, -1)})
+        self.assertEqual({7: "/trunk/foo"},
+                         index.get_locations("/trunk/foo", 7, [5, 6, 7]))
+        self.assertRaises(SubversionException, index.get_locations,
+                          "/trunk/foo", 6, [6])
+
+    def test_deleted_in_copy(self):
+        index = make_index()
+        index.add_revision(6, {"/tags": ("A", None, -1),
+                               "/tags/t": ("A", "/trunk", 5),
+                               "/tags/t/foo": ("D", None, -1)})
+        self.assertRaises(SubversionException, index.get_locations,
+                          "/tags/t/foo", 6, [5])
+        self.assertEqual({6: "/tags/t", 5: "/trunk"},
+                         index.get_locations("/tags/t", 6, [5, 6]))
+
+    def test_missing(self):
+        index = make_index()
+        self.assertRaises(SubversionException, index.get_locations,
+                          "/trunk/foo", 1, [1])
+        self.assertRaises(SubversionException, index.get_locations,
+                          "/branches/b/nonexistent", 5, [5])
+
+    def test_not_indexed(self):
+        index = make_index()
+        self.assertRaises(ValueError, index.get_locations, "/trunk", 6, [1])
+        self.assertRaises(ValueError, index.add_revision, 5, {})
+
+    def test_save_load(self):
+        f = StringIO()
+        make_index().save(f)
+        f.seek(0)
+        index = LocationIndex.load(f)
+        self.assertEqual(5, index.revnum)
+        self.assertEqual(
+            {5: "/branches/b/bar", 2: "/trunk/foo"},
+            index.get_locations("branches/b/bar", 5, [2, 5]))
+
+
+class LocationIndexUpdateTests(SubversionTestCase):
+
+    def test_update(self):
+        repos_url = self.make_repository("d")
+        dc = self.get_commit_editor(repos_url)
+        trunk = dc.add_dir("trunk")
+        trunk.add_file("trunk/foo").modify(b"data")
+        dc.close()
+        dc = self.get_commit_editor(repos_url)
+        dc.add_dir("branch", "trunk", 1)
+        dc.close()
+        conn = ra.RemoteAccess(repos_url)
+        index = LocationIndex()
+        self.assertEqual(3, index.update(conn))
+        self.assertEqual(0, index.update(conn))
+        self.assertEqual(
+            conn.get_locations("branch/foo", 2, [1, 2]),
+            index.get_locations("branch/foo", 2, [1, 2]))
+
+    def test_update_not_at_root(self):
+        repos_url = self.make_repository("d")
+        dc = self.get_commit_editor(repos_url)
+        dc.add_dir("trunk")
+        dc.close()
+        conn = ra.RemoteAccess(repos_url + "/trunk")
+        self.assertRaises(ValueError, LocationIndex().update, conn)
@@ -0,0 +1,161 @@
+# Copyright (C) 2017 Jelmer Vernooij <jelmer@jelmer.uk>
+
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for subvertpy.parallel."""
+
+import os
+
+from subvertpy import ra, repos
+from subvertpy.parallel import parallel_export, parallel_verify
+from subvertpy.tests import SubversionTestCase
+
+
+class ParallelExportTests(SubversionTestCase):
+
+    def setUp(self):
+        super(ParallelExportTests, self).setUp()
+        self.repos_url = self.make_repository("d")
+        self.auth = ra.Auth([ra.get_username_provider()])
+
+    def export(self, url, dest, **kwargs):
+        return parallel_export(url, dest, auth=self.auth, **kwargs)
+
+    def test_empty(self):
+        self.assertEqual(0, self.export(self.repos_url, "e"))
+        self.assertEqual([], os.listdir("e"))
+
+    def test_tree(self):
+        dc = self.get_commit_editor(self.repos_url)
+        dc.add_dir("foo")
+        dc.add_file("foo/bar").modify(b"bar contents")
+        dc.add_dir("foo/sub")
+        dc.add_file("foo/sub/blie").modify(b"blie contents")
+        dc.add_file("top").modify(b"top contents")
+        dc.close()
+        self.assertEqual(1, self.export(self.repos_url, "e", workers=3))
+        self.assertEqual(["foo", "top"], sorted(os.listdir("e")))
+        with open("e/foo/bar", "rb") as f:
+            self.assertEqual(b"bar contents", f.read())
+        with open("e/foo/sub/blie", "rb") as f:
+            self.assertEqual(b"blie contents", f.read())
+        with open("e/top", "rb") as f:
+            self.assertEqual(b"top contents", f.read())
+
+    def test_older_revision(self):
+        dc = self.get_commit_editor(self.repos_url)
+        dc.add_file("foo").modify(b"old")
+        dc.close()
+        dc = self.get_commit_editor(self.repos_url)
+        dc.open_file("foo").modify(b"new")
+        dc.add_file("bar").modify(b"bar")
+        dc.close()
+        self.assertEqual(1, self.export(self.repos_url, "e", revision=1))
+        self.assertEqual(["foo"], os.listdir("e"))
+        with open("e/foo", "rb") as f:
+            self.assertEqual(b"old", f.read())
+
+    def test_progress(self):
+        dc = self.get_commit_editor(self.repos_url)
+        dc.add_file("a").modify(b"a")
+        dc.add_file("b").modify(b"b")
+        dc.close()
+        reports = []
+        self.export(self.repos_url, "e",
+                    progress=lambda done, total: reports.append(
+                        (done, total)))
+        self.assertEqual((2, 2), reports[-1])
+
+    def test_executable(self):
+        dc = self.get_commit_editor(self.repos_url)
+        f = dc.add_file("script")
+        f.modify(b"#!/bin/sh\n")
+        f.change_prop("svn:executable", "*")
+        dc.close()
+        self.export(self.repos_url, "e")
+        self.assertTrue(os.access("e/script", os.X_OK))
+
+    def test_special(self):
+        if not getattr(os, "symlink", None):
+            self.skipTest("symlinks not supported")
+        dc = self.get_commit_editor(self.repos_url)
+        f = dc.add_file("link")
+        f.modify(b"link target")
+        f.change_prop("svn:special", "*")
+        dc.close()
+        self.export(self.repos_url, "e")
+        self.assertTrue(os.path.islink("e/link"))
+        self.assertEqual("target", os.readlink("e/link"))
+
+    def test_invalid_workers(self):
+        self.assertRaises(ValueError, self.export, self.repos_url, "e",
+                          workers=0)
+
+
+class ParallelVerifyTests(SubversionTestCase):
+
+    def setUp(self):
+        super(ParallelVerifyTests, self).setUp()
+        if repos.api_version() < (1, 7):
+            self.skipTest("verify progress requires svn >= 1.7")
+        self.repos_url = self.make_repository("d")
+        self.repos_path = os.path.join(self.test_dir, "d")
+        for name in ("a", "b", "c"):
+            dc = self.get_commit_editor(self.repos_url)
+            dc.add_file(name).modify(name.encode("ascii"))
+            dc.close()
+
+    def test_verify(self):
+        reports = []
+        result = parallel_verify(
+            self.repos_path, workers=2, chunk_size=1,
+            progress=lambda revnum, error, elapsed: reports.append(
+                (revnum, error)))
+        self.assertTrue(result.ok)
+        self.assertEqual(4, result.verified)
+        self.assertEqual((0, 3), (result.start_rev, result.end_rev))
+        self.assertEqual([(0, None), (1, None), (2, None), (3, None)],
+                         sorted(reports))
+
+    def test_corrupt(self):
+        rev_path = os.path.join(self.repos_path, "db", "revs", "0", "2")
+        if not os.path.exists(rev_path):
+            rev_path = os.path.join(self.repos_path, "db", "revs", "2")
+        with open(rev_path, "wb") as f:
+            f.write(b"garbage\n")
+        result = parallel_verify(self.repos_path, 1, 3, chunk_size=1)
+        self.assertFalse(result.ok)
+        # Later revisions may depend on the corrupt one, but earlier ones
+        # should still pass.
+        self.assertEqual(2, min(result.errors))
+        self.assertEqual(3, result.verified + len(result.errors))
+
+    def test_corrupt_chunk(self):
+        rev_path = os.path.join(self.repos_path, "db", "revs", "0", "2")
+        if not os.path.exists(rev_path):
+            rev_path = os.path.join(self.repos_path, "db", "revs", "2")
+        with open(rev_path, "wb") as f:
+            f.write(b"garbage\n")
+        reports = []
+        result = parallel_verify(
+            self.repos_path, 0, 3, workers=1, chunk_size=4,
+            progress=lambda revnum, error, elapsed: reports.append(revnum))
+        self.assertFalse(result.ok)
+        self.assertEqual(2, min(result.errors))
+        self.assertEqual(4, result.verified + len(result.errors))
+        # Every revision is reported exactly once.
+        self.assertEqual([0, 1, 2, 3], sorted(reports))
+
+    def test_invalid_range(self):
+        self.assertRaises(ValueError, parallel_verify, self.repos_path, 2, 1)
@@ -64,15 +64,24 @@ class TestProperties(TestCase):
 
 class TestExternalsParser(TestCase):
     def test_parse_root_relative_externals(self):
+        self.assertEqual(
+            {"third-party/skins": (None, "http://example.com/repos/foo")},
+            properties.parse_externals_description(
+                "http://example.com/repos/trunk",
+                "third-party/skins              ^/foo",
+                repos_root_url="http://example.com/repos"))
+
+    def test_parse_root_relative_externals_no_root(self):
         self.assertRaises(
-                NotImplementedError,
+                ValueError,
                 properties.parse_externals_description,
                 "http://example.com", "third-party/skins              ^/foo")
 
     def test_parse_scheme_relative_externals(self):
-        self.assertRaises(
-                NotImplementedError, properties.parse_externals_description,
-                "http://example.com", "third-party/skins              //foo")
+        self.assertEqual(
+            {"third-party/skins": (None, "http://foo/bar")},
+            properties.parse_externals_description(
+                "http://example.com", "//foo/bar   third-party/skins"))
 
     def test_parse_externals(self):
         self.assertEqual({
@@ -143,6 +152,66 @@ third-party/sounds             http://sounds.red-bean.com/repos
             lambda: properties.parse_externals_description(
                 None, "bla -R40 http://bla/"))
 
+    def test_parse_peg_revision(self):
+        self.assertEqual(
+            (properties.ExternalDefinition(
+                "skins", "http://svn.example.com/skinproj", 20, 18),),
+            properties.parse_externals(
+                "http://example.com",
+                "-r20 http://svn.example.com/skinproj@18 skins"))
+        self.assertEqual(
+            {"skins": (18, "http://svn.example.com/skinproj")},
+            properties.parse_externals_description(
+                "http://example.com",
+                "http://svn.example.com/skinproj@18 skins"))
+
+    def test_parse_head_revision(self):
+        self.assertEqual(
+            (properties.ExternalDefinition(
+                "skins", "http://svn.example.com/skinproj", None, None),),
+            properties.parse_externals(
+                "http://example.com",
+                "-r HEAD http://svn.example.com/skinproj@HEAD skins"))
+        self.assertEqual(
+            (properties.ExternalDefinition(
+                "skins", "http://svn.example.com/skinproj", None, 18),),
+            properties.parse_externals(
+                "http://example.com",
+                "skins -rhead http://svn.example.com/skinproj@18"))
+
+    def test_parse_date_revision(self):
+        self.assertRaises(
+            properties.InvalidExternalsDescription,
+            properties.parse_externals, "http://example.com",
+            "-r {2006-02-17} http://svn.example.com/skinproj skins")
+        self.assertRaises(
+            properties.InvalidExternalsDescription,
+            properties.parse_externals, "http://example.com",
+            "http://svn.example.com/skinproj@{2006-02-17} skins")
+
+    def test_parse_invalid_revision(self):
+        self.assertRaises(
+            properties.InvalidExternalsDescription,
+            properties.parse_externals, "http://example.com",
+            "-r PREV http://svn.example.com/skinproj skins")
+
+    def test_parse_quoted(self):
+        self.assertEqual(
+            (properties.ExternalDefinition(
+                "My Project", "http://example.com/repos/foo", None, None),
+             properties.ExternalDefinition(
+                "My Other Project", "http://example.com/repos/bar", 5,
+                None)),
+            properties.parse_externals(
+                "http://example.com/repos/trunk",
+                '../foo "My Project"\n-r 5 ../bar My\\ Other\\ Project\n'))
+
+    def test_cached(self):
+        value = "third-party/sounds http://sounds.red-bean.com/repos"
+        self.assertIs(
+            properties.parse_externals("http://example.com", value),
+            properties.parse_externals("http://example.com", value))
+
 
 class MergeInfoPropertyParserTests(TestCase):
     def test_simple_range(self):
@@ -163,6 +232,26 @@ class MergeInfoPropertyParserTests(TestCase):
     def test_empty(self):
         self.assertEqual({}, properties.parse_mergeinfo_property(""))
 
+    def test_multiple(self):
+        self.assertEqual(
+                {"/trunk": [(1, 2, True), (4, 4, False), (6, 9, True)],
+                 "/branches/a:b": [(3, 3, True)]},
+                properties.parse_mergeinfo_property(
+                    "/trunk:1-2,4*,6-9\n/branches/a:b:3\n"))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, properties.parse_mergeinfo_property,
+                          "/trunk:1-2,x\n")
+        self.assertRaises(ValueError, properties.parse_mergeinfo_property,
+                          "trunk:1\n")
+
+    def test_cached_result_not_shared(self):
+        first = properties.parse_mergeinfo_property("/trunk:1\n")
+        properties.range_add_revnum(first["/trunk"], 3)
+        self.assertEqual(
+                {"/trunk": [(1, 1, True)]},
+                properties.parse_mergeinfo_property("/trunk:1\n"))
+
 
 class MergeInfoPropertyCreatorTests(TestCase):
     def test_simple_range(self):
@@ -244,3 +333,83 @@ class MergeInfoIncludeTests(TestCase):
         self.assertFalse(
             properties.mergeinfo_includes_revision(
                 {"/trunk": [(1, 5, True)]}, "/trunk", 30))
+
+
+class RangeListTests(TestCase):
+
+    def test_normalize(self):
+        self.assertEqual(
+            [(1, 5, True), (7, 7, False)],
+            list(properties.RangeList(
+                [(4, 5, True), (1, 3, True), (2, 4, True), (7, 7, False)])))
+
+    def test_parse(self):
+        ranges = properties.RangeList.parse("1-3,5*,6-8")
+        self.assertEqual([(1, 3, True), (5, 5, False), (6, 8, True)],
+                         list(ranges))
+        self.assertEqual("1-3,5*,6-8", str(ranges))
+        self.assertEqual(7, ranges.revision_count())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, properties.RangeList.parse, "5-3")
+        self.assertRaises(ValueError, properties.RangeList.parse, "a")
+
+    def test_contains(self):
+        ranges = properties.RangeList.parse("1-3,6")
+        self.assertIn(2, ranges)
+        self.assertIn(6, ranges)
+        self.assertNotIn(4, ranges)
+        self.assertNotIn(0, ranges)
+
+    def test_union(self):
+        self.assertEqual(
+            properties.RangeList.parse("1-8,10*"),
+            properties.RangeList.parse("1-3,5-6*,10*") |
+            properties.RangeList.parse("4-8"))
+
+    def test_intersect(self):
+        self.assertEqual(
+            properties.RangeList.parse("2-3,5*"),
+            properties.RangeList.parse("1-3,5-6*") &
+            properties.RangeList.parse("2-5"))
+
+    def test_remove(self):
+        self.assertEqual(
+            properties.RangeList.parse("1,4-5*"),
+            properties.RangeList.parse("1-3,4-6*") -
+            properties.RangeList.parse("2-3,6"))
+
+    def test_inheritable(self):
+        self.assertEqual(
+            properties.RangeList.parse("1-3"),
+            properties.RangeList.parse("1-3,4-6*").inheritable())
+
+
+class MergeinfoTests(TestCase):
+
+    def test_parse(self):
+        mergeinfo = properties.Mergeinfo.parse("/trunk:1-3,5*\n/b:4\n")
+        self.assertEqual({"/trunk": [(1, 3, True), (5, 5, False)],
+                          "/b": [(4, 4, True)]}, mergeinfo.to_dict())
+        self.assertEqual("/b:4\n/trunk:1-3,5*\n", str(mergeinfo))
+
+    def test_from_dict(self):
+        self.assertEqual(
+            properties.Mergeinfo.parse("/trunk:1-3\n"),
+            properties.Mergeinfo.from_dict({"/trunk": [(1, 3, True)]}))
+
+    def test_set_operations(self):
+        a = properties.Mergeinfo.parse("/trunk:1-5\n/b:3\n")
+        b = properties.Mergeinfo.parse("/trunk:4-8\n/c:2\n")
+        self.assertEqual("/b:3\n/c:2\n/trunk:1-8\n", str(a | b))
+        self.assertEqual("/trunk:4-5\n", str(a & b))
+        self.assertEqual("/b:3\n/trunk:1-3\n", str(a - b))
+
+    def test_inherit(self):
+        mergeinfo = properties.Mergeinfo.parse("/trunk:1-5,7*\n/b:3*\n")
+        self.assertEqual("/trunk/foo:1-5\n",
+                         str(mergeinfo.inherit("foo")))
+        self.assertTrue(properties.Mergeinfo.parse(
+            "/trunk/foo:1-5\n").elides_to(mergeinfo, "foo"))
+        self.assertFalse(properties.Mergeinfo.parse(
+            "/trunk/foo:1-6\n").elides_to(mergeinfo, "foo"))
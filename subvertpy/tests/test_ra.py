@@ -18,7 +18,7 @@
 from io import BytesIO
 
 from subvertpy import (
-    NODE_DIR, NODE_NONE, NODE_UNKNOWN,
+    NODE_DIR, NODE_FILE, NODE_NONE, NODE_UNKNOWN,
     SubversionException,
     ra,
     )
@@ -116,6 +116,31 @@ class TestRemoteAccess(SubversionTestCase):
         self.assertEqual(1, fetch_rev)
         self.assertEqual(NODE_DIR, dirents["foo"]["kind"])
 
+    def test_get_dir_dirent(self):
+        self.do_commit()
+        (dirents, fetch_rev, props) = self.ra.get_dir(
+                "/", 1, fields=ra.DIRENT_KIND | ra.DIRENT_CREATED_REV)
+        dirent = dirents["foo"]
+        self.assertIsInstance(dirent, ra.Dirent)
+        self.assertEqual(NODE_DIR, dirent.kind)
+        self.assertEqual(1, dirent.created_rev)
+        self.assertIs(None, dirent.size)
+        self.assertEqual({"kind": NODE_DIR, "created_rev": 1}, dirent)
+        self.assertEqual(set(["kind", "created_rev"]), set(dirent))
+        self.assertNotIn("size", dirent)
+        self.assertRaises(KeyError, lambda: dirent["size"])
+
+    def test_get_dir_columnar(self):
+        self.do_commit()
+        (columns, fetch_rev, props) = self.ra.get_dir(
+                "/", 1, fields=ra.DIRENT_KIND | ra.DIRENT_LAST_AUTHOR,
+                columnar=True)
+        self.assertEqual(1, fetch_rev)
+        self.assertEqual(set(["name", "kind", "last_author"]), set(columns))
+        self.assertEqual(["foo"], columns["name"])
+        self.assertEqual([NODE_DIR], list(columns["kind"]))
+        self.assertEqual(1, len(columns["last_author"]))
+
     def test_change_rev_prop(self):
         self.do_commit()
         self.ra.change_rev_prop(1, "foo", "bar")
@@ -197,6 +222,34 @@ class TestRemoteAccess(SubversionTestCase):
             revprops=["svn:date", "svn:author", "svn:log"]))
         check_results(returned)
 
+    def test_iter_log_columnar(self):
+        if ra.api_version() < (1, 6):
+            self.assertRaises(NotImplementedError, self.ra.iter_log,
+                              None, 0, 1, columnar=True)
+            return
+        self.do_commit()
+        dc = self.commit_editor()
+        dc.add_dir("bar", "foo", 1)
+        dc.close()
+        batches = list(self.ra.iter_log(None, 0, 2, columnar=True,
+                                        batch_size=1))
+        self.assertEqual(2, len(batches))
+        self.assertEqual([1], list(batches[0]["revnum"]))
+        self.assertEqual(["/foo"], batches[0]["path"])
+        self.assertEqual([None], batches[0]["copyfrom_path"])
+        self.assertEqual([ord("A")], list(batches[0]["action"]))
+        self.assertEqual([NODE_DIR], list(batches[0]["node_kind"]))
+        self.assertEqual([-1], list(batches[0]["copyfrom_rev"]))
+        self.assertEqual([2], list(batches[1]["revnum"]))
+        self.assertEqual(["/bar"], batches[1]["path"])
+        self.assertEqual(["/foo"], batches[1]["copyfrom_path"])
+        self.assertIs(batches[0]["path"][0], batches[1]["copyfrom_path"][0])
+        self.assertEqual([1], list(batches[1]["copyfrom_rev"]))
+
+    def test_iter_log_columnar_invalid_batch_size(self):
+        self.assertRaises(ValueError, self.ra.iter_log, None, 0, 0,
+                          columnar=True, batch_size=0)
+
     def test_get_log(self):
         returned = []
 
@@ -371,6 +424,64 @@ class TestRemoteAccess(SubversionTestCase):
         stream.seek(0)
         self.assertEqual(b"a", stream.read())
 
+    def test_commit_tree(self):
+        revs = []
+        revnum = self.ra.commit_tree(
+            {"svn:log": "import"},
+            {"trunk": ("add", NODE_DIR, None, {"bla": "bloe"}),
+             "trunk/foo": ("add", NODE_FILE, b"foo\n"),
+             "trunk/bar": ("add", NODE_FILE, BytesIO(b"bar\n"),
+                           {"svn:executable": "*"})},
+            lambda *args: revs.append(args))
+        self.assertEqual(1, revnum)
+        self.assertEqual(1, revs[0][0])
+        self.assertEqual(b"import", self.ra.rev_proplist(1)["svn:log"])
+
+        stream = BytesIO()
+        props = self.ra.get_file("trunk/bar", stream, 1)[1]
+        self.assertEqual(b"bar\n", stream.getvalue())
+        self.assertEqual(b"*", props["svn:executable"])
+        self.assertEqual(
+            b"bloe", self.ra.get_dir("trunk", 1)[2]["bla"])
+
+        revnum = self.ra.commit_tree(
+            {"svn:log": "change"},
+            {"trunk": ("modify", NODE_DIR, None, {"bla": None}),
+             "trunk/foo": ("modify", NODE_FILE, b"foo2\n"),
+             "trunk/bar": ("delete",),
+             "branch": ("copy", NODE_DIR, None, None,
+                        (self.repos_url + "/trunk", 1))})
+        self.assertEqual(2, revnum)
+
+        stream = BytesIO()
+        self.ra.get_file("trunk/foo", stream, 2)
+        self.assertEqual(b"foo2\n", stream.getvalue())
+        self.assertEqual(NODE_NONE, self.ra.check_path("trunk/bar", 2))
+        self.assertEqual(NODE_FILE, self.ra.check_path("branch/bar", 2))
+        self.assertNotIn("bla", self.ra.get_dir("trunk", 2)[2])
+
+    def test_commit_tree_invalid(self):
+        self.assertRaises(ValueError, self.ra.commit_tree,
+                          {"svn:log": "msg"}, {"foo": ("rename",)})
+        self.assertRaises(ValueError, self.ra.commit_tree,
+                          {"svn:log": "msg"}, {"foo": ("copy", NODE_DIR)})
+        self.assertRaises(TypeError, self.ra.commit_tree,
+                          {"svn:log": "msg"},
+                          {"foo": ("add", NODE_FILE, u"text")})
+        self.assertEqual(0, self.ra.get_latest_revnum())
+
+    def test_commit_tree_delete_root(self):
+        self.assertRaises(ValueError, self.ra.commit_tree,
+                          {"svn:log": "msg"}, {"": ("delete",)})
+        self.assertEqual(0, self.ra.get_latest_revnum())
+
+    def test_commit_tree_conflict(self):
+        self.ra.commit_tree({"svn:log": "msg"}, {"foo": ("add", NODE_DIR)})
+        self.assertRaises(SubversionException, self.ra.commit_tree,
+                          {"svn:log": "msg"}, {"foo": ("add", NODE_DIR)})
+        # The session is usable after a failed commit.
+        self.assertEqual(1, self.ra.get_latest_revnum())
+
     def test_get_locations_root(self):
         self.assertEqual({0: "/"}, self.ra.get_locations("", 0, [0]))
 
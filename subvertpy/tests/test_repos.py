@@ -15,12 +15,15 @@
 
 """Subversion repository library tests."""
 
-from io import BytesIO
+import hashlib
+from io import BufferedReader, BytesIO
 import os
+import shutil
 import textwrap
+from unittest import SkipTest
 
-from subvertpy import repos, SubversionException
-from subvertpy.tests import TestCaseInTempDir, TestCase
+from subvertpy import NODE_DIR, NODE_FILE, repos, SubversionException
+from subvertpy.tests import SubversionTestCase, TestCaseInTempDir, TestCase
 
 
 class VersionTest(TestCase):
@@ -35,6 +38,35 @@ class VersionTest(TestCase):
         self.assertTrue(repos.api_version() <= repos.version())
 
 
+class CacheConfigTests(TestCaseInTempDir):
+
+    def setUp(self):
+        super(CacheConfigTests, self).setUp()
+        if repos.api_version() < (1, 7):
+            self.assertRaises(NotImplementedError, repos.get_cache_config)
+            raise SkipTest("cache configuration requires svn >= 1.7")
+        self.addCleanup(repos.set_cache_config, **repos.get_cache_config())
+
+    def test_set_cache_config(self):
+        repos.set_cache_config(file_handle_count=32, cache_fulltexts=True,
+                               cache_txdeltas=False)
+        config = repos.get_cache_config()
+        self.assertEqual(32, config["file_handle_count"])
+        self.assertEqual(True, config["cache_fulltexts"])
+        self.assertEqual(False, config["cache_txdeltas"])
+
+    def test_unchanged(self):
+        before = repos.get_cache_config()
+        repos.set_cache_config()
+        self.assertEqual(before, repos.get_cache_config())
+
+    def test_open(self):
+        repos.set_cache_config(cache_fulltexts=False)
+        repos.create(os.path.join(self.test_dir, "foo"))
+        self.assertEqual(
+            0, repos.Repository("foo").fs().youngest_revision())
+
+
 class TestRepository(TestCaseInTempDir):
 
     def setUp(self):
@@ -43,6 +75,43 @@ class TestRepository(TestCaseInTempDir):
     def test_create(self):
         repos.create(os.path.join(self.test_dir, "foo"))
 
+    def test_hotcopy(self):
+        repos.create(os.path.join(self.test_dir, "foo"))
+        repos.hotcopy(os.path.join(self.test_dir, "foo"),
+                      os.path.join(self.test_dir, "bar"))
+        self.assertEqual(
+            0, repos.Repository("bar").fs().youngest_revision())
+
+    def test_hotcopy_incremental(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        src = os.path.join(self.test_dir, "foo")
+        dest = os.path.join(self.test_dir, "bar")
+        if repos.api_version() < (1, 8):
+            self.assertRaises(NotImplementedError, repos.hotcopy, src, dest,
+                              incremental=True)
+            return
+        repos.hotcopy(src, dest)
+        r.load_fs(BytesIO(textwrap.dedent("""\
+            SVN-fs-dump-format-version: 2
+
+            Revision-number: 1
+            Prop-content-length: 10
+            Content-length: 10
+
+            PROPS-END
+
+            """).encode("ascii")))
+        ranges = []
+        if repos.api_version() < (1, 9):
+            repos.hotcopy(src, dest, incremental=True)
+        else:
+            repos.hotcopy(src, dest, incremental=True,
+                          notify_func=lambda start, end: ranges.append(
+                              (start, end)))
+            self.assertEqual(1, ranges[-1][1])
+        self.assertEqual(
+            1, repos.Repository(dest).fs().youngest_revision())
+
     def test_capability(self):
         r = repos.create(os.path.join(self.test_dir, "foo"))
         if repos.api_version() < (1, 5):
@@ -57,6 +126,20 @@ class TestRepository(TestCaseInTempDir):
         r.verify_fs(f, 0, 0)
         self.assertEqual(b'* Verified revision 0.\n', f.getvalue())
 
+    def test_verify_fs_progress(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        reports = []
+        if repos.api_version() < (1, 7):
+            self.assertRaises(NotImplementedError, r.verify_fs, None, 0, 0,
+                              progress_func=reports.append)
+            return
+        f = BytesIO()
+        r.verify_fs(f, 0, 0,
+                    progress_func=lambda revnum, elapsed: reports.append(
+                        revnum))
+        self.assertEqual([0], reports)
+        self.assertEqual(b'* Verified revision 0.\n', f.getvalue())
+
     def test_open(self):
         repos.create(os.path.join(self.test_dir, "foo"))
         repos.Repository("foo")
@@ -82,9 +165,7 @@ class TestRepository(TestCaseInTempDir):
             SubversionException, r.load_fs, BytesIO(dumpfile),
             feedback, repos.LOAD_UUID_DEFAULT)
 
-    def test_load_fs(self):
-        r = repos.create(os.path.join(self.test_dir, "foo"))
-        dumpfile = textwrap.dedent("""\
+    DUMPFILE = textwrap.dedent("""\
         SVN-fs-dump-format-version: 2
 
         UUID: 38f0a982-fd1f-4e00-aa6b-a20720f4b9ca
@@ -99,11 +180,131 @@ class TestRepository(TestCaseInTempDir):
         2011-08-26T13:08:30.187858Z
         PROPS-END
         """).encode("ascii")
+
+    def test_load_fs(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
         feedback = BytesIO()
-        r.load_fs(BytesIO(dumpfile), feedback, repos.LOAD_UUID_DEFAULT)
+        r.load_fs(BytesIO(self.DUMPFILE), feedback, repos.LOAD_UUID_DEFAULT)
         self.assertEqual(r.fs().get_uuid(),
                          "38f0a982-fd1f-4e00-aa6b-a20720f4b9ca")
 
+    def test_load_fs_path(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        with open("dump", "wb") as f:
+            f.write(self.DUMPFILE)
+        r.load_fs("dump")
+        self.assertEqual(r.fs().get_uuid(),
+                         "38f0a982-fd1f-4e00-aa6b-a20720f4b9ca")
+
+    def test_load_fs_file(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        with open("dump", "wb") as f:
+            f.write(self.DUMPFILE)
+        with open("dump", "rb") as f:
+            r.load_fs(f, uuid_action=repos.LOAD_UUID_FORCE)
+        self.assertEqual(r.fs().get_uuid(),
+                         "38f0a982-fd1f-4e00-aa6b-a20720f4b9ca")
+
+    DUMPFILE_REV1 = DUMPFILE + textwrap.dedent("""\
+
+        Revision-number: 1
+        Prop-content-length: 10
+        Content-length: 10
+
+        PROPS-END
+
+        Node-path: trunk
+        Node-kind: dir
+        Node-action: add
+        Prop-content-length: 10
+        Content-length: 10
+
+        PROPS-END
+
+        """).encode("ascii")
+
+    def test_load_fs_progress(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        if repos.api_version() < (1, 8):
+            raise SkipTest("load progress requires Subversion 1.8")
+        dumpfile = self.DUMPFILE_REV1
+        progress = []
+        r.load_fs(BytesIO(dumpfile),
+                  progress_func=lambda *args: progress.append(args))
+        self.assertEqual(1, r.fs().youngest_revision())
+        self.assertEqual([1], [p[0] for p in progress])
+        (revnum, nodes, bytes_read, elapsed) = progress[0]
+        self.assertEqual(1, nodes)
+        self.assertTrue(0 < bytes_read <= len(dumpfile))
+
+    def test_load_fs_progress_and_feedback(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        if repos.api_version() < (1, 8):
+            raise SkipTest("load progress requires Subversion 1.8")
+        feedback = BytesIO()
+        progress = []
+        r.load_fs(BytesIO(self.DUMPFILE_REV1), feedback,
+                  progress_func=lambda *args: progress.append(args))
+        self.assertEqual([1], [p[0] for p in progress])
+        self.assertIn(b"     * adding path : trunk ... done.\n",
+                      feedback.getvalue())
+        self.assertIn(b"------- Committed revision 1 >>>",
+                      feedback.getvalue())
+
+    def test_dump_fs(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        f = BytesIO()
+        self.assertEqual(0, r.dump_fs(f))
+        self.assertTrue(
+            f.getvalue().startswith(b"SVN-fs-dump-format-version: "))
+        self.assertTrue(b"\nRevision-number: 0\n" in f.getvalue())
+
+    def test_dump_fs_file(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        with open("dump", "wb") as f:
+            r.dump_fs(f, 0, 0)
+        with open("dump", "rb") as f:
+            dumpfile = f.read()
+        r2 = repos.create(os.path.join(self.test_dir, "bar"))
+        r2.load_fs(BytesIO(dumpfile), BytesIO(), repos.LOAD_UUID_FORCE)
+        self.assertEqual(r.fs().get_uuid(), r2.fs().get_uuid())
+
+    def test_dump_fs_progress(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        if repos.api_version() < (1, 7):
+            raise SkipTest("dump progress requires Subversion 1.7")
+        progress = []
+        f = BytesIO()
+        r.dump_fs(f, progress_func=lambda *args: progress.append(args))
+        self.assertEqual(1, len(progress))
+        (revnum, written, elapsed) = progress[0]
+        self.assertEqual(0, revnum)
+        self.assertEqual(len(f.getvalue()), written)
+        self.assertTrue(elapsed >= 0)
+
+    def test_dump_fs_interrupted(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+
+        class Interrupted(Exception):
+            pass
+
+        def progress(revnum, written, elapsed):
+            raise Interrupted()
+        f = BytesIO()
+        try:
+            r.dump_fs(f, progress_func=progress)
+        except Interrupted as e:
+            self.assertEqual(0, e.last_revnum)
+            self.assertEqual(len(f.getvalue()), e.last_offset)
+        else:
+            if repos.api_version() >= (1, 7):
+                self.fail("dump_fs did not raise")
+
+    def test_dump_fs_invalid_range(self):
+        r = repos.create(os.path.join(self.test_dir, "foo"))
+        self.assertRaises(ValueError, r.dump_fs, BytesIO(), 0, 5)
+        self.assertRaises(ValueError, r.dump_fs, BytesIO(), 1, 0)
+
     def test_rev_props(self):
         repos.create(os.path.join(self.test_dir, "foo"))
         self.assertEqual(
@@ -144,6 +345,212 @@ class TestRepository(TestCaseInTempDir):
         # self.assertEqual(False, root.is_file("nonexistant"))
 
 
+class RecordingEditor(object):
+    """Editor that records the paths that are added or opened."""
+
+    def __init__(self, actions=None, path=""):
+        if actions is None:
+            actions = []
+        self.actions = actions
+        self.path = path
+
+    def set_target_revision(self, revnum):
+        pass
+
+    def open_root(self, base_revnum=-1):
+        return self
+
+    def add_directory(self, path, copyfrom_path=None, copyfrom_rev=-1):
+        self.actions.append(("add", path))
+        return RecordingEditor(self.actions, path)
+
+    def open_directory(self, path, base_revnum=-1):
+        self.actions.append(("open", path))
+        return RecordingEditor(self.actions, path)
+
+    def add_file(self, path, copyfrom_path=None, copyfrom_rev=-1):
+        self.actions.append(("add", path))
+        return RecordingEditor(self.actions, path)
+
+    def open_file(self, path, base_revnum=-1):
+        self.actions.append(("open", path))
+        return RecordingEditor(self.actions, path)
+
+    def delete_entry(self, path, revnum=-1):
+        self.actions.append(("delete", path))
+
+    def change_prop(self, name, value):
+        pass
+
+    def apply_textdelta(self, base_checksum=None):
+        return lambda window: None
+
+    def close(self, checksum=None):
+        pass
+
+
+class FileSystemRootTests(SubversionTestCase):
+
+    def setUp(self):
+        super(FileSystemRootTests, self).setUp()
+        repos_url = self.make_repository("d")
+        dc = self.get_commit_editor(repos_url)
+        trunk = dc.add_dir("trunk")
+        trunk.add_file("trunk/foo").modify(b"data")
+        sub = trunk.add_dir("trunk/sub")
+        sub.add_file("trunk/sub/bar").modify(b"bar")
+        dc.change_prop("svn:ignore", "foo")
+        dc.close()
+        dc = self.get_commit_editor(repos_url)
+        trunk = dc.open_dir("trunk")
+        trunk.open_file("trunk/foo").modify(b"changed")
+        trunk.delete("trunk/sub")
+        dc.close()
+        self.repos_url = repos_url
+        self.fs = repos.Repository(os.path.join(self.test_dir, "d")).fs()
+        self.root = self.fs.revision_root(1)
+
+    def test_dir_entries(self):
+        self.assertEqual({"trunk": NODE_DIR}, self.root.dir_entries(""))
+        self.assertEqual({"foo": NODE_FILE, "sub": NODE_DIR},
+                         self.root.dir_entries("trunk"))
+
+    def test_walk(self):
+        self.assertEqual([
+            ("/", NODE_DIR, -1, None, None),
+            ("/trunk", NODE_DIR, -1, None, None),
+            ("/trunk/foo", NODE_FILE, 4, None, None),
+            ("/trunk/sub", NODE_DIR, -1, None, None),
+            ("/trunk/sub/bar", NODE_FILE, 3, None, None)],
+            list(self.root.walk("", batch_size=2)))
+
+    def test_walk_subdir(self):
+        self.assertEqual(
+            ["/trunk/sub", "/trunk/sub/bar"],
+            [entry[0] for entry in self.root.walk("trunk/sub/")])
+
+    def test_walk_props(self):
+        entries = list(self.root.walk("", include_props=True))
+        self.assertEqual(b"foo", entries[0][4]["svn:ignore"])
+        self.assertEqual({}, entries[2][4])
+
+    def test_walk_checksums(self):
+        if repos.api_version() < (1, 6):
+            self.assertRaises(NotImplementedError, self.root.walk, "",
+                              include_checksums=True)
+            return
+        entries = list(self.root.walk("trunk/sub", include_checksums=True))
+        self.assertEqual(
+            [None, hashlib.md5(b"bar").hexdigest()],
+            [entry[3] for entry in entries])
+
+    def test_node_history(self):
+        self.assertEqual(
+            [("/trunk/foo", 2), ("/trunk/foo", 1)],
+            list(self.fs.revision_root(2).node_history(
+                "trunk/foo", batch_size=1)))
+
+    def test_node_history_copies(self):
+        dc = self.get_commit_editor(self.repos_url)
+        dc.add_dir("branch", "trunk", 2)
+        dc.close()
+        root = self.fs.revision_root(3)
+        self.assertEqual(
+            [("/branch/foo", 3), ("/trunk/foo", 2), ("/trunk/foo", 1)],
+            list(root.node_history("branch/foo")))
+        self.assertEqual(
+            [("/branch/foo", 3)],
+            list(root.node_history("branch/foo", cross_copies=False)))
+
+    def test_replay(self):
+        editor = RecordingEditor()
+        self.fs.revision_root(2).replay(editor, 0, False)
+        self.assertEqual(
+            [("delete", "trunk/sub"), ("open", "trunk"),
+             ("open", "trunk/foo")], sorted(editor.actions))
+
+    def test_dir_delta(self):
+        editor = RecordingEditor()
+        repos.dir_delta(self.fs.revision_root(0), "", self.root, "", editor)
+        self.assertEqual(
+            [("add", "trunk"), ("add", "trunk/foo"), ("add", "trunk/sub"),
+             ("add", "trunk/sub/bar")], sorted(editor.actions))
+
+    def test_revision_root_cache(self):
+        info = self.fs.root_cache_info()
+        self.assertEqual(1, info["misses"])
+        self.assertIs(self.root, self.fs.revision_root(1))
+        self.assertIsNot(self.root, self.fs.revision_root(2))
+        info = self.fs.root_cache_info()
+        self.assertEqual((1, 2, 2), (info["hits"], info["misses"],
+                                     info["size"]))
+
+    def test_revision_root_cache_size(self):
+        self.fs.set_root_cache_size(1)
+        root = self.fs.revision_root(1)
+        self.assertIsNot(self.root, root)
+        self.fs.revision_root(2)
+        self.assertIsNot(root, self.fs.revision_root(1))
+        self.assertEqual(1, self.fs.root_cache_info()["size"])
+        self.fs.clear_root_cache()
+        self.assertEqual(0, self.fs.root_cache_info()["size"])
+        self.assertRaises(ValueError, self.fs.set_root_cache_size, -1)
+
+    def test_node_cache(self):
+        self.assertTrue(self.root.is_dir("trunk"))
+        self.assertTrue(self.root.is_dir("trunk"))
+        self.assertEqual(4, self.root.file_length("trunk/foo"))
+        self.assertEqual(4, self.root.file_length("trunk/foo"))
+        props = self.root.proplist("")
+        props["svn:ignore"] = b"bar"
+        self.assertEqual(b"foo", self.root.proplist("")["svn:ignore"])
+        info = self.root.cache_info()
+        self.assertEqual((3, 3, 3), (info["hits"], info["misses"],
+                                     info["size"]))
+
+    def test_node_cache_disabled(self):
+        self.fs.set_root_cache_size(0, node_cache_size=0)
+        root = self.fs.revision_root(1)
+        self.assertTrue(root.is_dir("trunk"))
+        self.assertTrue(root.is_dir("trunk"))
+        self.assertEqual(
+            {"hits": 0, "misses": 0, "size": 0, "max_size": 0},
+            root.cache_info())
+
+    def test_file_content(self):
+        stream = self.root.file_content("trunk/foo")
+        self.assertEqual(4, len(stream))
+        self.assertTrue(stream.readable())
+        buf = bytearray(3)
+        self.assertEqual(3, stream.readinto(buf))
+        self.assertEqual(b"dat", bytes(buf))
+        self.assertEqual(3, stream.tell())
+        buf = bytearray(b"xyz")
+        self.assertEqual(1, stream.readinto(memoryview(buf)[1:]))
+        self.assertEqual(b"xaz", bytes(buf))
+        self.assertEqual(0, stream.readinto(buf))
+        stream.close()
+        self.assertTrue(stream.closed)
+
+    def test_file_content_seek(self):
+        if repos.api_version() < (1, 7):
+            raise SkipTest("svn_stream_skip requires Subversion 1.7")
+        stream = self.root.file_content("trunk/foo")
+        self.assertEqual(2, stream.seek(2))
+        self.assertEqual(b"ta", stream.read(2))
+        self.assertEqual(4, stream.tell())
+        if stream.seekable():
+            self.assertEqual(1, stream.seek(-3, 2))
+            self.assertEqual(b"ata", stream.read(3))
+        stream.close()
+
+    def test_file_content_copyfileobj(self):
+        f = BytesIO()
+        shutil.copyfileobj(
+            BufferedReader(self.root.file_content("trunk/foo")), f)
+        self.assertEqual(b"data", f.getvalue())
+
+
 class StreamTests(TestCase):
 
     def test_read(self):
@@ -155,6 +562,16 @@ class StreamTests(TestCase):
             self.assertEqual(b"", s.read(15))
         s.close()
 
+    def test_readinto(self):
+        s = repos.Stream()
+        self.assertEqual(0, s.readinto(bytearray(10)))
+        self.assertEqual(0, len(s))
+        self.assertTrue(s)
+        self.assertFalse(s.closed)
+        s.close()
+        self.assertTrue(s.closed)
+        self.assertRaises(ValueError, s.readinto, bytearray(10))
+
     def test_write(self):
         s = repos.Stream()
         self.assertEqual(0, s.write(b""))
@@ -482,25 +482,150 @@ bool relpath_list_to_apr_array(apr_pool_t *pool, PyObject *l, apr_array_header_t
 	return true;
 }
 
-PyObject *prop_hash_to_dict(apr_hash_t *props)
+/* Cache of Python strings for property names, so that names that occur
+ * over and over again (svn:log, svn:date, ...) are not recreated for
+ * every property hash that is converted. Open addressing on a fixed size
+ * table; once it is three quarters full no new names are added. */
+#define PROP_NAME_CACHE_SIZE 512
+#define PROP_NAME_CACHE_MAX_LEN 64
+#define PROP_NAME_CACHE_MAX_PROBE 8
+
+typedef struct {
+	char name[PROP_NAME_CACHE_MAX_LEN];
+	apr_ssize_t len;
+	PyObject *py_name;
+} PropNameCacheEntry;
+
+static PropNameCacheEntry prop_name_cache[PROP_NAME_CACHE_SIZE];
+static int prop_name_cache_used = 0;
+static bool prop_name_cache_seeded = false;
+
+static const char *well_known_prop_names[] = {
+	SVN_PROP_REVISION_LOG,
+	SVN_PROP_REVISION_AUTHOR,
+	SVN_PROP_REVISION_DATE,
+	"svn:original-date",
+	SVN_PROP_MIME_TYPE,
+	SVN_PROP_IGNORE,
+	SVN_PROP_EOL_STYLE,
+	SVN_PROP_KEYWORDS,
+	SVN_PROP_EXECUTABLE,
+	SVN_PROP_NEEDS_LOCK,
+	SVN_PROP_SPECIAL,
+	SVN_PROP_EXTERNALS,
+	SVN_PROP_ENTRY_COMMITTED_REV,
+	SVN_PROP_ENTRY_COMMITTED_DATE,
+	SVN_PROP_ENTRY_LAST_AUTHOR,
+	SVN_PROP_ENTRY_UUID,
+	SVN_PROP_ENTRY_LOCK_TOKEN,
+#if ONLY_SINCE_SVN(1, 5)
+	SVN_PROP_MERGEINFO,
+#endif
+	"svn:sync-from-url",
+	"svn:sync-from-uuid",
+	"svn:sync-last-merged-rev",
+	"svn:sync-lock",
+	NULL
+};
+
+static apr_size_t prop_name_hash(const char *name, apr_ssize_t len)
+{
+	/* FNV-1a */
+	apr_size_t hash = 2166136261U;
+	apr_ssize_t i;
+	for (i = 0; i < len; i++) {
+		hash ^= (unsigned char)name[i];
+		hash *= 16777619U;
+	}
+	return hash;
+}
+
+static PyObject *prop_name_cache_lookup(const char *name, apr_ssize_t len, bool insert)
+{
+	apr_size_t hash, i, slot;
+	PropNameCacheEntry *entry;
+
+	if (len >= PROP_NAME_CACHE_MAX_LEN)
+		return PyUnicode_FromStringAndSize(name, len);
+
+	hash = prop_name_hash(name, len);
+	for (i = 0; i < PROP_NAME_CACHE_MAX_PROBE; i++) {
+		slot = (hash + i) % PROP_NAME_CACHE_SIZE;
+		entry = &prop_name_cache[slot];
+		if (entry->py_name == NULL) {
+			PyObject *py_name = PyUnicode_FromStringAndSize(name, len);
+			if (py_name == NULL)
+				return NULL;
+			if (!insert ||
+				prop_name_cache_used >= PROP_NAME_CACHE_SIZE * 3 / 4)
+				return py_name;
+#if PY_MAJOR_VERSION >= 3
+			PyUnicode_InternInPlace(&py_name);
+#endif
+			memcpy(entry->name, name, len);
+			entry->len = len;
+			entry->py_name = py_name;
+			prop_name_cache_used++;
+			Py_INCREF(py_name);
+			return py_name;
+		}
+		if (entry->len == len && memcmp(entry->name, name, len) == 0) {
+			Py_INCREF(entry->py_name);
+			return entry->py_name;
+		}
+	}
+
+	return PyUnicode_FromStringAndSize(name, len);
+}
+
+/**
+ * Get a Python string for a property name.
+ *
+ * Well-known and frequently seen names are returned from a cache rather
+ * than allocated again.
+ */
+PyObject *py_prop_name(const char *name, apr_ssize_t len)
+{
+	PyObject *py_name;
+	int i;
+
+	if (!prop_name_cache_seeded) {
+		prop_name_cache_seeded = true;
+		for (i = 0; well_known_prop_names[i] != NULL; i++) {
+			py_name = prop_name_cache_lookup(well_known_prop_names[i],
+											 strlen(well_known_prop_names[i]),
+											 true);
+			if (py_name == NULL)
+				return NULL;
+			Py_DECREF(py_name);
+		}
+	}
+
+	return prop_name_cache_lookup(name, len, true);
+}
+
+/**
+ * Convert a hash with svn_string_t property values to a Python dictionary.
+ *
+ * :param props: Hash to convert, may be NULL
+ * :param scratch_pool: Pool to allocate the hash iterator in; if NULL, the
+ *  internal iterator of the hash is used.
+ */
+PyObject *prop_hash_to_dict(apr_hash_t *props, apr_pool_t *scratch_pool)
 {
 	const char *key;
 	apr_hash_index_t *idx;
 	apr_ssize_t klen;
 	svn_string_t *val;
-	apr_pool_t *pool;
 	PyObject *py_props;
 	if (props == NULL) {
 		return PyDict_New();
 	}
-	pool = Pool(NULL);
-	if (pool == NULL)
-		goto fail_pool;
 	py_props = PyDict_New();
 	if (py_props == NULL) {
-		goto fail_props;
+		return NULL;
 	}
-	for (idx = apr_hash_first(pool, props); idx != NULL;
+	for (idx = apr_hash_first(scratch_pool, props); idx != NULL;
 		 idx = apr_hash_next(idx)) {
 		PyObject *py_key, *py_val;
 		apr_hash_this(idx, (const void **)&key, &klen, (void **)&val);
@@ -511,31 +636,30 @@ PyObject *prop_hash_to_dict(apr_hash_t *props)
 			py_val = PyBytes_FromStringAndSize(val->data, val->len);
 		}
 		if (py_val == NULL) {
-			goto fail_item;
+			Py_DECREF(py_props);
+			return NULL;
 		}
 		if (key == NULL) {
 			py_key = Py_None;
 			Py_INCREF(py_key);
 		} else {
-			py_key = PyUnicode_FromStringAndSize(key, klen);
+			py_key = py_prop_name(key, klen);
+			if (py_key == NULL) {
+				Py_DECREF(py_val);
+				Py_DECREF(py_props);
+				return NULL;
+			}
 		}
 		if (PyDict_SetItem(py_props, py_key, py_val) != 0) {
 			Py_DECREF(py_key);
 			Py_DECREF(py_val);
-			goto fail_item;
+			Py_DECREF(py_props);
+			return NULL;
 		}
 		Py_DECREF(py_key);
 		Py_DECREF(py_val);
 	}
-	apr_pool_destroy(pool);
 	return py_props;
-
-fail_item:
-	Py_DECREF(py_props);
-fail_props:
-	apr_pool_destroy(pool);
-fail_pool:
-	return NULL;
 }
 
 apr_hash_t *prop_dict_to_hash(apr_pool_t *pool, PyObject *py_props)
@@ -770,7 +894,7 @@ svn_error_t *py_svn_log_entry_receiver(void *baton, svn_log_entry_t *log_entry,
 	py_changed_paths = pyify_changed_paths(log_entry->changed_paths, false, pool);
 	CB_CHECK_PYRETVAL(py_changed_paths);
 
-	revprops = prop_hash_to_dict(log_entry->revprops);
+	revprops = prop_hash_to_dict(log_entry->revprops, pool);
 	CB_CHECK_PYRETVAL(revprops);
 
 	ret = PyObject_CallFunction((PyObject *)baton, "OlOb", py_changed_paths,
@@ -910,6 +1034,160 @@ svn_stream_t *new_py_stream(apr_pool_t *pool, PyObject *py)
 	return stream;
 }
 
+static apr_file_t *apr_file_from_object_flags(PyObject *object,
+											 apr_int32_t flags,
+											 apr_pool_t *pool);
+
+typedef struct {
+	svn_stream_t *inner;
+	apr_file_t *file;
+} FlushingStreamBaton;
+
+static svn_error_t *flushing_stream_write(void *baton, const char *data, apr_size_t *len)
+{
+	FlushingStreamBaton *flushing = baton;
+	return svn_stream_write(flushing->inner, data, len);
+}
+
+static svn_error_t *flushing_stream_close(void *baton)
+{
+	FlushingStreamBaton *flushing = baton;
+	apr_status_t status;
+
+	/* The descriptor belongs to the Python object, so only flush. */
+	status = apr_file_flush(flushing->file);
+	if (status != APR_SUCCESS)
+		return svn_error_wrap_apr(status, "Unable to flush file");
+	return NULL;
+}
+
+static svn_stream_t *py_disowned_stream(apr_pool_t *pool, PyObject *py)
+{
+	svn_stream_t *stream = new_py_stream(pool, py);
+	if (stream == NULL)
+		return NULL;
+	return svn_stream_disown(stream, pool);
+}
+
+/**
+ * Create a stream for writing to a Python object.
+ *
+ * If the object is backed by a real file descriptor, data is written
+ * to it directly without taking the GIL for every chunk. Other file-like
+ * objects fall back to new_py_stream().
+ *
+ * Writes to a file descriptor are buffered, so callers have to close the
+ * stream when they are done with it. Closing it does not close the Python
+ * object.
+ */
+svn_stream_t *new_py_output_stream(apr_pool_t *pool, PyObject *py)
+{
+	apr_file_t *file;
+	PyObject *ret;
+	int fd;
+	FlushingStreamBaton *flushing;
+	svn_stream_t *stream;
+
+	if (!PyObject_HasAttrString(py, "fileno"))
+		return py_disowned_stream(pool, py);
+
+	fd = PyObject_AsFileDescriptor(py);
+	if (fd == -1) {
+		/* io.BytesIO and friends have a fileno() that raises. */
+		PyErr_Clear();
+		return py_disowned_stream(pool, py);
+	}
+
+	/* Anything buffered on the Python side has to end up in the file
+	 * before the data we write directly to the descriptor. */
+	if (PyObject_HasAttrString(py, "flush")) {
+		ret = PyObject_CallMethod(py, "flush", "");
+		if (ret == NULL)
+			return NULL;
+		Py_DECREF(ret);
+	}
+
+	file = apr_file_from_object_flags(py,
+			APR_FOPEN_WRITE | APR_FOPEN_BUFFERED, pool);
+	if (file == NULL)
+		return NULL;
+
+	flushing = apr_palloc(pool, sizeof(FlushingStreamBaton));
+	flushing->inner = svn_stream_from_aprfile2(file, TRUE, pool);
+	flushing->file = file;
+	stream = svn_stream_create(flushing, pool);
+	svn_stream_set_write(stream, flushing_stream_write);
+	svn_stream_set_close(stream, flushing_stream_close);
+	return stream;
+}
+
+/**
+ * Create a stream for reading from a path, file descriptor or Python
+ * object.
+ *
+ * Paths and objects backed by a real file descriptor are read through
+ * APR, without taking the GIL. Other file-like objects fall back to
+ * new_py_stream().
+ */
+svn_stream_t *new_py_input_stream(apr_pool_t *pool, PyObject *py)
+{
+	apr_file_t *file;
+	const char *path;
+	svn_error_t *err;
+	PyObject *ret;
+	apr_off_t offset;
+	int fd;
+
+	if (PyUnicode_Check(py) || PyBytes_Check(py)) {
+		path = py_object_to_svn_dirent(py, pool);
+		if (path == NULL)
+			return NULL;
+		Py_BEGIN_ALLOW_THREADS
+		err = svn_io_file_open(&file, path, APR_READ | APR_BUFFERED,
+							   APR_OS_DEFAULT, pool);
+		Py_END_ALLOW_THREADS
+		if (err != NULL) {
+			handle_svn_error(err);
+			svn_error_clear(err);
+			return NULL;
+		}
+		return svn_stream_from_aprfile2(file, FALSE, pool);
+	}
+
+	fd = PyObject_AsFileDescriptor(py);
+	if (fd == -1) {
+		PyErr_Clear();
+		return new_py_stream(pool, py);
+	}
+
+	/* Without buffering, svn_stream_readline() would cost a read() per
+	 * byte of the dumpfile headers. */
+	file = apr_file_from_object_flags(py, APR_FOPEN_READ | APR_FOPEN_BUFFERED,
+									  pool);
+	if (file == NULL)
+		return NULL;
+
+	/* Buffered Python file objects may have read ahead of the position
+	 * they report, so continue from the latter. */
+	if (PyObject_HasAttrString(py, "tell")) {
+		ret = PyObject_CallMethod(py, "tell", "");
+		if (ret == NULL) {
+			/* Not seekable, e.g. a pipe. */
+			PyErr_Clear();
+		} else {
+			offset = PyLong_AsLongLong(ret);
+			Py_DECREF(ret);
+			if (offset == -1 && PyErr_Occurred()) {
+				PyErr_Clear();
+			} else {
+				apr_file_seek(file, APR_SET, &offset);
+			}
+		}
+	}
+
+	return svn_stream_from_aprfile2(file, TRUE, pool);
+}
+
 svn_error_t *py_cancel_check(void *cancel_baton)
 {
 	PyGILState_STATE state = PyGILState_Ensure();
@@ -950,55 +1228,388 @@ apr_hash_t *config_hash_from_object(PyObject *config, apr_pool_t *pool)
     }
 }
 
+static const struct {
+	const char *name;
+	unsigned int field;
+} dirent_fields_by_name[] = {
+	{ "kind", SVN_DIRENT_KIND },
+	{ "size", SVN_DIRENT_SIZE },
+	{ "has_props", SVN_DIRENT_HAS_PROPS },
+	{ "created_rev", SVN_DIRENT_CREATED_REV },
+	{ "time", SVN_DIRENT_TIME },
+	{ "last_author", SVN_DIRENT_LAST_AUTHOR },
+	{ NULL, 0 }
+};
+
+static PyObject *dirent_get_field(DirentObject *self, unsigned int field)
+{
+	switch (field) {
+		case SVN_DIRENT_KIND:
+#if PY_MAJOR_VERSION < 3
+			return PyInt_FromLong(self->kind);
+#else
+			return PyLong_FromLong(self->kind);
+#endif
+		case SVN_DIRENT_SIZE:
+			return PyLong_FromLongLong(self->size);
+		case SVN_DIRENT_HAS_PROPS:
+			return PyBool_FromLong(self->has_props);
+		case SVN_DIRENT_CREATED_REV:
+			return PyLong_FromLong(self->created_rev);
+		case SVN_DIRENT_TIME:
+			return PyLong_FromLongLong(self->time);
+		case SVN_DIRENT_LAST_AUTHOR:
+			if (self->last_author == NULL)
+				Py_RETURN_NONE;
+			Py_INCREF(self->last_author);
+			return self->last_author;
+	}
+	PyErr_BadInternalCall();
+	return NULL;
+}
+
+static unsigned int dirent_field_from_key(PyObject *key)
+{
+	const char *name;
+	unsigned int ret = 0;
+	int i;
+
+	if (PyUnicode_Check(key)) {
+		key = PyUnicode_AsUTF8String(key);
+		if (key == NULL) {
+			PyErr_Clear();
+			return 0;
+		}
+	} else if (PyBytes_Check(key)) {
+		Py_INCREF(key);
+	} else {
+		return 0;
+	}
+
+	name = PyBytes_AsString(key);
+	for (i = 0; dirent_fields_by_name[i].name != NULL; i++) {
+		if (!strcmp(name, dirent_fields_by_name[i].name)) {
+			ret = dirent_fields_by_name[i].field;
+			break;
+		}
+	}
+	Py_DECREF(key);
+	return ret;
+}
+
+/**
+ * Convert a svn_dirent_t to a Python object.
+ *
+ * Only the fields set in dirent_fields are available; the result can be
+ * used as a read-only mapping with the field names as keys.
+ */
 PyObject *py_dirent(const svn_dirent_t *dirent, int dirent_fields)
 {
-	PyObject *ret, *obj;
-	ret = PyDict_New();
+	DirentObject *ret;
+
+	ret = PyObject_New(DirentObject, &Dirent_Type);
 	if (ret == NULL)
 		return NULL;
-	if (dirent_fields & SVN_DIRENT_KIND) {
-#if PY_MAJOR_VERSION < 3
-		obj = PyInt_FromLong(dirent->kind);
+
+	ret->fields = dirent_fields;
+	ret->kind = dirent->kind;
+	ret->size = dirent->size;
+	ret->has_props = dirent->has_props;
+	ret->created_rev = dirent->created_rev;
+	ret->time = dirent->time;
+	if ((dirent_fields & SVN_DIRENT_LAST_AUTHOR) && dirent->last_author != NULL) {
+		ret->last_author = PyBytes_FromString(dirent->last_author);
+		if (ret->last_author == NULL) {
+			Py_DECREF(ret);
+			return NULL;
+		}
+	} else {
+		ret->last_author = NULL;
+	}
+	return (PyObject *)ret;
+}
+
+static void dirent_dealloc(PyObject *self)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	Py_XDECREF(dirent->last_author);
+	PyObject_Del(self);
+}
+
+static PyObject *dirent_attr(PyObject *self, void *closure)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	unsigned int field = (unsigned int)(apr_uintptr_t)closure;
+
+	if (!(dirent->fields & field))
+		Py_RETURN_NONE;
+
+	return dirent_get_field(dirent, field);
+}
+
+static PyObject *dirent_keys(PyObject *self)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	PyObject *ret, *name;
+	int i;
+
+	ret = PyList_New(0);
+	if (ret == NULL)
+		return NULL;
+
+	for (i = 0; dirent_fields_by_name[i].name != NULL; i++) {
+		if (!(dirent->fields & dirent_fields_by_name[i].field))
+			continue;
+#if PY_MAJOR_VERSION >= 3
+		name = PyUnicode_FromString(dirent_fields_by_name[i].name);
 #else
-		obj = PyLong_FromLong(dirent->kind);
+		name = PyString_FromString(dirent_fields_by_name[i].name);
 #endif
-		PyDict_SetItemString(ret, "kind", obj);
-		Py_DECREF(obj);
+		if (name == NULL || PyList_Append(ret, name) != 0) {
+			Py_XDECREF(name);
+			Py_DECREF(ret);
+			return NULL;
+		}
+		Py_DECREF(name);
 	}
-	if (dirent_fields & SVN_DIRENT_SIZE) {
-		obj = PyLong_FromLongLong(dirent->size);
-		PyDict_SetItemString(ret, "size", obj);
-		Py_DECREF(obj);
+	return ret;
+}
+
+static PyObject *dirent_values(PyObject *self)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	PyObject *ret, *value;
+	int i;
+
+	ret = PyList_New(0);
+	if (ret == NULL)
+		return NULL;
+
+	for (i = 0; dirent_fields_by_name[i].name != NULL; i++) {
+		if (!(dirent->fields & dirent_fields_by_name[i].field))
+			continue;
+		value = dirent_get_field(dirent, dirent_fields_by_name[i].field);
+		if (value == NULL || PyList_Append(ret, value) != 0) {
+			Py_XDECREF(value);
+			Py_DECREF(ret);
+			return NULL;
+		}
+		Py_DECREF(value);
 	}
-	if (dirent_fields & SVN_DIRENT_HAS_PROPS) {
-		obj = PyBool_FromLong(dirent->has_props);
-		PyDict_SetItemString(ret, "has_props", obj);
-		Py_DECREF(obj);
+	return ret;
+}
+
+static PyObject *dirent_to_dict(PyObject *self)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	PyObject *ret, *value;
+	int i;
+
+	ret = PyDict_New();
+	if (ret == NULL)
+		return NULL;
+
+	for (i = 0; dirent_fields_by_name[i].name != NULL; i++) {
+		if (!(dirent->fields & dirent_fields_by_name[i].field))
+			continue;
+		value = dirent_get_field(dirent, dirent_fields_by_name[i].field);
+		if (value == NULL ||
+			PyDict_SetItemString(ret, dirent_fields_by_name[i].name, value) != 0) {
+			Py_XDECREF(value);
+			Py_DECREF(ret);
+			return NULL;
+		}
+		Py_DECREF(value);
 	}
-	if (dirent_fields & SVN_DIRENT_CREATED_REV) {
-		obj = PyLong_FromLong(dirent->created_rev);
-		PyDict_SetItemString(ret, "created_rev", obj);
-		Py_DECREF(obj);
+	return ret;
+}
+
+static PyObject *dirent_items(PyObject *self)
+{
+	PyObject *dict, *ret;
+
+	dict = dirent_to_dict(self);
+	if (dict == NULL)
+		return NULL;
+	ret = PyDict_Items(dict);
+	Py_DECREF(dict);
+	return ret;
+}
+
+static PyObject *dirent_get(PyObject *self, PyObject *args)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	PyObject *key, *default_value = Py_None;
+	unsigned int field;
+
+	if (!PyArg_ParseTuple(args, "O|O:get", &key, &default_value))
+		return NULL;
+
+	field = dirent_field_from_key(key);
+	if (!(dirent->fields & field)) {
+		Py_INCREF(default_value);
+		return default_value;
 	}
-	if (dirent_fields & SVN_DIRENT_TIME) {
-		obj = PyLong_FromLongLong(dirent->time);
-		PyDict_SetItemString(ret, "time", obj);
-		Py_DECREF(obj);
+
+	return dirent_get_field(dirent, field);
+}
+
+static Py_ssize_t dirent_len(PyObject *self)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	Py_ssize_t ret = 0;
+	int i;
+
+	for (i = 0; dirent_fields_by_name[i].name != NULL; i++) {
+		if (dirent->fields & dirent_fields_by_name[i].field)
+			ret++;
 	}
-	if (dirent_fields & SVN_DIRENT_LAST_AUTHOR) {
-		if (dirent->last_author != NULL) {
-			obj = PyBytes_FromString(dirent->last_author);
-		} else {
-			obj = Py_None;
-			Py_INCREF(obj);
+	return ret;
+}
+
+static PyObject *dirent_subscript(PyObject *self, PyObject *key)
+{
+	DirentObject *dirent = (DirentObject *)self;
+	unsigned int field;
+
+	field = dirent_field_from_key(key);
+	if (!(dirent->fields & field)) {
+		PyErr_SetObject(PyExc_KeyError, key);
+		return NULL;
+	}
+
+	return dirent_get_field(dirent, field);
+}
+
+static int dirent_contains(PyObject *self, PyObject *key)
+{
+	DirentObject *dirent = (DirentObject *)self;
+
+	return (dirent->fields & dirent_field_from_key(key))?1:0;
+}
+
+static PyObject *dirent_iter(PyObject *self)
+{
+	PyObject *keys, *ret;
+
+	keys = dirent_keys(self);
+	if (keys == NULL)
+		return NULL;
+	ret = PyObject_GetIter(keys);
+	Py_DECREF(keys);
+	return ret;
+}
+
+static PyObject *dirent_richcompare(PyObject *self, PyObject *other, int op)
+{
+	PyObject *self_dict, *other_dict, *ret;
+
+	if ((op != Py_EQ && op != Py_NE) ||
+		(!PyDict_Check(other) && !PyObject_TypeCheck(other, &Dirent_Type))) {
+		Py_INCREF(Py_NotImplemented);
+		return Py_NotImplemented;
+	}
+
+	self_dict = dirent_to_dict(self);
+	if (self_dict == NULL)
+		return NULL;
+
+	if (PyDict_Check(other)) {
+		other_dict = other;
+		Py_INCREF(other_dict);
+	} else {
+		other_dict = dirent_to_dict(other);
+		if (other_dict == NULL) {
+			Py_DECREF(self_dict);
+			return NULL;
 		}
-		PyDict_SetItemString(ret, "last_author", obj);
-		Py_DECREF(obj);
 	}
+
+	ret = PyObject_RichCompare(self_dict, other_dict, op);
+	Py_DECREF(self_dict);
+	Py_DECREF(other_dict);
 	return ret;
 }
 
-apr_file_t *apr_file_from_object(PyObject *object, apr_pool_t *pool)
+static PyObject *dirent_repr(PyObject *self)
+{
+	PyObject *dict, *dict_repr, *ret;
+
+	dict = dirent_to_dict(self);
+	if (dict == NULL)
+		return NULL;
+	dict_repr = PyObject_Repr(dict);
+	Py_DECREF(dict);
+	if (dict_repr == NULL)
+		return NULL;
+#if PY_MAJOR_VERSION >= 3
+	ret = PyUnicode_FromFormat("Dirent(%U)", dict_repr);
+#else
+	ret = PyString_FromFormat("Dirent(%s)", PyString_AsString(dict_repr));
+#endif
+	Py_DECREF(dict_repr);
+	return ret;
+}
+
+static PyMethodDef dirent_methods[] = {
+	{ "keys", (PyCFunction)dirent_keys, METH_NOARGS,
+		"S.keys() -> list of available fields" },
+	{ "values", (PyCFunction)dirent_values, METH_NOARGS, NULL },
+	{ "items", (PyCFunction)dirent_items, METH_NOARGS, NULL },
+	{ "get", (PyCFunction)dirent_get, METH_VARARGS, NULL },
+	{ NULL, }
+};
+
+static PyGetSetDef dirent_getsetters[] = {
+	{ "kind", dirent_attr, NULL, "Node kind",
+		(void *)(apr_uintptr_t)SVN_DIRENT_KIND },
+	{ "size", dirent_attr, NULL, "Length of file text, or 0 for directories",
+		(void *)(apr_uintptr_t)SVN_DIRENT_SIZE },
+	{ "has_props", dirent_attr, NULL, "Whether the node has properties",
+		(void *)(apr_uintptr_t)SVN_DIRENT_HAS_PROPS },
+	{ "created_rev", dirent_attr, NULL, "Last revision in which the node changed",
+		(void *)(apr_uintptr_t)SVN_DIRENT_CREATED_REV },
+	{ "time", dirent_attr, NULL, "Time of created_rev (microseconds since the epoch)",
+		(void *)(apr_uintptr_t)SVN_DIRENT_TIME },
+	{ "last_author", dirent_attr, NULL, "Author of created_rev",
+		(void *)(apr_uintptr_t)SVN_DIRENT_LAST_AUTHOR },
+	{ NULL, }
+};
+
+static PyMappingMethods dirent_mapping = {
+	dirent_len, /* mp_length */
+	dirent_subscript, /* mp_subscript */
+	NULL, /* mp_ass_subscript */
+};
+
+static PySequenceMethods dirent_sequence = {
+	.sq_contains = dirent_contains,
+};
+
+PyTypeObject Dirent_Type = {
+	PyVarObject_HEAD_INIT(NULL, 0)
+	"subvertpy.Dirent", /*	const char *tp_name;  For printing, in format "<module>.<name>" */
+	sizeof(DirentObject),
+	0,/*	Py_ssize_t tp_basicsize, tp_itemsize;  For allocation */
+
+	.tp_dealloc = dirent_dealloc, /*	destructor tp_dealloc;	*/
+	.tp_repr = dirent_repr, /*	reprfunc tp_repr;	*/
+	.tp_as_sequence = &dirent_sequence, /*	PySequenceMethods *tp_as_sequence;	*/
+	.tp_as_mapping = &dirent_mapping, /*	PyMappingMethods *tp_as_mapping;	*/
+	.tp_hash = PyObject_HashNotImplemented, /*	hashfunc tp_hash;	*/
+	.tp_doc = "Directory entry.\n"
+		"\n"
+		"Fields that were not requested are None when accessed as "
+		"attributes and missing when accessed as a mapping.", /*	const char *tp_doc;  Documentation string */
+	.tp_richcompare = dirent_richcompare, /*	richcmpfunc tp_richcompare;	*/
+	.tp_iter = dirent_iter, /*	getiterfunc tp_iter;	*/
+	.tp_methods = dirent_methods, /*	struct PyMethodDef *tp_methods;	*/
+	.tp_getset = dirent_getsetters, /*	struct PyGetSetDef *tp_getset;	*/
+};
+
+static apr_file_t *apr_file_from_object_flags(PyObject *object,
+											 apr_int32_t flags,
+											 apr_pool_t *pool)
 {
 	apr_status_t status;
 	int fd = -1;
@@ -1018,8 +1629,7 @@ apr_file_t *apr_file_from_object(PyObject *object, apr_pool_t *pool)
 		return NULL;
 	}
 
-	status = apr_os_file_put(&fp, &osfile,
-			APR_FOPEN_WRITE | APR_FOPEN_CREATE, pool);
+	status = apr_os_file_put(&fp, &osfile, flags, pool);
 	if (status != 0) {
 		PyErr_SetAprStatus(status);
 		return NULL;
@@ -1028,6 +1638,12 @@ apr_file_t *apr_file_from_object(PyObject *object, apr_pool_t *pool)
 	return fp;
 }
 
+apr_file_t *apr_file_from_object(PyObject *object, apr_pool_t *pool)
+{
+	return apr_file_from_object_flags(object,
+			APR_FOPEN_WRITE | APR_FOPEN_CREATE, pool);
+}
+
 static void stream_dealloc(PyObject *self)
 {
 	StreamObject *streamself = (StreamObject *)self;
@@ -1054,6 +1670,8 @@ static PyObject *stream_init(PyTypeObject *type, PyObject *args, PyObject *kwarg
 		return NULL;
 	ret->stream = svn_stream_empty(ret->pool);
 	ret->closed = false;
+	ret->offset = 0;
+	ret->size = 0;
 
 	return (PyObject *)ret;
 }
@@ -1084,14 +1702,26 @@ static PyObject *stream_write(StreamObject *self, PyObject *args)
 
 	RUN_SVN(svn_stream_write(self->stream, buffer, &length));
 
+	self->offset += length;
 	return PyLong_FromLong(length);
 }
 
+/* Read as many bytes as are available, up to *len */
+static svn_error_t *stream_read_into(svn_stream_t *stream, char *buffer,
+									 apr_size_t *len)
+{
+#if ONLY_SINCE_SVN(1, 9)
+	return svn_stream_read_full(stream, buffer, len);
+#else
+	return svn_stream_read(stream, buffer, len);
+#endif
+}
+
 static PyObject *stream_read_full(StreamObject *self, PyObject *args)
 {
-	/* TODO(jelmer): Implemented stream_read2 */
 	PyObject *ret;
 	apr_pool_t *temp_pool;
+	svn_error_t *err;
 	long len = -1;
 	if (!PyArg_ParseTuple(args, "|l", &len))
 		return NULL;
@@ -1100,34 +1730,38 @@ static PyObject *stream_read_full(StreamObject *self, PyObject *args)
 		return PyBytes_FromString("");
 	}
 
-	temp_pool = Pool(NULL);
-	if (temp_pool == NULL)
-		return NULL;
-	if (len != -1) {
-		char *buffer;
+	if (len >= 0) {
 		apr_size_t size = len;
-		buffer = apr_palloc(temp_pool, len);
-		if (buffer == NULL) {
-			PyErr_NoMemory();
-			apr_pool_destroy(temp_pool);
+
+		/* Read straight into the bytes object that is returned. */
+		ret = PyBytes_FromStringAndSize(NULL, len);
+		if (ret == NULL)
+			return NULL;
+		Py_BEGIN_ALLOW_THREADS
+		err = stream_read_into(self->stream, PyBytes_AS_STRING(ret), &size);
+		Py_END_ALLOW_THREADS
+		if (err != NULL) {
+			handle_svn_error(err);
+			svn_error_clear(err);
+			Py_DECREF(ret);
 			return NULL;
 		}
-#if ONLY_SINCE_SVN(1, 9)
-		RUN_SVN_WITH_POOL(temp_pool, svn_stream_read_full(self->stream, buffer, &size));
-#else
-		RUN_SVN_WITH_POOL(temp_pool, svn_stream_read(self->stream, buffer, &size));
-#endif
-		ret = PyBytes_FromStringAndSize(buffer, size);
-		apr_pool_destroy(temp_pool);
+		self->offset += size;
+		if (size != len && _PyBytes_Resize(&ret, size) != 0)
+			return NULL;
 		return ret;
 	} else {
 #if ONLY_SINCE_SVN(1, 6)
 		svn_string_t *result;
+		temp_pool = Pool(NULL);
+		if (temp_pool == NULL)
+			return NULL;
 		RUN_SVN_WITH_POOL(temp_pool, svn_string_from_stream(&result,
 							   self->stream,
 							   temp_pool,
 							   temp_pool));
 		self->closed = true;
+		self->offset += result->len;
 		ret = PyBytes_FromStringAndSize(result->data, result->len);
 		apr_pool_destroy(temp_pool);
 		return ret;
@@ -1139,14 +1773,187 @@ static PyObject *stream_read_full(StreamObject *self, PyObject *args)
 	}
 }
 
+static PyObject *stream_readinto(StreamObject *self, PyObject *args)
+{
+	Py_buffer buffer;
+	apr_size_t size;
+	svn_error_t *err;
+
+	if (!PyArg_ParseTuple(args, "w*:readinto", &buffer))
+		return NULL;
+
+	if (self->closed) {
+		PyBuffer_Release(&buffer);
+		PyErr_SetString(PyExc_ValueError, "I/O operation on closed file");
+		return NULL;
+	}
+
+	size = buffer.len;
+	Py_BEGIN_ALLOW_THREADS
+	err = stream_read_into(self->stream, buffer.buf, &size);
+	Py_END_ALLOW_THREADS
+	PyBuffer_Release(&buffer);
+	if (err != NULL) {
+		handle_svn_error(err);
+		svn_error_clear(err);
+		return NULL;
+	}
+
+	self->offset += size;
+	return PyLong_FromSize_t(size);
+}
+
+static void stream_set_unsupported(const char *msg)
+{
+	PyObject *iomod, *exc;
+
+	iomod = PyImport_ImportModule("io");
+	if (iomod == NULL)
+		return;
+	exc = PyObject_GetAttrString(iomod, "UnsupportedOperation");
+	Py_DECREF(iomod);
+	if (exc == NULL)
+		return;
+	PyErr_SetString(exc, msg);
+	Py_DECREF(exc);
+}
+
+static PyObject *stream_seek(StreamObject *self, PyObject *args)
+{
+#if ONLY_SINCE_SVN(1, 7)
+	PY_LONG_LONG offset;
+	int whence = SEEK_SET;
+	svn_filesize_t target;
+
+	if (!PyArg_ParseTuple(args, "L|i:seek", &offset, &whence))
+		return NULL;
+
+	if (self->closed) {
+		PyErr_SetString(PyExc_ValueError, "I/O operation on closed file");
+		return NULL;
+	}
+
+	switch (whence) {
+		case SEEK_SET:
+			target = offset;
+			break;
+		case SEEK_CUR:
+			target = self->offset + offset;
+			break;
+		case SEEK_END:
+			if (self->size < 0) {
+				stream_set_unsupported("size of stream is unknown");
+				return NULL;
+			}
+			target = self->size + offset;
+			break;
+		default:
+			PyErr_Format(PyExc_ValueError, "invalid whence (%d)", whence);
+			return NULL;
+	}
+
+	if (target < 0) {
+		PyErr_SetString(PyExc_ValueError, "negative seek position");
+		return NULL;
+	}
+
+	if (target < self->offset) {
+		if (!svn_stream_supports_mark(self->stream)) {
+			stream_set_unsupported("stream can not seek backwards");
+			return NULL;
+		}
+		RUN_SVN(svn_stream_reset(self->stream));
+		self->offset = 0;
+	}
+
+	/* Streams can always skip ahead, if need be by reading. */
+	if (target > self->offset) {
+		RUN_SVN(svn_stream_skip(self->stream, target - self->offset));
+	}
+	self->offset = target;
+
+	return PyLong_FromLongLong(target);
+#else
+	PyErr_SetString(PyExc_NotImplementedError,
+		"Subversion 1.6 does not provide svn_stream_skip().");
+	return NULL;
+#endif
+}
+
+static PyObject *stream_tell(StreamObject *self)
+{
+	return PyLong_FromLongLong(self->offset);
+}
+
+static PyObject *stream_readable(StreamObject *self)
+{
+	Py_RETURN_TRUE;
+}
+
+static PyObject *stream_seekable(StreamObject *self)
+{
+#if ONLY_SINCE_SVN(1, 7)
+	if (!self->closed && svn_stream_supports_mark(self->stream))
+		Py_RETURN_TRUE;
+#endif
+	Py_RETURN_FALSE;
+}
+
+static PyObject *stream_get_closed(StreamObject *self, void *closure)
+{
+	return PyBool_FromLong(self->closed);
+}
+
+static Py_ssize_t stream_len(StreamObject *self)
+{
+	if (self->size < 0) {
+		PyErr_SetString(PyExc_TypeError, "size of stream is unknown");
+		return -1;
+	}
+	return self->size;
+}
+
+static int stream_bool(StreamObject *self)
+{
+	/* Like other file objects, streams are true even if they are empty. */
+	return 1;
+}
+
 static PyMethodDef stream_methods[] = {
 	{ "read_full", (PyCFunction)stream_read_full, METH_VARARGS, NULL },
 	{ "read", (PyCFunction)stream_read_full, METH_VARARGS, NULL },
+	{ "readinto", (PyCFunction)stream_readinto, METH_VARARGS,
+		"S.readinto(buffer) -> int\n"
+		"Read into a writable buffer, returning the number of bytes read." },
 	{ "write", (PyCFunction)stream_write, METH_VARARGS, NULL },
 	{ "close", (PyCFunction)stream_close, METH_NOARGS, NULL },
+	{ "seek", (PyCFunction)stream_seek, METH_VARARGS,
+		"S.seek(offset, whence=0) -> int\n"
+		"Change the stream position. Seeking backwards is only possible if\n"
+		"seekable() is true." },
+	{ "tell", (PyCFunction)stream_tell, METH_NOARGS, NULL },
+	{ "readable", (PyCFunction)stream_readable, METH_NOARGS, NULL },
+	{ "seekable", (PyCFunction)stream_seekable, METH_NOARGS, NULL },
 	{ NULL, }
 };
 
+static PyGetSetDef stream_getsetters[] = {
+	{ "closed", (getter)stream_get_closed, NULL, NULL },
+	{ NULL, }
+};
+
+static PyMappingMethods stream_as_mapping = {
+	.mp_length = (lenfunc)stream_len,
+};
+
+static PyNumberMethods stream_as_number = {
+#if PY_MAJOR_VERSION >= 3
+	.nb_bool = (inquiry)stream_bool,
+#else
+	.nb_nonzero = (inquiry)stream_bool,
+#endif
+};
+
 PyTypeObject Stream_Type = {
 	PyVarObject_HEAD_INIT(NULL, 0)
 	"repos.Stream", /*	const char *tp_name;  For printing, in format "<module>.<name>" */
@@ -1157,10 +1964,16 @@ PyTypeObject Stream_Type = {
 
 	.tp_dealloc = stream_dealloc, /*	destructor tp_dealloc;	*/
 
+	.tp_as_number = &stream_as_number, /*	PyNumberMethods *tp_as_number;	*/
+
+	.tp_as_mapping = &stream_as_mapping, /*	PyMappingMethods *tp_as_mapping;	*/
+
 	.tp_doc = "Byte stream", /*	const char *tp_doc;  Documentation string */
 
 	.tp_methods = stream_methods, /*	struct PyMethodDef *tp_methods;	*/
 
+	.tp_getset = stream_getsetters, /*	struct PyGetSetDef *tp_getset;	*/
+
 	.tp_new = stream_init, /* tp_new tp_new */
 };
 
@@ -1203,6 +2016,147 @@ PyObject *dirent_hash_to_dict(apr_hash_t *dirents, unsigned int dirent_fields, a
 	return py_dirents;
 }
 
+#if PY_MAJOR_VERSION >= 3
+#define INT64_TYPECODE "q"
+typedef PY_LONG_LONG column_int64_t;
+#else
+/* Python 2's array module has no 64-bit integer type. */
+#define INT64_TYPECODE "d"
+typedef double column_int64_t;
+#endif
+
+/**
+ * Create an array.array from a buffer of C values.
+ *
+ * :param typecode: array typecode matching the C type of the values
+ * :param size: Size of data in bytes
+ */
+PyObject *py_array_from_buffer(const char *typecode, const void *data, Py_ssize_t size)
+{
+	PyObject *array_mod, *ret;
+
+	array_mod = PyImport_ImportModule("array");
+	if (array_mod == NULL)
+		return NULL;
+#if PY_MAJOR_VERSION >= 3
+	ret = PyObject_CallMethod(array_mod, "array", "sy#", typecode, data, (int)size);
+#else
+	ret = PyObject_CallMethod(array_mod, "array", "ss#", typecode, data, (int)size);
+#endif
+	Py_DECREF(array_mod);
+	return ret;
+}
+
+static int set_column(PyObject *columns, const char *name, PyObject *column)
+{
+	int ret;
+	if (column == NULL)
+		return -1;
+	ret = PyDict_SetItemString(columns, name, column);
+	Py_DECREF(column);
+	return ret;
+}
+
+/**
+ * Convert a hash with dirents to a dictionary with one column per field.
+ *
+ * The "name" column is a list of entry names; the numeric fields are
+ * returned as array.array objects and "last_author" as a list. All columns
+ * are in the same order.
+ */
+PyObject *dirent_hash_to_columns(apr_hash_t *dirents, unsigned int dirent_fields, apr_pool_t *temp_pool)
+{
+	svn_dirent_t *dirent;
+	apr_ssize_t klen;
+	const char *key;
+	apr_hash_index_t *idx;
+	Py_ssize_t count, i;
+	int *kinds;
+	column_int64_t *sizes, *times;
+	signed char *has_props;
+	long *created_revs;
+	PyObject *names, *authors = NULL, *columns;
+
+	count = apr_hash_count(dirents);
+	kinds = apr_palloc(temp_pool, sizeof(int) * (count + 1));
+	sizes = apr_palloc(temp_pool, sizeof(column_int64_t) * (count + 1));
+	times = apr_palloc(temp_pool, sizeof(column_int64_t) * (count + 1));
+	has_props = apr_palloc(temp_pool, sizeof(signed char) * (count + 1));
+	created_revs = apr_palloc(temp_pool, sizeof(long) * (count + 1));
+
+	columns = PyDict_New();
+	if (columns == NULL)
+		return NULL;
+
+	names = PyList_New(count);
+	if (names == NULL)
+		goto fail;
+	if (set_column(columns, "name", names) != 0)
+		goto fail;
+
+	if (dirent_fields & SVN_DIRENT_LAST_AUTHOR) {
+		authors = PyList_New(count);
+		if (authors == NULL)
+			goto fail;
+		if (set_column(columns, "last_author", authors) != 0)
+			goto fail;
+	}
+
+	for (idx = apr_hash_first(temp_pool, dirents), i = 0; idx != NULL;
+		 idx = apr_hash_next(idx), i++) {
+		PyObject *pykey;
+		apr_hash_this(idx, (const void **)&key, &klen, (void **)&dirent);
+		pykey = PyUnicode_FromStringAndSize(key, klen);
+		if (pykey == NULL)
+			goto fail;
+		PyList_SET_ITEM(names, i, pykey);
+		kinds[i] = dirent->kind;
+		sizes[i] = dirent->size;
+		has_props[i] = dirent->has_props?1:0;
+		created_revs[i] = dirent->created_rev;
+		times[i] = dirent->time;
+		if (authors != NULL) {
+			PyObject *author;
+			if (dirent->last_author == NULL) {
+				author = Py_None;
+				Py_INCREF(author);
+			} else {
+				author = PyBytes_FromString(dirent->last_author);
+				if (author == NULL)
+					goto fail;
+			}
+			PyList_SET_ITEM(authors, i, author);
+		}
+	}
+
+	if ((dirent_fields & SVN_DIRENT_KIND) &&
+		set_column(columns, "kind", py_array_from_buffer("i", kinds,
+				   sizeof(int) * count)) != 0)
+		goto fail;
+	if ((dirent_fields & SVN_DIRENT_SIZE) &&
+		set_column(columns, "size", py_array_from_buffer(INT64_TYPECODE, sizes,
+				   sizeof(column_int64_t) * count)) != 0)
+		goto fail;
+	if ((dirent_fields & SVN_DIRENT_HAS_PROPS) &&
+		set_column(columns, "has_props", py_array_from_buffer("b", has_props,
+				   sizeof(signed char) * count)) != 0)
+		goto fail;
+	if ((dirent_fields & SVN_DIRENT_CREATED_REV) &&
+		set_column(columns, "created_rev", py_array_from_buffer("l", created_revs,
+				   sizeof(long) * count)) != 0)
+		goto fail;
+	if ((dirent_fields & SVN_DIRENT_TIME) &&
+		set_column(columns, "time", py_array_from_buffer(INT64_TYPECODE, times,
+				   sizeof(column_int64_t) * count)) != 0)
+		goto fail;
+
+	return columns;
+
+fail:
+	Py_DECREF(columns);
+	return NULL;
+}
+
 PyObject *propchanges_to_list(const apr_array_header_t *propchanges)
 {
     int i;
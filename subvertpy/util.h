@@ -44,7 +44,8 @@ __attribute__((warn_unused_result)) apr_pool_t *Pool(apr_pool_t *parent);
 void handle_svn_error(svn_error_t *error);
 bool string_list_to_apr_array(apr_pool_t *pool, PyObject *l, apr_array_header_t **);
 bool relpath_list_to_apr_array(apr_pool_t *pool, PyObject *l, apr_array_header_t **);
-PyObject *prop_hash_to_dict(apr_hash_t *props);
+PyObject *prop_hash_to_dict(apr_hash_t *props, apr_pool_t *scratch_pool);
+PyObject *py_prop_name(const char *name, apr_ssize_t len);
 apr_hash_t *prop_dict_to_hash(apr_pool_t *pool, PyObject *py_props);
 svn_error_t *py_svn_log_wrapper(
     void *baton, apr_hash_t *changed_paths, long revision, const char *author,
@@ -83,11 +84,15 @@ PyTypeObject *PyErr_GetSubversionExceptionTypeObject(void);
 PyObject *wrap_lock(svn_lock_t *lock);
 apr_array_header_t *revnum_list_to_apr_array(apr_pool_t *pool, PyObject *l);
 svn_stream_t *new_py_stream(apr_pool_t *pool, PyObject *py);
+svn_stream_t *new_py_output_stream(apr_pool_t *pool, PyObject *py);
+svn_stream_t *new_py_input_stream(apr_pool_t *pool, PyObject *py);
 PyObject *PyErr_NewSubversionException(svn_error_t *error);
 apr_hash_t *config_hash_from_object(PyObject *config, apr_pool_t *pool);
 void PyErr_SetAprStatus(apr_status_t status);
 PyObject *py_dirent(const svn_dirent_t *dirent, int dirent_fields);
 PyObject *dirent_hash_to_dict(apr_hash_t *dirents, unsigned int dirent_fields, apr_pool_t *temp_pool);
+PyObject *py_array_from_buffer(const char *typecode, const void *data, Py_ssize_t size);
+PyObject *dirent_hash_to_columns(apr_hash_t *dirents, unsigned int dirent_fields, apr_pool_t *temp_pool);
 PyObject *PyOS_tmpfile(void);
 PyObject *pyify_changed_paths(apr_hash_t *changed_paths, bool node_kind, apr_pool_t *pool);
 bool pyify_log_message(
@@ -135,10 +140,26 @@ typedef struct {
     svn_stream_t *stream;
     apr_pool_t *pool;
     bool closed;
+    /* Current position, and total size or -1 if unknown */
+    svn_filesize_t offset;
+    svn_filesize_t size;
 } StreamObject;
 
 extern PyTypeObject Stream_Type;
 
+typedef struct {
+    PyObject_HEAD
+    unsigned int fields;
+    svn_node_kind_t kind;
+    svn_filesize_t size;
+    svn_boolean_t has_props;
+    svn_revnum_t created_rev;
+    apr_time_t time;
+    PyObject *last_author;
+} DirentObject;
+
+extern PyTypeObject Dirent_Type;
+
 #if ONLY_BEFORE_SVN(1, 7)
 const char *
 _svn_uri_canonicalize(const char *uri,
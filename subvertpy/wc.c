@@ -650,6 +650,8 @@ static PyObject *get_pristine_contents(PyObject *self, PyObject *args)
 	ret->pool = stream_pool;
 	ret->closed = FALSE;
 	ret->stream = stream;
+	ret->offset = 0;
+	ret->size = -1;
 
 	return (PyObject *)ret;
 #else
@@ -1798,7 +1800,7 @@ static PyObject *py_wc_get_prop_diffs(PyObject *self, PyObject *args, PyObject *
                                                    context_obj->context,
                                                    path, pool, pool));
 
-    py_orig_props = prop_hash_to_dict(original_props);
+    py_orig_props = prop_hash_to_dict(original_props, pool);
     if (py_orig_props == NULL) {
         apr_pool_destroy(pool);
         return NULL;
@@ -381,7 +381,7 @@ static PyObject *adm_get_prop_diffs(PyObject *self, PyObject *args)
         apr_pool_destroy(temp_pool);
         return NULL;
     }
-    py_orig_props = prop_hash_to_dict(original_props);
+    py_orig_props = prop_hash_to_dict(original_props, temp_pool);
     apr_pool_destroy(temp_pool);
     if (py_orig_props == NULL) {
         Py_DECREF(py_propchanges);
@@ -1215,6 +1215,8 @@ static PyObject *translated_stream(PyObject *self, PyObject *args)
     ret->pool = stream_pool;
     ret->closed = FALSE;
     ret->stream = stream;
+    ret->offset = 0;
+    ret->size = -1;
 
     return (PyObject *)ret;
 #else